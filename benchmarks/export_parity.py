@@ -0,0 +1,144 @@
+"""
+Parity of the two MongoDB export paths: client-side cleanup (find) against server-side cleanup
+(aggregation pipeline). Both read the same collection through Proj1Data.iter_collection_chunks;
+the resulting frames must be equal. Reports the differing values per column, the BSON bytes per
+document each path transfers and the export time of each path, as one JSON object. Exits with
+status 1 when the frames differ.
+
+The collection holds raw vehicle documents, with "na" and empty strings, nulls, missing fields and
+numbers stored as strings mixed in. Without --mongodb-url it is served by mongomock (pip install
+mongomock), taught the $convert to double the pipeline uses; the same parity is asserted against
+mongomock by tests/test_proj1_data.py.
+
+Usage (from the repository root): python benchmarks/export_parity.py [--rows 20000]
+                                  [--mongodb-url mongodb://localhost:27017]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE = "benchmark"
+COLLECTION = "vehicle-export-parity"
+DIRTY_FRACTION = 0.02
+
+
+def make_documents(n_rows: int, seed: int = 0) -> list:
+    """
+    Raw vehicle documents where about DIRTY_FRACTION of the values of every column are "na", "", null or missing,
+    and about as many numbers are stored as strings.
+    """
+    import numpy as np
+    from fixtures import make_raw_vehicle_frame
+
+    rng = np.random.default_rng(seed)
+    documents = make_raw_vehicle_frame(n_rows, seed).to_dict("records")
+    for document in documents:
+        for column in list(document):
+            if column != "id" and rng.random() < DIRTY_FRACTION:
+                kind = rng.integers(0, 4)
+                if kind == 0:
+                    document[column] = "na"
+                elif kind == 1:
+                    document[column] = ""
+                elif kind == 2:
+                    document[column] = None
+                else:
+                    del document[column]
+            elif isinstance(document[column], (int, float)) and rng.random() < DIRTY_FRACTION:
+                document[column] = str(document[column])
+    return documents
+
+
+def patch_mongomock_convert() -> None:
+    """
+    Evaluates $convert with to: "double" as MongoDB does, mongomock does not implement it.
+    """
+    from mongomock.aggregate import _Parser
+
+    handle_type_convertion_operator = _Parser._handle_type_convertion_operator
+
+    def convert_to_double(parser, operator, values):
+        if operator != "$convert" or values.get("to") != "double":
+            return handle_type_convertion_operator(parser, operator, values)
+        try:
+            value = parser.parse(values["input"])
+        except KeyError:
+            value = None
+        if value is None:
+            return values.get("onNull")
+        if isinstance(value, (bool, int, float)):
+            return float(value)
+        if isinstance(value, str) and re.fullmatch(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?", value):
+            return float(value)
+        return values.get("onError")
+
+    _Parser._handle_type_convertion_operator = convert_to_double
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity of the client-side and server-side cleanup export paths")
+    parser.add_argument("--rows", type=int, default=20_000, help="Documents in the collection")
+    parser.add_argument("--mongodb-url", default=None, help="Use this server instead of mongomock; "
+                                                            f"the {DATABASE}.{COLLECTION} collection is replaced")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    import bson
+    import pyarrow as pa
+    from src.configuration.mongo_db_connection import MongoDBClient
+    from src.data_access.proj1_data import Proj1Data
+
+    if args.mongodb_url:
+        os.environ["MONGODB_URL"] = args.mongodb_url
+        MongoDBClient.client = None
+    else:
+        import mongomock
+        patch_mongomock_convert()
+        MongoDBClient.client = mongomock.MongoClient()
+    proj1_data = Proj1Data()
+    collection = proj1_data.mongo_client.client[DATABASE][COLLECTION]
+    collection.drop()
+    collection.insert_many(make_documents(args.rows))
+
+    frames, seconds = {}, {}
+    for server_side_cleanup in (False, True):
+        start = time.perf_counter()
+        tables = list(proj1_data.iter_collection_chunks(COLLECTION, database_name=DATABASE,
+                                                        server_side_cleanup=server_side_cleanup))
+        seconds[server_side_cleanup] = time.perf_counter() - start
+        frames[server_side_cleanup] = pa.concat_tables(tables).to_pandas()
+
+    client_df, server_df = frames[False], frames[True]
+    differences = {}
+    if list(client_df.columns) != list(server_df.columns) or len(client_df) != len(server_df):
+        differences["shape"] = [list(client_df.columns), len(client_df), list(server_df.columns), len(server_df)]
+    else:
+        for column in client_df.columns:
+            client_values, server_values = client_df[column], server_df[column]
+            differ = ~((client_values == server_values).fillna(False) | (client_values.isna() & server_values.isna()))
+            if differ.any() or client_values.dtype != server_values.dtype:
+                differences[column] = {"rows": int(differ.sum()),
+                                       "dtypes": [str(client_values.dtype), str(server_values.dtype)]}
+
+    schema_names = proj1_data.export_schema().names
+    find_bytes = sum(len(bson.encode(document))
+                     for document in collection.find({}, {name: 1 for name in schema_names}))
+    aggregate_bytes = sum(len(bson.encode(document))
+                          for document in collection.aggregate(proj1_data.aggregation_pipeline()))
+    result = {"rows": len(client_df), "equal": not differences, "differences": differences,
+              "bytes_per_document": {"client_side": round(find_bytes / args.rows, 1),
+                                     "server_side": round(aggregate_bytes / args.rows, 1)},
+              "seconds": {"client_side": round(seconds[False], 3), "server_side": round(seconds[True], 3)}}
+    print(json.dumps(result), flush=True)
+    sys.exit(0 if result["equal"] else 1)
+
+
+if __name__ == "__main__":
+    main()
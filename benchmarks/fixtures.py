@@ -0,0 +1,73 @@
+"""
+Synthetic vehicle data and a fixture MyModel shaped like the production one
+(DataTransformation preprocessing + RandomForestClassifier with ModelTrainerConfig parameters).
+"""
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.config_entity import ModelTrainerConfig
+from src.entity.estimator import MyModel
+
+
+def make_vehicle_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Model feature rows (after DataTransformation's custom transformations), in training column order.
+    """
+    rng = np.random.default_rng(seed)
+    vehicle_age = rng.integers(0, 3, n_rows)
+    return pd.DataFrame({
+        "Gender": rng.integers(0, 2, n_rows),
+        "Age": rng.integers(20, 80, n_rows),
+        "Driving_License": rng.integers(0, 2, n_rows),
+        "Region_Code": rng.integers(0, 53, n_rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Annual_Premium": rng.uniform(2630, 60000, n_rows).round(1),
+        "Policy_Sales_Channel": rng.integers(1, 164, n_rows).astype(float),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Vehicle_Age_lt_1_Year": (vehicle_age == 0).astype(int),
+        "Vehicle_Age_gt_2_Years": (vehicle_age == 2).astype(int),
+        "Vehicle_Damage_Yes": rng.integers(0, 2, n_rows),
+    })[MODEL_FEATURE_COLUMNS]
+
+
+def make_raw_vehicle_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Rows as stored in the MongoDB collection (Gender as Male/Female, categorical Vehicle_Age/Vehicle_Damage).
+    """
+    df = make_vehicle_frame(n_rows, seed)
+    vehicle_age = np.where(df["Vehicle_Age_lt_1_Year"] == 1, "< 1 Year",
+                           np.where(df["Vehicle_Age_gt_2_Years"] == 1, "> 2 Years", "1-2 Year"))
+    raw = df.drop(columns=["Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years", "Vehicle_Damage_Yes"])
+    raw["Gender"] = np.where(df["Gender"] == 1, "Male", "Female")
+    raw["Vehicle_Age"] = vehicle_age
+    raw["Vehicle_Damage"] = np.where(df["Vehicle_Damage_Yes"] == 1, "Yes", "No")
+    raw.insert(0, "id", np.arange(1, n_rows + 1))
+    return raw
+
+
+def make_fixture_model(n_estimators: int = None, n_rows: int = 20_000, seed: int = 0) -> MyModel:
+    """
+    Fits a MyModel on synthetic data, with the production forest parameters unless n_estimators is given.
+    """
+    config = ModelTrainerConfig()
+    df = make_vehicle_frame(n_rows, seed)
+    rng = np.random.default_rng(seed + 1)
+    signal = (df["Vehicle_Damage_Yes"] == 1) & (df["Previously_Insured"] == 0) & (df["Age"] > 30)
+    target = np.where(rng.random(n_rows) < 0.1, ~signal, signal).astype(int)
+
+    preprocessing = Pipeline(steps=[("Preprocessor", ColumnTransformer(
+        transformers=[("StandardScaler", StandardScaler(), ["Age", "Vintage"]),
+                      ("MinMaxScaler", MinMaxScaler(), ["Annual_Premium"])],
+        remainder="passthrough"))])
+    features = preprocessing.fit_transform(df)
+    forest = RandomForestClassifier(n_estimators=n_estimators or config._n_estimators,
+                                    min_samples_split=config._min_samples_split,
+                                    min_samples_leaf=config._min_samples_leaf, max_depth=config._max_depth,
+                                    criterion=config._criterion, random_state=config._random_state)
+    forest.fit(features, target)
+    return MyModel(preprocessing_object=preprocessing, trained_model_object=forest)
@@ -0,0 +1,62 @@
+"""
+Compares sklearn RandomForestClassifier.predict_proba with the CompiledForest backend
+across batch sizes, on a forest trained with the production ModelTrainerConfig parameters.
+
+Usage: python benchmarks/forest_inference.py [--repeats 5]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.entity.config_entity import ModelTrainerConfig
+from src.entity.forest_compiler import CompiledForest
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+
+def make_data(n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n_rows, 11)).astype(np.float32)
+    y = ((x[:, 0] + x[:, 5] * x[:, 9] + rng.normal(scale=0.5, size=n_rows)) > 0).astype(int)
+    return x, y
+
+
+def best_time(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    config = ModelTrainerConfig()
+    x_train, y_train = make_data(20_000)
+    model = RandomForestClassifier(n_estimators=config._n_estimators, min_samples_split=config._min_samples_split,
+                                   min_samples_leaf=config._min_samples_leaf, max_depth=config._max_depth,
+                                   criterion=config._criterion, random_state=config._random_state)
+    model.fit(x_train, y_train)
+    compiled = CompiledForest.from_sklearn(model)
+
+    x_test, _ = make_data(max(BATCH_SIZES), seed=1)
+    results = []
+    for batch_size in BATCH_SIZES:
+        batch = x_test[:batch_size]
+        max_diff = float(np.abs(model.predict_proba(batch) - compiled.predict_proba(batch)).max())
+        sklearn_s = best_time(lambda: model.predict_proba(batch), args.repeats)
+        compiled_s = best_time(lambda: compiled.predict_proba(batch), args.repeats)
+        results.append({"batch_size": batch_size, "sklearn_ms": 1000 * sklearn_s, "compiled_ms": 1000 * compiled_s,
+                        "speedup": sklearn_s / compiled_s, "max_proba_diff": max_diff})
+        print(json.dumps(results[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+File size, save time and load time of the model export formats.
+
+The fixture MyModel is written as a dill pickle (what ModelTrainer saves), as a plain pickle
+and as a model artifact with every available compression. Each file is then loaded repeats
+times, from a warm page cache, and the median load time and the time of the first prediction
+after loading are reported; with memory-mapped formats the first prediction pays for the page
+faults the load skipped. Compressions whose package is not installed are skipped. One JSON
+object per format is printed.
+
+Usage (from the repository root): python benchmarks/model_artifact.py [--repeats 20]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Compression and the module it needs, None for the standard library
+COMPRESSIONS = {"none": None, "zlib": None, "zstd": "zstandard", "lz4": "lz4"}
+
+
+def time_call(function, repeats: int) -> tuple:
+    """
+    Returns the median seconds of repeats calls of function and the result of the last one.
+    """
+    seconds, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size and load time of the model export formats")
+    parser.add_argument("--n-estimators", type=int, default=None, help="Trees of the fixture model, "
+                                                                        "default the production setting")
+    parser.add_argument("--repeats", type=int, default=20, help="Loads per format, the median is reported")
+    parser.add_argument("--rows", type=int, default=256, help="Rows of the first prediction after loading")
+    parser.add_argument("--output", default=None, help="Also write all results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    import numpy as np
+    from fixtures import make_fixture_model, make_vehicle_frame
+    from src.entity.model_artifact import load_model_artifact, save_model_artifact
+    from src.utils.main_utils import load_object, save_object
+
+    model = make_fixture_model(args.n_estimators)
+    dataframe = make_vehicle_frame(args.rows, seed=1)
+    expected = model.predict_proba(dataframe)
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        def pickle_dump(file_path):
+            with open(file_path, "wb") as file_obj:
+                pickle.dump(model, file_obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+        def pickle_load(file_path):
+            with open(file_path, "rb") as file_obj:
+                return pickle.load(file_obj)
+
+        formats = [("dill", lambda path: save_object(path, model), load_object),
+                   ("pickle", pickle_dump, pickle_load)]
+        for compression, module in COMPRESSIONS.items():
+            if module is not None and importlib.util.find_spec(module) is None:
+                print(json.dumps({"format": f"artifact_{compression}", "skipped": f"{module} is not installed"}),
+                      flush=True)
+                continue
+            formats.append((f"artifact_{compression}",
+                            lambda path, compression=compression: save_model_artifact(model, path, compression),
+                            load_model_artifact))
+            formats.append((f"artifact_{compression}_unverified",
+                            None, lambda path: load_model_artifact(path, verify=False)))
+
+        for name, save, load in formats:
+            file_path = os.path.join(work_dir, name.replace("_unverified", ""))
+            save_seconds = time_call(lambda: save(file_path), 1)[0] if save is not None else None
+            load_seconds, loaded = time_call(lambda: load(file_path), args.repeats)
+            start = time.perf_counter()
+            probabilities = loaded.predict_proba(dataframe)
+            first_predict_seconds = time.perf_counter() - start
+            result = {"format": name, "file_mb": round(os.path.getsize(file_path) / 2 ** 20, 2),
+                      "load_ms": round(load_seconds * 1000, 2),
+                      "first_predict_ms": round(first_predict_seconds * 1000, 2),
+                      "max_abs_proba_diff": float(np.abs(probabilities - expected).max())}
+            if save_seconds is not None:
+                result["save_ms"] = round(save_seconds * 1000, 1)
+            results.append(result)
+            print(json.dumps(result), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Memory of N worker processes serving the same model, pickled vs memory-mapped arrays.
+
+The fixture MyModel is written once as a pickle and once as a model archive. For each format
+and worker count, N processes are spawned the way uvicorn --workers spawns them; each loads
+the model (unpickling its own copy, or memory-mapping the extracted .npy files), scores a batch
+so the pages it needs are touched, and waits. The parent then reads /proc/<pid>/smaps_rollup:
+RSS counts shared pages once per process, PSS splits them between the processes sharing them,
+so the PSS total is what the workers really cost together. One JSON object per scenario is printed.
+
+Linux only. Usage (from the repository root): python benchmarks/model_memory.py [--workers 1,4]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMATS = ("pickle", "mmap")
+
+
+def read_smaps_rollup(pid: int) -> dict:
+    """
+    Returns Rss, Pss and private memory of a process in MiB.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"rss_mb": values["Rss"], "pss_mb": values["Pss"],
+            "private_mb": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)}
+
+
+def worker(model_format: str, model_path: str, n_rows: int, ready, done) -> None:
+    sys.path.insert(0, REPO_ROOT)
+    sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+    from fixtures import make_vehicle_frame
+    from src.entity.estimator import MyModel
+    from src.utils.main_utils import load_object
+
+    dataframe = make_vehicle_frame(n_rows, seed=1)
+    baseline = read_smaps_rollup(os.getpid())
+    model = load_object(model_path) if model_format == "pickle" else MyModel.load_arrays(model_path)
+    # Steady state: the trees have been walked, the pages they live on are resident
+    for start in range(0, n_rows, 256):
+        model.predict(dataframe[start:start + 256])
+    ready.put((os.getpid(), baseline))
+    done.wait()
+
+
+def measure(model_format: str, model_path: str, n_workers: int, n_rows: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    ready, done = context.Queue(), context.Event()
+    processes = [context.Process(target=worker, args=(model_format, model_path, n_rows, ready, done))
+                 for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    try:
+        baselines = dict(ready.get(timeout=600) for _ in processes)
+        # All workers hold their model at the same time, read them together
+        usage = {pid: read_smaps_rollup(pid) for pid in baselines}
+    finally:
+        done.set()
+        for process in processes:
+            process.join()
+
+    def total(key: str, minus_baseline: bool = False) -> float:
+        return sum(usage[pid][key] - (baselines[pid][key] if minus_baseline else 0) for pid in usage)
+
+    return {
+        "format": model_format, "workers": n_workers,
+        "rss_total_mb": round(total("rss_mb"), 1),
+        "pss_total_mb": round(total("pss_mb"), 1),
+        "model_rss_total_mb": round(total("rss_mb", True), 1),
+        "model_pss_total_mb": round(total("pss_mb", True), 1),
+        "model_pss_per_worker_mb": round(total("pss_mb", True) / n_workers, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of N workers, pickled vs memory-mapped model")
+    parser.add_argument("--workers", default=f"1,{min(os.cpu_count() or 1, 4)}",
+                        help="Comma separated worker counts")
+    parser.add_argument("--formats", default=",".join(FORMATS), help=f"Comma separated subset of {FORMATS}")
+    parser.add_argument("--n-estimators", type=int, default=None, help="Trees of the fixture model, "
+                                                                        "default the production setting")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows each worker scores before measuring")
+    parser.add_argument("--output", default=None, help="Also write all results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    from fixtures import make_fixture_model
+    from src.entity.model_archive import load_model_archive, save_model_archive
+    from src.utils.main_utils import save_object
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        model = make_fixture_model(args.n_estimators)
+        pickle_path = os.path.join(work_dir, "model.pkl")
+        archive_path = os.path.join(work_dir, "model.tar")
+        save_object(pickle_path, model)
+        save_model_archive(model, archive_path)
+        # Extracted the way SimpleStorageService.load_model does it
+        with open(archive_path, "rb") as archive:
+            arrays_dir = os.path.join(work_dir, "model_arrays")
+            load_model_archive(archive.read(), arrays_dir)
+        del model
+        results.append({"pickle_file_mb": round(os.path.getsize(pickle_path) / 2 ** 20, 1),
+                        "archive_file_mb": round(os.path.getsize(archive_path) / 2 ** 20, 1)})
+        print(json.dumps(results[-1]), flush=True)
+
+        model_paths = {"pickle": pickle_path, "mmap": arrays_dir}
+        for model_format in [model_format for model_format in args.formats.split(",") if model_format]:
+            for n_workers in [int(count) for count in args.workers.split(",")]:
+                results.append(measure(model_format, model_paths[model_format], n_workers, args.rows))
+                print(json.dumps(results[-1]), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
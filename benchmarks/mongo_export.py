@@ -0,0 +1,83 @@
+"""
+Throughput of the MongoDB export into the Parquet feature store, by number of partitions read in parallel.
+
+The collection is filled with raw vehicle documents, then exported with Proj1Data for every
+parallelism; each run is checked for lost or duplicated rows (row count and distinct _ids).
+Without --mongodb-url the documents are served by LocalMongoStub, with a per-batch latency and a
+per-cursor document rate standing in for the server and network time parallel cursors overlap.
+One JSON object per parallelism is printed.
+
+Usage (from the repository root): python benchmarks/mongo_export.py [--rows 500000] [--parallelism 1,2,4,8]
+                                  [--mongodb-url mongodb://localhost:27017]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE = "benchmark"
+COLLECTION = "vehicle-export"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MongoDB export throughput by parallelism")
+    parser.add_argument("--rows", type=int, default=500_000, help="Documents in the collection")
+    parser.add_argument("--parallelism", default="1,2,4,8", help="Comma separated numbers of reader threads")
+    parser.add_argument("--cursor-batch-size", type=int, default=5000, help="Documents per round trip")
+    parser.add_argument("--chunk-rows", type=int, default=50_000, help="Rows per Parquet row group")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stub round trip per cursor batch")
+    parser.add_argument("--docs-per-second", type=float, default=100_000,
+                        help="Stub document rate of one cursor")
+    parser.add_argument("--mongodb-url", default=None, help="Export from this server instead of the stub; "
+                                                            f"the {DATABASE}.{COLLECTION} collection is replaced")
+    parser.add_argument("--output", default=None, help="Also write all results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    import pandas as pd
+    from fixtures import make_raw_vehicle_frame
+    from mongo_stub import LocalMongoStub
+    from src.configuration.mongo_db_connection import MongoDBClient
+    from src.data_access.proj1_data import Proj1Data
+
+    if args.mongodb_url:
+        os.environ["MONGODB_URL"] = args.mongodb_url
+        MongoDBClient.client = None
+    else:
+        MongoDBClient.client = LocalMongoStub(latency_ms=args.latency_ms, docs_per_second=args.docs_per_second)
+    collection = Proj1Data().mongo_client.client[DATABASE][COLLECTION]
+    collection.drop()
+    for start in range(0, args.rows, 100_000):
+        collection.insert_many(make_raw_vehicle_frame(min(100_000, args.rows - start), seed=start).to_dict("records"))
+
+    results = []
+    baseline_seconds = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        for parallelism in [int(count) for count in args.parallelism.split(",")]:
+            file_path = os.path.join(work_dir, f"data-{parallelism}.parquet")
+            start = time.perf_counter()
+            rows = Proj1Data().export_collection_to_parquet(COLLECTION, file_path, database_name=DATABASE,
+                                                            chunk_rows=args.chunk_rows,
+                                                            cursor_batch_size=args.cursor_batch_size,
+                                                            parallelism=parallelism)
+            seconds = time.perf_counter() - start
+            ids = pd.read_parquet(file_path, columns=["_id"])["_id"]
+            baseline_seconds = baseline_seconds or seconds
+            results.append({"parallelism": parallelism, "rows": rows, "seconds": round(seconds, 2),
+                            "rows_per_second": round(rows / seconds), "speedup": round(baseline_seconds / seconds, 2),
+                            "complete": rows == args.rows and ids.nunique() == args.rows})
+            print(json.dumps(results[-1]), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
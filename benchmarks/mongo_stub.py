@@ -0,0 +1,138 @@
+"""
+In-process MongoDB stand-in for benchmarks: answers the pymongo calls the ingestion code makes
+from sorted in-memory documents, so the real Proj1Data code path runs without a server.
+
+Supports find with a projection and _id range filters ($gt/$gte/$lt/$lte, combined with $and),
+cursor batch sizes, aggregate with an optional $match of such a filter + $sample + $project of _id,
+count_documents and insert_many.
+An optional round-trip latency per cursor batch and a per-cursor document rate emulate a remote
+server; they are spent in time.sleep, so concurrent cursors overlap them as they would overlap
+network and server time.
+"""
+import bisect
+import random
+import time
+from typing import Dict, Iterator, List, Optional
+
+from bson import ObjectId
+
+_RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+
+
+class StubCursor:
+    def __init__(self, collection: "StubCollection", documents: List[dict], projection: Optional[dict]) -> None:
+        self._collection = collection
+        self._documents = documents
+        self._fields = None if not projection else [name for name, keep in projection.items() if keep]
+        self._batch_size = 101
+
+    def batch_size(self, batch_size: int) -> "StubCursor":
+        self._batch_size = batch_size
+        return self
+
+    def __iter__(self) -> Iterator[dict]:
+        for start in range(0, len(self._documents), self._batch_size):
+            batch = self._documents[start:start + self._batch_size]
+            self._collection.wait(len(batch))
+            for document in batch:
+                if self._fields is None:
+                    yield dict(document)
+                else:
+                    yield {"_id": document["_id"],
+                           **{name: document[name] for name in self._fields if name in document and name != "_id"}}
+
+
+class StubCollection:
+    def __init__(self, latency_ms: float = 0.0, docs_per_second: float = 0.0) -> None:
+        self.latency_ms = latency_ms
+        self.docs_per_second = docs_per_second
+        self._documents: List[dict] = []
+        self._ids: List[ObjectId] = []
+        self.round_trips = 0
+
+    def wait(self, n_documents: int) -> None:
+        """
+        Spends the emulated round trip and transfer time of one batch of n_documents.
+        """
+        self.round_trips += 1
+        seconds = self.latency_ms / 1000 + (n_documents / self.docs_per_second if self.docs_per_second else 0.0)
+        if seconds:
+            time.sleep(seconds)
+
+    def insert_many(self, documents: List[dict]) -> None:
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        self._documents = sorted(self._documents + list(documents), key=lambda document: document["_id"])
+        self._ids = [document["_id"] for document in self._documents]
+
+    def drop(self) -> None:
+        self._documents, self._ids = [], []
+
+    def _select(self, filter: Optional[dict]) -> List[dict]:
+        """
+        Returns the documents matching a filter of _id ranges, in _id order.
+        """
+        start, end = 0, len(self._ids)
+        conditions = list((filter or {}).get("$and", [filter or {}]))
+        while conditions:
+            condition = conditions.pop()
+            if "$and" in condition:
+                conditions.extend(condition["$and"])
+                continue
+            for field, bounds in condition.items():
+                if field != "_id" or not isinstance(bounds, dict) or set(bounds) - set(_RANGE_OPERATORS):
+                    raise NotImplementedError(f"StubCollection only filters on _id ranges, got {condition}")
+                for operator, value in bounds.items():
+                    if operator == "$gt":
+                        start = max(start, bisect.bisect_right(self._ids, value))
+                    elif operator == "$gte":
+                        start = max(start, bisect.bisect_left(self._ids, value))
+                    elif operator == "$lt":
+                        end = min(end, bisect.bisect_left(self._ids, value))
+                    else:
+                        end = min(end, bisect.bisect_right(self._ids, value))
+        return self._documents[start:max(start, end)]
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[dict] = None) -> StubCursor:
+        return StubCursor(self, self._select(filter), projection)
+
+    def count_documents(self, filter: dict) -> int:
+        return len(self._select(filter))
+
+    def aggregate(self, pipeline: List[dict]) -> Iterator[dict]:
+        match = pipeline[0]["$match"] if pipeline and list(pipeline[0]) == ["$match"] else None
+        stages = pipeline[1:] if match is not None else pipeline
+        if [list(stage) for stage in stages] != [["$sample"], ["$project"]] or stages[1]["$project"] != {"_id": 1}:
+            raise NotImplementedError(f"StubCollection only aggregates $sample + $project of _id, got {pipeline}")
+        self.wait(0)
+        ids = [document["_id"] for document in self._select(match)]
+        size = min(stages[0]["$sample"]["size"], len(ids))
+        return iter([{"_id": _id} for _id in random.sample(ids, size)])
+
+
+class StubDatabase:
+    def __init__(self, client: "LocalMongoStub") -> None:
+        self._client = client
+        self._collections: Dict[str, StubCollection] = {}
+
+    def __getitem__(self, collection_name: str) -> StubCollection:
+        if collection_name not in self._collections:
+            self._collections[collection_name] = StubCollection(self._client.latency_ms,
+                                                                self._client.docs_per_second)
+        return self._collections[collection_name]
+
+
+class LocalMongoStub:
+    def __init__(self, latency_ms: float = 0.0, docs_per_second: float = 0.0) -> None:
+        """
+        :param latency_ms: Added to every cursor batch and aggregation, emulates the round trip to the server
+        :param docs_per_second: If set, every cursor returns documents at this rate
+        """
+        self.latency_ms = latency_ms
+        self.docs_per_second = docs_per_second
+        self._databases: Dict[str, StubDatabase] = {}
+
+    def __getitem__(self, database_name: str) -> StubDatabase:
+        if database_name not in self._databases:
+            self._databases[database_name] = StubDatabase(self)
+        return self._databases[database_name]
@@ -0,0 +1,243 @@
+"""
+In-process S3 stub for benchmarks: answers boto3 S3 requests from a dict of objects
+instead of the network, so the real SimpleStorageService / Proj1Estimator code path runs.
+
+Supports HeadObject, GetObject (with Range), PutObject, multipart uploads and
+ListObjects / ListObjectsV2. An optional per-request latency and per-connection bandwidth
+emulate a remote bucket.
+"""
+import hashlib
+import itertools
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from botocore.awsrequest import AWSResponse
+
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+class _RawResponse:
+    """
+    Minimal urllib3-like body botocore can read and stream. Reads return new bytes objects,
+    as a socket read would, instead of sharing the stored object.
+    """
+
+    def __init__(self, body: bytes) -> None:
+        self._body = memoryview(body)
+        self._position = 0
+
+    def read(self, amt: Optional[int] = None, decode_content: bool = True) -> bytes:
+        end = len(self._body) if amt is None else min(self._position + amt, len(self._body))
+        chunk = bytes(self._body[self._position:end])
+        self._position = end
+        return chunk
+
+    def readinto(self, buffer) -> int:
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def close(self) -> None:
+        self._body.release()
+
+    def stream(self, amt: int = 65536, decode_content: bool = True):
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                break
+            yield chunk
+
+
+class LocalS3Stub:
+    def __init__(self, latency_ms: float = 0.0, bandwidth_mb_s: float = 0.0, keep_uploads: bool = True) -> None:
+        """
+        :param latency_ms: Added to every request, emulates the round trip to S3
+        :param bandwidth_mb_s: If set, every request's body is transferred at this rate
+        :param keep_uploads: False only records the ETag of uploaded objects and drops their
+                             content, so the stub does not add to the memory of upload benchmarks
+        """
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.etags: Dict[Tuple[str, str], str] = {}
+        self.latency_ms = latency_ms
+        self.bandwidth_mb_s = bandwidth_mb_s
+        self.keep_uploads = keep_uploads
+        self.requests: Dict[str, int] = {}
+        # Upload id -> (bucket, key, part number -> (part MD5, part body))
+        self.uploads: Dict[str, Tuple[str, str, Dict[int, Tuple[bytes, bytes]]]] = {}
+        self._upload_ids = itertools.count(1)
+
+    def put_object(self, bucket: str, key: str, body: bytes) -> str:
+        self.objects[(bucket, key)] = body
+        self.etags[(bucket, key)] = hashlib.md5(body).hexdigest()
+        return self.etags[(bucket, key)]
+
+    def _store_upload(self, bucket: str, key: str, body: bytes, etag: str) -> None:
+        if self.keep_uploads:
+            self.objects[(bucket, key)] = body
+        self.etags[(bucket, key)] = etag
+
+    def etag(self, bucket: str, key: str) -> str:
+        return self.etags[(bucket, key)]
+
+    def install(self, client) -> None:
+        """
+        Routes all S3 calls of a boto3 client (or resource.meta.client) to this stub.
+        """
+        client.meta.events.register("before-send.s3", self._handle)
+
+    def install_s3_client(self) -> None:
+        """
+        Routes the shared S3Client connections of the project to this stub,
+        creating them with dummy credentials if needed.
+        """
+        import os
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+        from src.configuration.aws_connection import S3Client
+        s3_client = S3Client()
+        self.install(s3_client.s3_client)
+        self.install(s3_client.s3_resource.meta.client)
+
+    def _parse(self, url: str) -> Tuple[str, str, dict]:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        path = unquote(parts.path)
+        if ".s3." in host or host.endswith(".s3.amazonaws.com"):
+            bucket, key = host.split(".s3", 1)[0], path.lstrip("/")
+        else:
+            bucket, _, key = path.lstrip("/").partition("/")
+        return bucket, key, {name: values[0] for name, values in parse_qs(parts.query, keep_blank_values=True).items()}
+
+    def _response(self, request, status: int, body=b"", headers: dict = None) -> AWSResponse:
+        headers = {"Content-Length": str(len(body)), **(headers or {})}
+        return AWSResponse(request.url, status, headers, _RawResponse(body))
+
+    @staticmethod
+    def _read_body(request) -> bytes:
+        body = request.body
+        if body is None:
+            return b""
+        if not isinstance(body, bytes):
+            body = body.read()
+        encoding = request.headers.get("Content-Encoding", b"")
+        if "aws-chunked" in (encoding.decode() if isinstance(encoding, bytes) else encoding):
+            body = LocalS3Stub._decode_aws_chunked(body)
+        return body
+
+    @staticmethod
+    def _decode_aws_chunked(body: bytes) -> bytes:
+        # <hex size>[;extensions]\r\n<data>\r\n ... 0\r\n<trailers>\r\n\r\n
+        chunks, position = [], 0
+        while True:
+            line_end = body.index(b"\r\n", position)
+            size = int(body[position:line_end].split(b";")[0], 16)
+            if size == 0:
+                return b"".join(chunks)
+            chunks.append(body[line_end + 2:line_end + 2 + size])
+            position = line_end + 2 + size + 2
+
+    def _handle(self, request, **kwargs) -> AWSResponse:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        bucket, key, query = self._parse(request.url)
+        method = request.method
+        operation = f"{method} {'list' if not key else 'object'}"
+        if "uploadId" in query or "uploads" in query:
+            operation = f"{method} multipart"
+        self.requests[operation] = self.requests.get(operation, 0) + 1
+
+        if method == "GET" and not key:
+            return self._list(request, bucket, query)
+        if "uploads" in query or "uploadId" in query:
+            return self._multipart(request, method, bucket, key, query)
+        if method == "PUT":
+            body = self._read_body(request)
+            if self.bandwidth_mb_s:
+                time.sleep(len(body) / (self.bandwidth_mb_s * 1024 * 1024))
+            etag = hashlib.md5(body).hexdigest()
+            self._store_upload(bucket, key, body, etag)
+            return self._response(request, 200, headers={"ETag": f'"{etag}"'})
+
+        body = self.objects.get((bucket, key))
+        if body is None:
+            error = f"<Error><Code>NoSuchKey</Code><Message>{escape(key)}</Message></Error>".encode()
+            return self._response(request, 404, error if method == "GET" else b"")
+        headers = {"ETag": f'"{self.etag(bucket, key)}"', "Last-Modified": LAST_MODIFIED,
+                   "Content-Type": "application/octet-stream", "Accept-Ranges": "bytes"}
+        if method == "HEAD":
+            return AWSResponse(request.url, 200, {**headers, "Content-Length": str(len(body))}, _RawResponse(b""))
+
+        status = 200
+        range_header = request.headers.get("Range")
+        if isinstance(range_header, bytes):
+            range_header = range_header.decode()
+        if range_header:
+            start, _, end = range_header.split("=")[1].partition("-")
+            start, end = int(start), min(int(end) if end else len(body) - 1, len(body) - 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            body, status = memoryview(body)[start:end + 1], 206
+        if self.bandwidth_mb_s:
+            time.sleep(len(body) / (self.bandwidth_mb_s * 1024 * 1024))
+        return self._response(request, status, body, headers)
+
+    def _multipart(self, request, method: str, bucket: str, key: str, query: dict) -> AWSResponse:
+        namespace = 'xmlns="http://s3.amazonaws.com/doc/2006-03-01/"'
+        if method == "POST" and "uploads" in query:
+            upload_id = f"upload-{next(self._upload_ids)}"
+            self.uploads[upload_id] = (bucket, key, {})
+            body = (f"<InitiateMultipartUploadResult {namespace}><Bucket>{escape(bucket)}</Bucket>"
+                    f"<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>")
+            return self._response(request, 200, body.encode(), {"Content-Type": "application/xml"})
+
+        upload_id = query["uploadId"]
+        if upload_id not in self.uploads:
+            error = f"<Error><Code>NoSuchUpload</Code><Message>{escape(upload_id)}</Message></Error>".encode()
+            return self._response(request, 404, error)
+        _, _, parts = self.uploads[upload_id]
+        if method == "PUT":
+            part = self._read_body(request)
+            if self.bandwidth_mb_s:
+                time.sleep(len(part) / (self.bandwidth_mb_s * 1024 * 1024))
+            digest = hashlib.md5(part)
+            parts[int(query["partNumber"])] = (digest.digest(), part if self.keep_uploads else b"")
+            return self._response(request, 200, headers={"ETag": f'"{digest.hexdigest()}"'})
+        if method == "DELETE":
+            del self.uploads[upload_id]
+            return self._response(request, 204)
+
+        # CompleteMultipartUpload: S3's multipart ETag is the MD5 of the part MD5s plus the part count
+        del self.uploads[upload_id]
+        ordered = [parts.pop(number) for number in sorted(parts)]
+        digest = hashlib.md5(b"".join(part_digest for part_digest, _ in ordered)).hexdigest()
+        self._store_upload(bucket, key, b"".join(part for _, part in ordered), f"{digest}-{len(ordered)}")
+        body = (f"<CompleteMultipartUploadResult {namespace}><Bucket>{escape(bucket)}</Bucket>"
+                f"<Key>{escape(key)}</Key><ETag>&quot;{self.etags[(bucket, key)]}&quot;</ETag>"
+                f"</CompleteMultipartUploadResult>")
+        return self._response(request, 200, body.encode(), {"Content-Type": "application/xml"})
+
+    def _list(self, request, bucket: str, query: dict) -> AWSResponse:
+        prefix = query.get("prefix", "")
+        max_keys = int(query.get("max-keys", 1000))
+        start_after = query.get("continuation-token") or query.get("start-after") or query.get("marker") or ""
+        keys = sorted(key for object_bucket, key in self.objects
+                      if object_bucket == bucket and key.startswith(prefix) and key > start_after)
+        page, truncated = keys[:max_keys], len(keys) > max_keys
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key><LastModified>2024-01-01T00:00:00.000Z</LastModified>"
+            f"<ETag>&quot;{self.etag(bucket, key)}&quot;</ETag><Size>{len(self.objects[(bucket, key)])}</Size>"
+            f"<StorageClass>STANDARD</StorageClass></Contents>" for key in page)
+        if query.get("list-type") == "2":
+            extra = f"<KeyCount>{len(page)}</KeyCount>"
+            if truncated:
+                extra += f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>"
+        else:
+            extra = f"<Marker>{escape(start_after)}</Marker>"
+            if truncated:
+                extra += f"<NextMarker>{escape(page[-1])}</NextMarker>"
+        body = (f'<?xml version="1.0" encoding="UTF-8"?>'
+                f'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+                f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix><MaxKeys>{max_keys}</MaxKeys>"
+                f"<IsTruncated>{str(truncated).lower()}</IsTruncated>{extra}{contents}</ListBucketResult>").encode()
+        return self._response(request, 200, body, {"Content-Type": "application/xml"})
@@ -0,0 +1,171 @@
+"""
+Peak memory and wall time of S3 transfers, the whole-body paths against the streaming ones.
+
+A multi-hundred-MB CSV and binary object are served by LocalS3Stub with a per-request latency
+and a per-connection bandwidth, so parallel ranged GETs / multipart parts pay off as they do
+against S3. Every scenario runs in a fresh process; a sampling thread reads its RSS, and the
+reported peak is relative to the RSS once the stub holds the object. One JSON object per
+scenario is printed.
+
+Linux only. Usage (from the repository root): python benchmarks/s3_transfer.py [--size-mb 256]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUCKET = "benchmark"
+SCENARIOS = ("csv_read_object", "csv_streaming", "download_read_object", "download_file",
+             "upload_default_config", "upload_file")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class PeakRssSampler:
+    """
+    Samples the RSS of this process every interval seconds and keeps the maximum.
+    """
+
+    def __init__(self, interval: float = 0.002) -> None:
+        self.interval = interval
+        self.peak = self.baseline = self.rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def rss() -> int:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.rss())
+
+    def __enter__(self) -> "PeakRssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+def run_scenario(scenario: str, paths: dict, args: dict, results) -> None:
+    sys.path.insert(0, REPO_ROOT)
+    sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+    import pandas as pd
+    from boto3.s3.transfer import TransferConfig
+    from s3_stub import LocalS3Stub
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    from src.cloud_storage.transfer import build_transfer_config
+
+    s3_stub = LocalS3Stub(latency_ms=args["s3_latency_ms"], bandwidth_mb_s=args["s3_bandwidth_mb_s"],
+                          keep_uploads=False)
+    s3_stub.install_s3_client()
+    storage = SimpleStorageService()
+    transfer_config = build_transfer_config(chunk_size_mb=args["chunk_size_mb"], max_concurrency=args["concurrency"])
+    if scenario.startswith("csv"):
+        with open(paths["csv"], "rb") as csv_file:
+            s3_stub.put_object(BUCKET, "data.csv", csv_file.read())
+    elif scenario.startswith("download"):
+        with open(paths["binary"], "rb") as binary_file:
+            s3_stub.put_object(BUCKET, "model.bin", binary_file.read())
+    output_path = os.path.join(paths["work_dir"], f"{scenario}.out")
+    progress = []
+
+    with PeakRssSampler() as sampler:
+        start = time.perf_counter()
+        if scenario == "csv_read_object":
+            # Previous get_df_from_object: bytes, then str, then StringIO of the whole file
+            content = storage.read_object(storage.get_file_object("data.csv", BUCKET), make_readable=True)
+            rows = len(pd.read_csv(content, na_values="na"))
+        elif scenario == "csv_streaming":
+            rows = len(storage.read_csv("data.csv", BUCKET))
+        elif scenario == "download_read_object":
+            body = storage.read_object(storage.get_file_object("model.bin", BUCKET), decode=False)
+            with open(output_path, "wb") as output_file:
+                output_file.write(body)
+            del body
+        elif scenario == "download_file":
+            storage.download_file("model.bin", BUCKET, output_path, transfer_config=transfer_config,
+                                  progress_callback=lambda done, total: progress.append(done))
+        elif scenario == "upload_default_config":
+            storage.upload_file(paths["binary"], "upload.bin", BUCKET, remove=False, transfer_config=TransferConfig())
+        elif scenario == "upload_file":
+            storage.upload_file(paths["binary"], "upload.bin", BUCKET, remove=False, transfer_config=transfer_config,
+                                progress_callback=lambda done, total: progress.append(done))
+        seconds = time.perf_counter() - start
+
+    result = {"scenario": scenario, "seconds": round(seconds, 3),
+              "peak_rss_delta_mb": round((sampler.peak - sampler.baseline) / 2 ** 20, 1),
+              "s3_requests": dict(s3_stub.requests)}
+    if scenario.startswith("csv"):
+        result["rows"] = rows
+    if progress:
+        result["progress_callbacks"] = len(progress)
+    results.put(result)
+
+
+def make_files(work_dir: str, size_mb: int) -> dict:
+    """
+    Writes a raw vehicle CSV and a random binary object of about size_mb each.
+    """
+    sys.path.insert(0, REPO_ROOT)
+    from fixtures import make_raw_vehicle_frame
+
+    sample = make_raw_vehicle_frame(100_000).to_csv(index=False)
+    header, _, body = sample.partition("\n")
+    target = size_mb * 2 ** 20
+    csv_path = os.path.join(work_dir, "data.csv")
+    with open(csv_path, "w") as csv_file:
+        csv_file.write(header + "\n")
+        written = 0
+        while written < target:
+            csv_file.write(body)
+            written += len(body)
+    binary_path = os.path.join(work_dir, "model.bin")
+    with open(binary_path, "wb") as binary_file:
+        for _ in range(size_mb):
+            binary_file.write(os.urandom(2 ** 20))
+    return {"work_dir": work_dir, "csv": csv_path, "binary": binary_path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory and wall time of S3 transfers")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the CSV and binary objects")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma separated subset of {SCENARIOS}")
+    parser.add_argument("--chunk-size-mb", type=float, default=8, help="Part size of the streaming transfers")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parts transferred in parallel")
+    parser.add_argument("--s3-latency-ms", type=float, default=20.0, help="Emulated S3 round trip")
+    parser.add_argument("--s3-bandwidth-mb-s", type=float, default=100.0,
+                        help="Emulated per-connection S3 transfer rate")
+    parser.add_argument("--output", default=None, help="Also write all results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+    os.chdir(REPO_ROOT)
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = make_files(work_dir, args.size_mb)
+        for scenario in [scenario for scenario in args.scenarios.split(",") if scenario]:
+            queue = context.Queue()
+            process = context.Process(target=run_scenario, args=(scenario, paths, vars(args), queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append({"size_mb": args.size_mb, **result})
+            print(json.dumps(results[-1]), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+In-process load test of the FastAPI service in main.py.
+
+The ASGI app is driven through httpx without a network server, and S3 is replaced by
+LocalS3Stub serving a fixture MyModel, so the real model download / warm-up / prediction
+path runs. Every route is measured at several concurrency levels, first with a cold model
+(not yet downloaded) and then warm. One JSON object per scenario is printed with
+requests/sec and p50/p95/p99 latency; --output also writes all of them as one JSON file.
+
+Usage (from the repository root): python benchmarks/service_load.py [--concurrency 1,4,16,64]
+"""
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES = ("form", "batch", "upload")
+
+
+def percentile(latencies: list, q: float) -> float:
+    return float(np.percentile(latencies, q)) * 1000 if latencies else None
+
+
+def summarize(route: str, phase: str, concurrency: int, latencies: list, errors: int, wall: float) -> dict:
+    return {
+        "route": route, "phase": phase, "concurrency": concurrency,
+        "requests": len(latencies) + errors, "errors": errors,
+        "rps": (len(latencies) + errors) / wall if wall else None,
+        "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99), "max_ms": max(latencies) * 1000 if latencies else None,
+    }
+
+
+class ServiceLoadTest:
+    def __init__(self, main_module, batch_size: int, seed: int = 0) -> None:
+        from fixtures import make_raw_vehicle_frame, make_vehicle_frame
+        self.main = main_module
+        self.batch_size = batch_size
+        # Distinct rows per request, so the prediction cache does not serve the load
+        self.rows = make_vehicle_frame(50_000, seed).to_dict("records")
+        self.raw_csv = make_raw_vehicle_frame(batch_size, seed).to_csv(index=False).encode()
+        self.counter = 0
+
+    def build_request(self, route: str) -> dict:
+        self.counter += 1
+        if route == "form":
+            row = self.rows[self.counter % len(self.rows)]
+            return {"method": "POST", "url": "/", "data": {k: str(v) for k, v in row.items()},
+                    "headers": {"accept": "application/json"}}
+        if route == "batch":
+            start = (self.counter * self.batch_size) % (len(self.rows) - self.batch_size)
+            return {"method": "POST", "url": "/predict/batch", "json": self.rows[start:start + self.batch_size]}
+        return {"method": "POST", "url": "/predict/upload", "content": self.raw_csv,
+                "headers": {"content-type": "text/csv"}}
+
+    @staticmethod
+    def is_error(route: str, response) -> bool:
+        if response.status_code != 200:
+            return True
+        if route == "upload":
+            return "error" in response.text
+        return response.json().get("status") is False
+
+    async def run_level(self, client, route: str, concurrency: int, n_requests: int):
+        latencies, errors = [], 0
+        remaining = n_requests
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                request = self.build_request(route)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(**request)
+                    failed = self.is_error(route, response)
+                except Exception:
+                    failed = True
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+    def reset_model(self) -> None:
+        """
+        Forgets the loaded model and cached predictions, so the next request downloads it again.
+        """
+        classifier = self.main.inference_executor.classifier
+        classifier.model_holder.stop()
+        classifier.model_holder._current = None
+        if classifier.prediction_cache is not None:
+            classifier.prediction_cache.clear()
+        self.main.serving_state["ready"] = False
+
+    async def run(self, routes, concurrency_levels, n_requests: int):
+        import httpx
+        results = []
+        transport = httpx.ASGITransport(app=self.main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            for route in routes:
+                for concurrency in concurrency_levels:
+                    # Cold: a burst of concurrent requests hits a model that is not loaded yet
+                    self.reset_model()
+                    latencies, errors, wall = await self.run_level(client, route, concurrency, concurrency)
+                    results.append(summarize(route, "cold", concurrency, latencies, errors, wall))
+                    print(json.dumps(results[-1]), flush=True)
+
+            # Warm: the startup warm-up has run, as it does before /health/ready turns green
+            self.reset_model()
+            warm_up_start = time.perf_counter()
+            await self.main.warm_up_model()
+            results.append({"route": "warm_up", "phase": "startup",
+                            "seconds": time.perf_counter() - warm_up_start, **self.main.serving_state})
+            print(json.dumps(results[-1]), flush=True)
+            for route in routes:
+                for concurrency in concurrency_levels:
+                    # Short untimed run so the first timed requests do not pay one-off costs
+                    await self.run_level(client, route, concurrency, concurrency)
+                    latencies, errors, wall = await self.run_level(client, route, concurrency, n_requests)
+                    results.append(summarize(route, "warm", concurrency, latencies, errors, wall))
+                    print(json.dumps(results[-1]), flush=True)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test of the prediction service")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per warm scenario")
+    parser.add_argument("--routes", default=",".join(ROUTES), help=f"Comma separated subset of {ROUTES}")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per batch / upload request")
+    parser.add_argument("--n-estimators", type=int, default=None, help="Trees of the fixture model, "
+                                                                        "default the production setting")
+    parser.add_argument("--s3-latency-ms", type=float, default=20.0, help="Emulated S3 round trip")
+    parser.add_argument("--s3-bandwidth-mb-s", type=float, default=100.0, help="Emulated S3 download rate")
+    parser.add_argument("--output", default=None, help="Also write all results to this JSON file")
+    args = parser.parse_args()
+
+    # Quiet logging and no background revalidation, before the project reads its settings
+    os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+    os.environ.setdefault("MODEL_REFRESH_INTERVAL_SECONDS", "0")
+    # Cold runs still find the model in this run's local model cache, as a restarted worker would
+    os.environ.setdefault("MODEL_CACHE_DIR", tempfile.mkdtemp(prefix="service-load-model-cache-"))
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    from fixtures import make_fixture_model
+    from s3_stub import LocalS3Stub
+    from src.constants import MODEL_BUCKET_NAME, MODEL_FILE_NAME
+
+    s3_stub = LocalS3Stub(latency_ms=args.s3_latency_ms, bandwidth_mb_s=args.s3_bandwidth_mb_s)
+    s3_stub.install_s3_client()
+    s3_stub.put_object(MODEL_BUCKET_NAME, MODEL_FILE_NAME, pickle.dumps(make_fixture_model(args.n_estimators)))
+
+    import main as main_module
+    load_test = ServiceLoadTest(main_module, batch_size=args.batch_size)
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    routes = [route for route in args.routes.split(",") if route]
+    results = asyncio.run(load_test.run(routes, concurrency_levels, args.requests))
+    main_module.inference_executor.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"config": vars(args), "results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,71 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.responses import HTMLResponse, RedirectResponse
 from uvicorn import run as app_run
 
+import asyncio
+import json
+from contextlib import asynccontextmanager
 from typing import Optional
 
 # Importing constants and pipeline modules from the project
-from src.constants import APP_HOST, APP_PORT
-from src.pipeline.prediction_pipeline import VehicleData, VehicleDataClassifier
-from src.pipeline.training_pipeline import TrainPipeline
+from src.constants import APP_HOST, APP_PORT, BULK_SCORING_CHUNK_ROWS, WARM_UP_RETRY_SECONDS
+from src.logger import logging
+from src.pipeline.prediction_pipeline import VehicleData, VehicleBatchData
+from src.pipeline.prediction_batcher import PredictionBatcher, PredictionQueueFull
+from src.pipeline.inference_executor import InferenceExecutor
+from src.pipeline.shadow_scorer import ShadowScorer
+from src.pipeline.training_job_runner import TrainingJobAlreadyRunning, TrainingJobRunner
+from src.utils.metrics import (MetricsMiddleware, PREDICTION_ERRORS_TOTAL, PREDICTION_STAGE_SECONDS,
+                               REGISTRY)
+from src.utils.stream_utils import iter_dataframe_chunks
+
+# Runs blocking model loads and predictions off the event loop
+inference_executor = InferenceExecutor()
+
+# Coalesces concurrent single-record predictions into vectorized model calls
+prediction_batcher = PredictionBatcher(inference_executor=inference_executor)
+
+# Scores sampled live requests with a candidate model, off the response path
+shadow_scorer = ShadowScorer()
+
+# Runs training pipelines in a separate process, one at a time
+training_job_runner = TrainingJobRunner()
+
+# Readiness of the model server, filled in by the startup warm-up
+serving_state = {"ready": False, "model_version": None, "model_load_seconds": None,
+                 "warm_up_seconds": None, "error": None}
+
+async def warm_up_model():
+    """
+    Loads the model and runs a synthetic batch through it, retrying until it succeeds,
+    so the first real request never pays for the S3 download or lazy initialization.
+    """
+    while True:
+        try:
+            warm_up_report = await inference_executor.run("warm_up")
+            serving_state.update(warm_up_report, ready=True, error=None)
+            logging.info(f"Model server ready: {warm_up_report}")
+            return
+        except Exception as e:
+            serving_state["error"] = f"{e}"
+            logging.error(f"Model warm-up failed, retrying in {WARM_UP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(WARM_UP_RETRY_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so liveness is served while the model downloads
+    warm_up_task = asyncio.create_task(warm_up_model())
+    yield
+    warm_up_task.cancel()
+    shadow_scorer.stop()
+    inference_executor.shutdown()
 
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Mount the 'static' directory for serving static files (like CSS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -34,6 +85,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count and time every request for the /metrics endpoint
+app.add_middleware(MetricsMiddleware)
+
+FORM_PARSE_SECONDS = PREDICTION_STAGE_SECONDS.labels("form_parse")
+
+def register_serving_metrics():
+    """
+    Registers gauges read from the live serving objects whenever /metrics is scraped.
+    The classifier is looked up on every scrape and never created here, so importing the app
+    needs no AWS credentials; model and cache gauges have no sample until the first model call.
+    In "process" executor mode the model-side stage timings and the prediction cache
+    live in the worker processes and are not visible here.
+    """
+    def model_holder():
+        classifier = inference_executor.created_classifier
+        return classifier.model_holder if classifier is not None else None
+
+    def prediction_cache():
+        classifier = inference_executor.created_classifier
+        return classifier.prediction_cache if classifier is not None else None
+
+    def model_info():
+        holder = model_holder()
+        return [((holder.model_version,), 1)] if holder is not None and holder.is_loaded else None
+
+    def prediction_cache_events():
+        cache = prediction_cache()
+        return [((event,), getattr(cache, event)) for event in ("hits", "misses", "evictions", "invalidations")] \
+            if cache is not None else None
+
+    REGISTRY.gauge("model_info", "Version (S3 ETag) of the model being served", model_info, ("version",))
+    REGISTRY.gauge("model_load_seconds", "Time taken by the last model load",
+                   lambda: model_holder().load_duration if model_holder() is not None else None)
+    REGISTRY.gauge("model_ready", "1 once the startup warm-up has finished", lambda: int(serving_state["ready"]))
+    REGISTRY.gauge("inference_in_flight", "Inference calls running or queued in the executor",
+                   lambda: inference_executor.in_flight)
+
+    REGISTRY.gauge("prediction_cache_entries", "Entries in the prediction cache",
+                   lambda: len(prediction_cache()._entries) if prediction_cache() is not None else None)
+    REGISTRY.gauge("prediction_cache_events", "Prediction cache hits, misses, evictions and invalidations",
+                   prediction_cache_events, ("event",))
+
+    REGISTRY.gauge("micro_batcher_requests", "Requests scored through the micro-batcher",
+                   lambda: prediction_batcher.request_count)
+    REGISTRY.gauge("micro_batcher_batches", "Batches scored by the micro-batcher",
+                   lambda: prediction_batcher.batch_count)
+    REGISTRY.gauge("micro_batcher_batch_size_mean", "Mean rows per micro-batch",
+                   lambda: prediction_batcher.get_stats()["batch_size_mean"])
+
+    REGISTRY.gauge("shadow_scoring", "Shadow scoring of the candidate model: submitted, dropped and scored rows",
+                   lambda: [((event,), getattr(shadow_scorer, event)) for event in
+                            ("submitted", "dropped", "scored_rows", "agreed_rows", "errors")], ("event",))
+    REGISTRY.gauge("shadow_candidate_cpu_seconds", "CPU time spent scoring with the candidate model",
+                   lambda: shadow_scorer.cpu_seconds)
+
+register_serving_metrics()
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator consumes the request body while responding.
+    The stock class listens for client disconnects through receive() under ASGI < 2.4,
+    which would swallow request body chunks meant for the iterator.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
 class DataForm:
     """
     DataForm class to handle and process incoming form data.
@@ -83,17 +202,39 @@ async def index(request: Request):
 
 # Route to trigger the model training process
 @app.get("/train")
+@app.post("/train")
 async def trainRouteClient():
     """
-    Endpoint to initiate the model training pipeline.
+    Endpoint to start the model training pipeline as a background job.
+    Returns the job id right away; progress is available at /train/{job_id}.
     """
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful!!!")
+        status = await asyncio.to_thread(training_job_runner.start_job)
+        return JSONResponse(status_code=202, content=status)
 
+    except TrainingJobAlreadyRunning as e:
+        return JSONResponse(status_code=409, content={"status": False, "error": f"{e}", "job_id": e.job_id})
     except Exception as e:
-        return Response(f"Error Occurred! {e}")
+        return JSONResponse(status_code=500, content={"status": False, "error": f"{e}"})
+
+# Route to list training jobs
+@app.get("/train/jobs")
+async def trainJobsRouteClient():
+    """
+    Endpoint to list all training jobs, newest first.
+    """
+    return await asyncio.to_thread(training_job_runner.list_jobs)
+
+# Route to report the status of a training job
+@app.get("/train/{job_id}")
+async def trainStatusRouteClient(job_id: str):
+    """
+    Endpoint to report the status, per-stage progress, artifacts and log location of a training job.
+    """
+    status = await asyncio.to_thread(training_job_runner.get_job_status, job_id)
+    if status is None:
+        return JSONResponse(status_code=404, content={"status": False, "error": f"Unknown training job {job_id}"})
+    return status
 
 # Route to handle form submission and make predictions
 @app.post("/")
@@ -103,7 +244,8 @@ async def predictRouteClient(request: Request):
     """
     try:
         form = DataForm(request)
-        await form.get_vehicle_data()
+        with FORM_PARSE_SECONDS.time():
+            await form.get_vehicle_data()
         
         vehicle_data = VehicleData(
                                 Gender= form.Gender,
@@ -122,24 +264,150 @@ async def predictRouteClient(request: Request):
         # Convert form data into a DataFrame for the model
         vehicle_df = vehicle_data.get_vehicle_input_data_frame()
 
-        # Initialize the prediction pipeline
-        model_predictor = VehicleDataClassifier()
-
-        # Make a prediction and retrieve the result
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
+        # Make a prediction through the micro-batcher and retrieve the result
+        predictions, probabilities, model_version = await prediction_batcher.predict(vehicle_df)
+        value, probability = predictions[0], float(probabilities[0])
+        shadow_scorer.submit(vehicle_df, predictions, model_version)
 
         # Interpret the prediction result as 'Response-Yes' or 'Response-No'
         status = "Response-Yes" if value == 1 else "Response-No"
 
+        # API clients ranking leads get the score as JSON instead of the HTML page
+        if "application/json" in request.headers.get("accept", ""):
+            return {"status": True, "prediction": int(value), "probability": probability, "context": status}
+
         # Render the same HTML page with the prediction result
         return templates.TemplateResponse(
             "vehicledata.html",
-            {"request": request, "context": status},
+            {"request": request, "context": status, "probability": f"{probability:.3f}"},
         )
         
+    except PredictionQueueFull as e:
+        PREDICTION_ERRORS_TOTAL.inc("/")
+        return JSONResponse(status_code=503, content={"status": False, "error": f"{e}"})
     except Exception as e:
+        PREDICTION_ERRORS_TOTAL.inc("/")
         return {"status": False, "error": f"{e}"}
 
+async def get_vehicle_batch_data(request: Request) -> VehicleBatchData:
+    """
+    Parses a batch request body into VehicleBatchData.
+    Accepts NDJSON (one record per line), a JSON array of records,
+    {"records": [...]} or columnar arrays as {"columns": {...}} / {feature: [values]}.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/ndjson")):
+        records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        return VehicleBatchData.from_records(records)
+
+    payload = json.loads(body)
+    if isinstance(payload, list):
+        return VehicleBatchData.from_records(payload)
+    if "records" in payload:
+        return VehicleBatchData.from_records(payload["records"])
+    return VehicleBatchData.from_columns(payload.get("columns", payload))
+
+# Route to score many vehicles in one request
+@app.post("/predict/batch")
+async def predictBatchRouteClient(request: Request):
+    """
+    Endpoint to receive a batch of records, score them chunk by chunk
+    and return predictions and probabilities in input order.
+    """
+    try:
+        batch_data = await get_vehicle_batch_data(request)
+        vehicle_df = batch_data.get_vehicle_input_data_frame()
+
+        predictions, probabilities, model_version = await inference_executor.run("predict_batch", vehicle_df,
+                                                                                 return_version=True)
+        shadow_scorer.submit(vehicle_df, predictions, model_version)
+
+        return {"status": True, "count": len(predictions),
+                "predictions": predictions, "probabilities": probabilities}
+
+    except Exception as e:
+        PREDICTION_ERRORS_TOTAL.inc("/predict/batch")
+        return {"status": False, "error": f"{e}"}
+
+# Route to score a CSV/NDJSON upload of raw collection records while it streams in
+@app.post("/predict/upload")
+async def predictUploadRouteClient(request: Request):
+    """
+    Endpoint to score an uploaded file of raw records (Gender as Male/Female, Vehicle_Age and
+    Vehicle_Damage as categories) chunk by chunk. Results are streamed back in the upload format
+    as soon as each chunk is scored, so memory stays constant regardless of file size.
+    """
+    is_ndjson = request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/ndjson"))
+    data_format = "ndjson" if is_ndjson else "csv"
+
+    async def score_chunks():
+        if data_format == "csv":
+            yield "id,prediction,probability\n"
+        row_offset = 0
+        try:
+            async for raw_df in iter_dataframe_chunks(request.stream(), data_format, BULK_SCORING_CHUNK_ROWS):
+                ids = raw_df["id"].tolist() if "id" in raw_df.columns else range(row_offset, row_offset + len(raw_df))
+                predictions, probabilities = await inference_executor.run("predict_raw_batch", raw_df)
+                row_offset += len(raw_df)
+                if data_format == "csv":
+                    yield "".join(f"{i},{p},{q}\n" for i, p, q in zip(ids, predictions, probabilities))
+                else:
+                    yield "".join(json.dumps({"id": i, "prediction": p, "probability": q}) + "\n"
+                                  for i, p, q in zip(ids, predictions, probabilities))
+        except Exception as e:
+            # The status line is already sent, so report the failure in-band and stop
+            PREDICTION_ERRORS_TOTAL.inc("/predict/upload")
+            error = {"status": False, "error": f"{e}", "rows_scored": row_offset}
+            yield json.dumps(error) + "\n" if data_format == "ndjson" else f"# error: {json.dumps(error)}\n"
+
+    media_type = "application/x-ndjson" if data_format == "ndjson" else "text/csv"
+    return UploadStreamingResponse(score_chunks(), media_type=media_type)
+
+# Route to report micro-batching statistics of the single-record route
+@app.get("/predict/stats")
+async def predictStatsRouteClient():
+    """
+    Endpoint to report batch-size and queue-wait statistics of the micro-batcher.
+    """
+    return prediction_batcher.get_stats()
+
+# Route to report shadow scoring of the candidate model
+@app.get("/predict/shadow")
+async def predictShadowRouteClient():
+    """
+    Endpoint to report the agreement rate of the candidate model with production
+    and the CPU time it adds.
+    """
+    return shadow_scorer.get_stats()
+
+# Route to expose serving metrics to Prometheus
+@app.get("/metrics")
+async def metricsRouteClient():
+    """
+    Endpoint exposing per-stage latency histograms, request and error counts, the model
+    version and cache and micro-batching statistics in the Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# Liveness probe: the process is up and the event loop responds
+@app.get("/health/live")
+async def healthLiveRouteClient():
+    """
+    Endpoint for liveness probes, does not touch the model.
+    """
+    return {"status": "alive"}
+
+# Readiness probe: the model is loaded and warmed up
+@app.get("/health/ready")
+async def healthReadyRouteClient():
+    """
+    Endpoint for readiness probes. Returns 503 until the startup warm-up has finished,
+    then the model version, model load time and warm-up latency.
+    """
+    if not serving_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting", **serving_state})
+    return {"status": "ready", **serving_state}
+
 # Main entry point to start the FastAPI server
 if __name__ == "__main__":
     app_run(app, host=APP_HOST, port=APP_PORT)
\ No newline at end of file
@@ -2,22 +2,65 @@
 import boto3
 from src.configuration.aws_connection import S3Client
 from io import StringIO
-from typing import Union,List
-import os,sys
+from typing import Union,List,Optional,Tuple,Dict,Iterator,Callable,BinaryIO
+from dataclasses import dataclass
+from datetime import datetime
+import os,sys,tempfile,threading,time
 from src.logger import logging
+from src.constants import MODEL_ARRAYS_DIR, MODEL_CACHE_MAX_BYTES, S3_METADATA_CACHE_TTL_SECONDS
+from src.cloud_storage.model_cache import ModelDiskCache
+from src.cloud_storage.transfer import TransferProgress, build_transfer_config
+from boto3.s3.transfer import TransferConfig
+from botocore.response import StreamingBody
+from src.entity.model_archive import is_model_archive, load_model_archive
+from src.entity.model_artifact import is_model_artifact, load_model_artifact
 from mypy_boto3_s3.service_resource import Bucket
 from src.exception import MyException
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
 from pandas import DataFrame,read_csv
 import pickle
 
 
+# Errors of an unreachable S3 for which the last good cached model is served instead
+S3_UNREACHABLE_ERRORS = (EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError)
+
+
+def is_s3_unreachable(error: BaseException) -> bool:
+    """
+    Tells whether error is, or was raised while handling, one of S3_UNREACHABLE_ERRORS.
+    Follows the MyException wrapping and the last error kept by s3transfer's retries.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, S3_UNREACHABLE_ERRORS):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__ or getattr(error, "last_exception", None)
+    return False
+
+
+@dataclass(frozen=True)
+class S3ObjectMetadata:
+    key: str
+    size: int
+    etag: str
+    last_modified: datetime
+
+
 class SimpleStorageService:
     """
     A class for interacting with AWS S3 storage, providing methods for file management, 
     data uploads, and data retrieval in S3 buckets.
+
+    Single keys are looked up with HEAD requests whose result (including "not found") is
+    cached process-wide for S3_METADATA_CACHE_TTL_SECONDS. Keys ending with "/" are treated
+    as directories and listed lazily, page by page.
     """
 
+    # (bucket, key) -> (expiry time, metadata or None if the key does not exist)
+    _metadata_cache: Dict[Tuple[str, str], Tuple[float, Optional[S3ObjectMetadata]]] = {}
+    _metadata_cache_lock = threading.Lock()
+
     def __init__(self):
         """
         Initializes the SimpleStorageService instance with S3 resource and client
@@ -26,10 +69,12 @@ class SimpleStorageService:
         s3_client = S3Client()
         self.s3_resource = s3_client.s3_resource
         self.s3_client = s3_client.s3_client
+        self.model_cache = ModelDiskCache() if MODEL_CACHE_MAX_BYTES > 0 else None
 
     def s3_key_path_available(self, bucket_name, s3_key) -> bool:
         """
         Checks if a specified S3 key path (file path) is available in the specified bucket.
+        A key ending with "/" is a directory, available if any object is stored under it.
 
         Args:
             bucket_name (str): Name of the S3 bucket.
@@ -39,9 +84,74 @@ class SimpleStorageService:
             bool: True if the file exists, False otherwise.
         """
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=s3_key)]
-            return len(file_objects) > 0
+            if s3_key.endswith("/"):
+                return next(self.iter_objects(bucket_name, prefix=s3_key, page_size=1), None) is not None
+            return self.head_object_metadata(bucket_name, s3_key) is not None
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def head_object_metadata(self, bucket_name: str, s3_key: str, use_cache: bool = True) -> Optional[S3ObjectMetadata]:
+        """
+        Returns size, ETag and last-modified time of the exact key s3_key, or None if it does not exist.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Exact key of the object.
+            use_cache (bool): Whether a result cached less than S3_METADATA_CACHE_TTL_SECONDS ago may be returned.
+
+        Returns:
+            Optional[S3ObjectMetadata]: Metadata of the object, None if there is no such key.
+        """
+        try:
+            cache_key = (bucket_name, s3_key)
+            if use_cache and S3_METADATA_CACHE_TTL_SECONDS > 0:
+                cached = self._metadata_cache.get(cache_key)
+                if cached is not None and cached[0] > time.monotonic():
+                    return cached[1]
+            try:
+                response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+                metadata = S3ObjectMetadata(key=s3_key, size=response["ContentLength"],
+                                            etag=response["ETag"].strip('"'),
+                                            last_modified=response["LastModified"])
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                    raise
+                metadata = None
+            self._cache_metadata(cache_key, metadata)
+            return metadata
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _cache_metadata(self, cache_key: Tuple[str, str], metadata: Optional[S3ObjectMetadata]) -> None:
+        if S3_METADATA_CACHE_TTL_SECONDS > 0:
+            with self._metadata_cache_lock:
+                self._metadata_cache[cache_key] = (time.monotonic() + S3_METADATA_CACHE_TTL_SECONDS, metadata)
+
+    def _invalidate_metadata(self, bucket_name: str, s3_key: str) -> None:
+        with self._metadata_cache_lock:
+            self._metadata_cache.pop((bucket_name, s3_key), None)
+
+    def iter_objects(self, bucket_name: str, prefix: str = "", page_size: int = 1000) -> Iterator[S3ObjectMetadata]:
+        """
+        Lists the objects under prefix lazily: the next page is only requested once the
+        previous one has been consumed.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            prefix (str): Key prefix to list, usually a directory ending with "/".
+            page_size (int): Keys requested per ListObjectsV2 call.
+
+        Yields:
+            S3ObjectMetadata: Metadata of every object under prefix, in key order.
+        """
+        try:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, PaginationConfig={"PageSize": page_size}):
+                for item in page.get("Contents", []):
+                    metadata = S3ObjectMetadata(key=item["Key"], size=item["Size"], etag=item["ETag"].strip('"'),
+                                                last_modified=item["LastModified"])
+                    self._cache_metadata((bucket_name, item["Key"]), metadata)
+                    yield metadata
         except Exception as e:
             raise MyException(e, sys)
 
@@ -93,6 +203,7 @@ class SimpleStorageService:
     def get_file_object(self, filename: str, bucket_name: str) -> Union[List[object], object]:
         """
         Retrieves the file object(s) from the specified bucket based on the filename.
+        A filename ending with "/" is a directory and returns all objects under it.
 
         Args:
             filename (str): The name of the file to retrieve.
@@ -103,10 +214,12 @@ class SimpleStorageService:
         """
         logging.info("Entered the get_file_object method of SimpleStorageService class")
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=filename)]
-            func = lambda x: x[0] if len(x) == 1 else x
-            file_objs = func(file_objects)
+            if filename.endswith("/"):
+                file_objs = [self.s3_resource.Object(bucket_name, metadata.key)
+                             for metadata in self.iter_objects(bucket_name, prefix=filename)]
+            else:
+                # Exact key, no request is made until the object is read
+                file_objs = self.s3_resource.Object(bucket_name, filename)
             logging.info("Exited the get_file_object method of SimpleStorageService class")
             return file_objs
         except Exception as e:
@@ -114,7 +227,9 @@ class SimpleStorageService:
 
     def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
         """
-        Loads a serialized model from the specified S3 bucket.
+        Loads a serialized model from the specified S3 bucket. Model artifacts (see
+        src.entity.model_artifact) are memory-mapped, model archives (see src.entity.model_archive)
+        are extracted by ETag and memory-mapped, anything else is unpickled.
 
         Args:
             model_name (str): Name of the model file in the bucket.
@@ -124,13 +239,177 @@ class SimpleStorageService:
         Returns:
             object: The deserialized model object.
         """
+        return self.load_model_with_version(model_name, bucket_name, model_dir)[0]
+
+    def load_model_with_version(self, model_name: str, bucket_name: str, model_dir: str = None,
+                                version: Optional[str] = None) -> Tuple[object, str]:
+        """
+        Loads a serialized model like load_model and also returns the ETag it was loaded from.
+        With the local model cache enabled, a HEAD request finds the current ETag and the object
+        is only downloaded if that version is not cached yet. If S3 cannot be reached, the last
+        model loaded successfully from the cache is returned instead.
+
+        Args:
+            model_name (str): Name of the model file in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+            model_dir (str): Directory path within the bucket.
+            version (str): ETag of the version to load, if already known.
+
+        Returns:
+            Tuple[object, str]: The deserialized model object and its ETag.
+        """
         try:
             model_file = model_dir + "/" + model_name if model_dir else model_name
-            file_object = self.get_file_object(model_file, bucket_name)
-            model_obj = self.read_object(file_object, decode=False)
-            model = pickle.loads(model_obj)
+            if self.model_cache is not None:
+                model, version = self._load_cached_model(model_file, bucket_name, version)
+            else:
+                if version is None:
+                    version = self.get_object_version(model_file, bucket_name)
+                with tempfile.TemporaryDirectory() as download_dir:
+                    downloaded_file = os.path.join(download_dir, "model.bin")
+                    self._download_model_version(model_file, bucket_name, version, downloaded_file)
+                    model = self._load_model_file(downloaded_file, os.path.join(MODEL_ARRAYS_DIR, bucket_name,
+                                                                                model_file, version))
             logging.info("Production model loaded from S3 bucket.")
-            return model
+            return model, version
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _load_cached_model(self, model_file: str, bucket_name: str, version: Optional[str]) -> Tuple[object, str]:
+        try:
+            if version is None:
+                version = self.get_object_version(model_file, bucket_name)
+            cached_file = self.model_cache.get(bucket_name, model_file, version)
+            if cached_file is None:
+                cached_file = self.model_cache.put_file(
+                    bucket_name, model_file, version,
+                    lambda tmp_path: self._download_model_version(model_file, bucket_name, version, tmp_path))
+            else:
+                logging.info(f"Model {model_file} version {version} found in the local model cache")
+        except Exception as e:
+            # Only an unreachable S3 falls back; a missing object or denied access must not be masked
+            last_good = self.model_cache.last_good(bucket_name, model_file) if is_s3_unreachable(e) else None
+            if last_good is None:
+                raise
+            version, cached_file = last_good
+            logging.warning(f"Could not fetch {model_file} from S3 ({e}), using cached version {version}")
+
+        # Archives are extracted next to the cached file, so they are evicted with it
+        model = self._load_model_file(cached_file, os.path.join(os.path.dirname(cached_file), "arrays"))
+        self.model_cache.mark_good(bucket_name, model_file, version)
+        return model, version
+
+    def _download_model_version(self, model_file: str, bucket_name: str, version: str, to_filename: str) -> None:
+        self.download_file(model_file, bucket_name, to_filename)
+        # The transfer makes its own requests: check it fetched the version the caller expects,
+        # so a model replaced in the meantime is not cached or reported under the old ETag
+        metadata = self.head_object_metadata(bucket_name, model_file, use_cache=False)
+        if metadata is None or metadata.etag != version:
+            raise ValueError(f"s3://{bucket_name}/{model_file} changed while it was downloaded, expected {version}")
+
+    @staticmethod
+    def _load_model_file(file_path: str, extract_dir: str) -> object:
+        """
+        Loads a downloaded model file: model artifacts are memory-mapped where they are, model
+        archives are extracted to extract_dir and memory-mapped, anything else is unpickled
+        straight from the file.
+        """
+        with open(file_path, "rb") as model_file_obj:
+            file_header = model_file_obj.read(512)
+            if is_model_artifact(file_header):
+                # The mapping stays valid after a temporary download is deleted
+                return load_model_artifact(file_path)
+            if is_model_archive(file_header):
+                return load_model_archive(file_path, extract_dir)
+            model_file_obj.seek(0)
+            return pickle.load(model_file_obj)
+
+    def get_object_version(self, s3_key: str, bucket_name: str) -> str:
+        """
+        Returns the version identifier (ETag) of the specified S3 object without downloading it.
+
+        Args:
+            s3_key (str): Key path of the object in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            str: The ETag of the object, stripped of surrounding quotes.
+        """
+        try:
+            metadata = self.head_object_metadata(bucket_name, s3_key)
+            if metadata is None:
+                raise FileNotFoundError(f"s3://{bucket_name}/{s3_key} does not exist")
+            return metadata.etag
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def download_file(self, s3_key: str, bucket_name: str, to_filename: str,
+                      transfer_config: Optional[TransferConfig] = None,
+                      progress_callback: Optional[Callable[[int, Optional[int]], None]] = None) -> None:
+        """
+        Downloads an object straight into a local file, in parallel ranged parts for large objects,
+        without holding the object in memory.
+
+        Args:
+            s3_key (str): Key of the object in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+            to_filename (str): Local file to write, replaced once the download is complete.
+            transfer_config (TransferConfig): Part size and concurrency, defaults to build_transfer_config().
+            progress_callback (Callable): Called with (bytes done, total bytes) as parts arrive.
+        """
+        try:
+            metadata = self.head_object_metadata(bucket_name, s3_key)
+            progress = TransferProgress(f"Download s3://{bucket_name}/{s3_key}",
+                                        metadata.size if metadata else None, progress_callback)
+            self.s3_client.download_file(bucket_name, s3_key, to_filename,
+                                         Config=transfer_config or build_transfer_config(), Callback=progress)
+            progress.finish()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def download_fileobj(self, s3_key: str, bucket_name: str, fileobj: BinaryIO,
+                         transfer_config: Optional[TransferConfig] = None,
+                         progress_callback: Optional[Callable[[int, Optional[int]], None]] = None) -> None:
+        """
+        Like download_file, into a writable binary file object.
+        """
+        try:
+            metadata = self.head_object_metadata(bucket_name, s3_key)
+            progress = TransferProgress(f"Download s3://{bucket_name}/{s3_key}",
+                                        metadata.size if metadata else None, progress_callback)
+            self.s3_client.download_fileobj(bucket_name, s3_key, fileobj,
+                                            Config=transfer_config or build_transfer_config(), Callback=progress)
+            progress.finish()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def open_stream(self, s3_key: str, bucket_name: str) -> StreamingBody:
+        """
+        Opens the body of an object as a binary file-like stream that is read from the network
+        on demand, e.g. by pandas.read_csv or pickle.load. Close it when done.
+
+        Args:
+            s3_key (str): Key of the object in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            StreamingBody: Readable stream of the object content.
+        """
+        try:
+            return self.s3_client.get_object(Bucket=bucket_name, Key=s3_key)["Body"]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_pickle(self, s3_key: str, bucket_name: str) -> object:
+        """
+        Unpickles an object while it streams in, without a full in-memory copy of the pickle.
+        """
+        try:
+            stream = self.open_stream(s3_key, bucket_name)
+            try:
+                return pickle.load(stream)
+            finally:
+                stream.close()
         except Exception as e:
             raise MyException(e, sys) from e
 
@@ -151,22 +430,33 @@ class SimpleStorageService:
             if e.response["Error"]["Code"] == "404":
                 folder_obj = folder_name + "/"
                 self.s3_client.put_object(Bucket=bucket_name, Key=folder_obj)
+                self._invalidate_metadata(bucket_name, folder_obj)
             logging.info("Exited the create_folder method of SimpleStorageService class")
 
-    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True):
+    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True,
+                    transfer_config: Optional[TransferConfig] = None,
+                    progress_callback: Optional[Callable[[int, Optional[int]], None]] = None):
         """
         Uploads a local file to the specified S3 bucket with an optional file deletion.
+        Large files are sent as a multipart upload with parts uploaded in parallel.
 
         Args:
             from_filename (str): Path of the local file.
             to_filename (str): Target file path in the bucket.
             bucket_name (str): Name of the S3 bucket.
             remove (bool): If True, deletes the local file after upload.
+            transfer_config (TransferConfig): Part size and concurrency, defaults to build_transfer_config().
+            progress_callback (Callable): Called with (bytes done, total bytes) as parts are sent.
         """
         logging.info("Entered the upload_file method of SimpleStorageService class")
         try:
             logging.info(f"Uploading {from_filename} to {to_filename} in {bucket_name}")
-            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename)
+            progress = TransferProgress(f"Upload {from_filename}", os.path.getsize(from_filename), progress_callback)
+            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename,
+                                                     Config=transfer_config or build_transfer_config(),
+                                                     Callback=progress)
+            progress.finish()
+            self._invalidate_metadata(bucket_name, to_filename)
             logging.info(f"Uploaded {from_filename} to {to_filename} in {bucket_name}")
 
             # Delete the local file if remove is True
@@ -177,6 +467,28 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def upload_fileobj(self, fileobj: BinaryIO, to_filename: str, bucket_name: str,
+                       transfer_config: Optional[TransferConfig] = None,
+                       progress_callback: Optional[Callable[[int, Optional[int]], None]] = None) -> None:
+        """
+        Uploads a readable binary file object part by part, without reading it into memory first.
+
+        Args:
+            fileobj (BinaryIO): Readable binary file object.
+            to_filename (str): Target file path in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+            transfer_config (TransferConfig): Part size and concurrency, defaults to build_transfer_config().
+            progress_callback (Callable): Called with (bytes done, total bytes) as parts are sent.
+        """
+        try:
+            progress = TransferProgress(f"Upload to s3://{bucket_name}/{to_filename}", None, progress_callback)
+            self.s3_client.upload_fileobj(fileobj, bucket_name, to_filename,
+                                          Config=transfer_config or build_transfer_config(), Callback=progress)
+            self._invalidate_metadata(bucket_name, to_filename)
+            progress.finish()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def upload_df_as_csv(self, data_frame: DataFrame, local_filename: str, bucket_filename: str, bucket_name: str) -> None:
         """
         Uploads a DataFrame as a CSV file to the specified S3 bucket.
@@ -208,8 +520,12 @@ class SimpleStorageService:
         """
         logging.info("Entered the get_df_from_object method of SimpleStorageService class")
         try:
-            content = self.read_object(object_, make_readable=True)
-            df = read_csv(content, na_values="na")
+            # Parsed while it streams in, instead of from bytes, str and StringIO copies of the whole file
+            stream = object_.get()["Body"]
+            try:
+                df = read_csv(stream, na_values="na")
+            finally:
+                stream.close()
             logging.info("Exited the get_df_from_object method of SimpleStorageService class")
             return df
         except Exception as e:
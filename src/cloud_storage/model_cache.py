@@ -0,0 +1,175 @@
+import os
+import shutil
+import sys
+import tempfile
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import quote
+
+from src.constants import MODEL_CACHE_DIR, MODEL_CACHE_MAX_BYTES
+from src.exception import MyException
+from src.logger import logging
+
+
+def _write_bytes(file_path: str, data: bytes) -> None:
+    with open(file_path, "wb") as file_obj:
+        file_obj.write(data)
+
+
+class ModelDiskCache:
+    """
+    Local directory of downloaded model objects, one entry per bucket, key and ETag:
+
+        <cache_dir>/<bucket>/<quoted key>/<etag>/model.bin
+
+    Files are written to a temporary name and renamed into place, so an entry is either
+    complete or absent, also while several workers fill the cache at once. For every key the
+    ETag of the last successfully loaded model is kept as well, to be served when S3 cannot
+    be reached. Once the cache outgrows max_bytes, least recently used entries are removed,
+    except the last good model of each key.
+    """
+
+    object_file_name = "model.bin"
+    last_good_file_name = "last_good"
+
+    def __init__(self, cache_dir: str = MODEL_CACHE_DIR, max_bytes: int = MODEL_CACHE_MAX_BYTES) -> None:
+        """
+        :param cache_dir: Root directory of the cache, created on first write
+        :param max_bytes: Size above which entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _key_dir(self, bucket_name: str, s3_key: str) -> str:
+        return os.path.join(self.cache_dir, quote(bucket_name, safe=""), quote(s3_key, safe=""))
+
+    def entry_dir(self, bucket_name: str, s3_key: str, etag: str) -> str:
+        """
+        Directory of one cached object version. Files derived from the object, such as an
+        extracted model archive, belong here too so they are evicted together.
+        """
+        return os.path.join(self._key_dir(bucket_name, s3_key), quote(etag, safe=""))
+
+    @staticmethod
+    def _write_atomic(file_path: str, write: Callable[[str], None]) -> None:
+        """
+        Calls write with a temporary path next to file_path and renames the result into place.
+        """
+        directory = os.path.dirname(file_path)
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        os.close(file_descriptor)
+        try:
+            write(tmp_path)
+            with open(tmp_path, "rb+") as tmp_file:
+                os.fsync(tmp_file.fileno())
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, bucket_name: str, s3_key: str, etag: str) -> Optional[str]:
+        """
+        Returns the path of the cached object, or None on a miss. A hit counts as a use for eviction.
+        """
+        file_path = os.path.join(self.entry_dir(bucket_name, s3_key, etag), self.object_file_name)
+        try:
+            os.utime(file_path)
+            return file_path
+        except FileNotFoundError:
+            return None
+
+    def put(self, bucket_name: str, s3_key: str, etag: str, data: bytes) -> str:
+        """
+        Stores an object version and evicts old entries if the cache is over its size.
+        :return: Path of the cached object
+        """
+        return self.put_file(bucket_name, s3_key, etag, lambda tmp_path: _write_bytes(tmp_path, data))
+
+    def put_file(self, bucket_name: str, s3_key: str, etag: str, write: Callable[[str], None]) -> str:
+        """
+        Like put, for objects written straight to disk: write is called with the temporary path to fill,
+        e.g. to download the object into it.
+        :return: Path of the cached object
+        """
+        try:
+            file_path = os.path.join(self.entry_dir(bucket_name, s3_key, etag), self.object_file_name)
+            self._write_atomic(file_path, write)
+            logging.info(f"Cached s3://{bucket_name}/{s3_key} version {etag} ({os.path.getsize(file_path)} bytes)")
+            self.evict(keep=os.path.dirname(file_path))
+            return file_path
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def mark_good(self, bucket_name: str, s3_key: str, etag: str) -> None:
+        """
+        Records etag as the last version of s3_key that was loaded successfully.
+        """
+        try:
+            self._write_atomic(os.path.join(self._key_dir(bucket_name, s3_key), self.last_good_file_name),
+                               lambda tmp_path: _write_bytes(tmp_path, etag.encode()))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def last_good(self, bucket_name: str, s3_key: str) -> Optional[Tuple[str, str]]:
+        """
+        Returns (etag, cached file path) of the last successfully loaded version of s3_key, if still cached.
+        """
+        try:
+            with open(os.path.join(self._key_dir(bucket_name, s3_key), self.last_good_file_name)) as last_good_file:
+                etag = last_good_file.read().strip()
+        except FileNotFoundError:
+            return None
+        file_path = os.path.join(self.entry_dir(bucket_name, s3_key, etag), self.object_file_name)
+        return (etag, file_path) if os.path.isfile(file_path) else None
+
+    def _entries(self) -> List[Tuple[float, int, str, bool]]:
+        """
+        Returns (last use, size, directory, is last good) of every cache entry.
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for bucket_dir in os.scandir(self.cache_dir):
+            if not bucket_dir.is_dir():
+                continue
+            for key_dir in os.scandir(bucket_dir.path):
+                if not key_dir.is_dir():
+                    continue
+                try:
+                    with open(os.path.join(key_dir.path, self.last_good_file_name)) as last_good_file:
+                        last_good_etag = quote(last_good_file.read().strip(), safe="")
+                except FileNotFoundError:
+                    last_good_etag = None
+                for version_dir in os.scandir(key_dir.path):
+                    object_path = os.path.join(version_dir.path, self.object_file_name)
+                    if not version_dir.is_dir() or not os.path.isfile(object_path):
+                        continue
+                    size = sum(os.path.getsize(os.path.join(root, name))
+                               for root, _, names in os.walk(version_dir.path) for name in names)
+                    entries.append((os.path.getmtime(object_path), size, version_dir.path,
+                                    version_dir.name == last_good_etag))
+        return entries
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Removes least recently used entries until the cache fits in max_bytes.
+        Last good versions and the entry in keep are never removed.
+        :return: Number of bytes freed
+        """
+        try:
+            entries = sorted(self._entries())
+            total_size = sum(size for _, size, _, _ in entries)
+            freed = 0
+            for _, size, directory, is_last_good in entries:
+                if total_size - freed <= self.max_bytes:
+                    break
+                if is_last_good or directory == keep:
+                    continue
+                # Processes still mapping files of the entry keep them until they unmap them
+                shutil.rmtree(directory, ignore_errors=True)
+                freed += size
+                logging.info(f"Evicted {directory} ({size} bytes) from the model cache")
+            return freed
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from boto3.s3.transfer import TransferConfig
+
+from src.constants import S3_TRANSFER_CHUNK_SIZE_MB, S3_TRANSFER_MAX_CONCURRENCY, S3_TRANSFER_MULTIPART_THRESHOLD_MB
+from src.logger import logging
+
+MB = 1024 * 1024
+
+
+def build_transfer_config(chunk_size_mb: float = S3_TRANSFER_CHUNK_SIZE_MB,
+                          max_concurrency: int = S3_TRANSFER_MAX_CONCURRENCY,
+                          multipart_threshold_mb: float = S3_TRANSFER_MULTIPART_THRESHOLD_MB) -> TransferConfig:
+    """
+    Returns the boto3 transfer settings for multipart uploads and ranged, parallel downloads.
+    :param chunk_size_mb: Size of every part / ranged GET
+    :param max_concurrency: Parts transferred at the same time
+    :param multipart_threshold_mb: Objects from this size on are transferred in parts
+    """
+    return TransferConfig(multipart_threshold=int(multipart_threshold_mb * MB),
+                          multipart_chunksize=int(chunk_size_mb * MB),
+                          max_concurrency=max_concurrency,
+                          io_chunksize=256 * 1024,
+                          use_threads=max_concurrency > 1)
+
+
+class TransferProgress:
+    """
+    boto3 transfer callback: adds up the bytes transferred by all worker threads, logs progress
+    every log_interval seconds and forwards (bytes done, total bytes) to an optional callback.
+    """
+
+    def __init__(self, description: str, total_bytes: Optional[int] = None,
+                 callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                 log_interval: float = 5.0) -> None:
+        """
+        :param description: Names the transfer in log messages
+        :param total_bytes: Object size if known, for percentages
+        :param callback: Called with (bytes done, total bytes) after every chunk
+        :param log_interval: Seconds between progress log messages, 0 disables them
+        """
+        self.description = description
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.log_interval = log_interval
+        self.bytes_done = 0
+        self.start = time.perf_counter()
+        self._last_log = self.start
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self._lock:
+            self.bytes_done += bytes_amount
+            bytes_done = self.bytes_done
+            now = time.perf_counter()
+            log_now = self.log_interval > 0 and now - self._last_log >= self.log_interval
+            if log_now:
+                self._last_log = now
+        if log_now:
+            logging.info(f"{self.description}: {self._format(bytes_done, now)}")
+        if self.callback is not None:
+            self.callback(bytes_done, self.total_bytes)
+
+    def _format(self, bytes_done: int, now: float) -> str:
+        rate = bytes_done / MB / max(now - self.start, 1e-9)
+        if self.total_bytes:
+            return f"{bytes_done / MB:.1f}/{self.total_bytes / MB:.1f} MB " \
+                   f"({100 * bytes_done / self.total_bytes:.0f}%), {rate:.1f} MB/s"
+        return f"{bytes_done / MB:.1f} MB, {rate:.1f} MB/s"
+
+    def finish(self) -> None:
+        """
+        Logs the totals of the completed transfer.
+        """
+        logging.info(f"{self.description} done: {self._format(self.bytes_done, time.perf_counter())}")
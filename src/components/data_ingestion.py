@@ -1,7 +1,10 @@
 import os
 import sys
+from datetime import timedelta
 
+import numpy as np
 import pandas as pd
+from bson import ObjectId
 from sklearn.model_selection import train_test_split
 
 from src.entity.config_entity import DataIngestionConfig
@@ -9,6 +12,7 @@ from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception import MyException
 from src.logger import logging
 from src.data_access.proj1_data import Proj1Data
+from src.data_access.feature_store import FeatureStore
 
 class DataIngestion:
     def __init__(self, data_ingestion_config:DataIngestionConfig()):
@@ -17,13 +21,15 @@ class DataIngestion:
         """
         try:
             self.data_ingestion_config = data_ingestion_config
+            if data_ingestion_config.mode not in ("full", "incremental"):
+                raise ValueError(f"Unknown data ingestion mode: {data_ingestion_config.mode}")
         except Exception as e:
             raise MyException(e,sys)
         
     def export_data_info_feature_store(self) -> pd.DataFrame:
         """
         Method Name :   export_data_into_feature_store
-        Description :   This method exports data from mongodb to csv file
+        Description :   This method streams data from mongodb into the Parquet feature store file
         
         Output      :   data is returned as artifact of data ingestion components
         On Failure  :   Write an exception log and then raise an exception
@@ -31,13 +37,16 @@ class DataIngestion:
         try:
             logging.info(f"Exporting Data from MongoDB")
             my_data = Proj1Data()
-            dataframe = my_data.export_collection_as_dataframe(collection_name = self.data_ingestion_config.collection_name)
-            logging.info(f"Shape of DataFrame: {dataframe.shape}")
             feature_store_file_path = self.data_ingestion_config.feature_store_file_path
-            dir_path = os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path,exist_ok=True)
-            logging.info(f"Saving exportes data into feature store file path: {feature_store_file_path}")
-            dataframe.to_csv(feature_store_file_path,index=False,header=True)
+            logging.info(f"Saving exported data into feature store file path: {feature_store_file_path}")
+            my_data.export_collection_to_parquet(collection_name=self.data_ingestion_config.collection_name,
+                                                 file_path=feature_store_file_path,
+                                                 chunk_rows=self.data_ingestion_config.chunk_rows,
+                                                 cursor_batch_size=self.data_ingestion_config.cursor_batch_size,
+                                                 parallelism=self.data_ingestion_config.export_parallelism,
+                                                 server_side_cleanup=self.data_ingestion_config.server_side_cleanup)
+            dataframe = pd.read_parquet(feature_store_file_path)
+            logging.info(f"Shape of DataFrame: {dataframe.shape}")
             return dataframe
         
         except Exception as e:
@@ -72,6 +81,98 @@ class DataIngestion:
         except Exception as e:
             raise MyException(e,sys)
     
+    def update_feature_store(self) -> FeatureStore:
+        """
+        Method Name :   update_feature_store
+        Description :   This method appends the documents added to mongodb since the last run to the
+                        persistent feature store, or rebuilds the store from the whole collection
+                        on request, when it is empty or when the export schema changed
+        
+        Output      :   feature store holding the whole collection
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            my_data = Proj1Data()
+            schema = my_data.export_schema()
+            feature_store = FeatureStore(self.data_ingestion_config.feature_store_dir,
+                                         self.data_ingestion_config.collection_name)
+            watermark = feature_store.read_watermark()
+            if watermark["last_id"] is not None and watermark["schema"] != schema.to_string():
+                logging.info("Export schema changed since the feature store was built, rebuilding it")
+                feature_store.reset()
+            elif watermark["last_id"] is not None and self.data_ingestion_config.full_rebuild:
+                logging.info("Full rebuild of the feature store requested")
+                feature_store.reset()
+            watermark = feature_store.read_watermark()
+
+            query = None
+            if watermark["last_id"]:
+                # Overlaps the previous run to pick up documents that arrived with an _id below the
+                # watermark, commit_part drops the ones already stored
+                since = ObjectId(watermark["last_id"]).generation_time - \
+                    timedelta(seconds=self.data_ingestion_config.watermark_overlap_seconds)
+                query = {"_id": {"$gt": min(ObjectId.from_datetime(since), ObjectId(watermark["last_id"]))}}
+            logging.info(f"Exporting documents of {self.data_ingestion_config.collection_name} "
+                         f"after watermark {watermark['last_id']}, overlapping it by "
+                         f"{self.data_ingestion_config.watermark_overlap_seconds}s")
+            part_file_path = feature_store.next_part_file_path()
+            my_data.export_collection_to_parquet(collection_name=self.data_ingestion_config.collection_name,
+                                                 file_path=part_file_path,
+                                                 query=query,
+                                                 chunk_rows=self.data_ingestion_config.chunk_rows,
+                                                 cursor_batch_size=self.data_ingestion_config.cursor_batch_size,
+                                                 parallelism=self.data_ingestion_config.export_parallelism,
+                                                 server_side_cleanup=self.data_ingestion_config.server_side_cleanup)
+            watermark = feature_store.commit_part(part_file_path, schema)
+            logging.info(f"Feature store holds {watermark['rows']} rows in {watermark['parts']} parts")
+            return feature_store
+        
+        except Exception as e:
+            raise MyException(e,sys)
+
+    @staticmethod
+    def is_test_row(ids: pd.Series, test_size: float) -> np.ndarray:
+        """
+        Assigns rows to the test set by a hash of their _id, so a row lands on the same side of
+        the split in every run, whatever else the feature store holds.
+        """
+        buckets = pd.util.hash_pandas_object(ids, index=False).to_numpy() % 10_000
+        return buckets < round(test_size * 10_000)
+
+    def split_feature_store_as_train_test(self, feature_store: FeatureStore) -> None:
+        """
+        Method Name :   split_feature_store_as_train_test
+        Description :   This method splits the feature store into train set and test set based on
+                        split ratio, one row group at a time
+        
+        Output      :   train and test files are written to the ingested directory
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        logging.info("Entered split_feature_store_as_train_test of Data_Ingestion class")
+        
+        try:
+            os.makedirs(self.data_ingestion_config.data_ingestion_ingested_dir,exist_ok=True)
+            train_file_path_ = self.data_ingestion_config.training_file_path
+            test_file_path_ = self.data_ingestion_config.testing_file_path
+            header = True
+            train_rows = test_rows = 0
+            for table in feature_store.iter_tables():
+                dataframe = table.to_pandas()
+                is_test = self.is_test_row(dataframe["_id"], self.data_ingestion_config.train_test_split_ratio)
+                dataframe[~is_test].to_csv(train_file_path_,index=False,header=header,mode="w" if header else "a")
+                dataframe[is_test].to_csv(test_file_path_,index=False,header=header,mode="w" if header else "a")
+                header = False
+                train_rows += int((~is_test).sum())
+                test_rows += int(is_test.sum())
+            if header:
+                raise ValueError(f"Feature store of {self.data_ingestion_config.collection_name} is empty")
+            
+            logging.info(f"Exported {train_rows} train and {test_rows} test rows")
+            logging.info("Exited split_feature_store_as_train_test of Data_Ingestion class")
+        
+        except Exception as e:
+            raise MyException(e,sys)
+
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         """
         Method Name :   initiate_data_ingestion
@@ -83,11 +184,18 @@ class DataIngestion:
         logging.info("Entered initaite_data_ingestion of Data_Ingestion class")
         
         try:
-            dataframe = self.export_data_info_feature_store()
-            
-            logging.info("Got the data from MongoDB")
-            
-            self.split_data_as_train_test(dataframe)
+            if self.data_ingestion_config.mode == "incremental":
+                feature_store = self.update_feature_store()
+                
+                logging.info("Got the new data from MongoDB")
+                
+                self.split_feature_store_as_train_test(feature_store)
+            else:
+                dataframe = self.export_data_info_feature_store()
+                
+                logging.info("Got the data from MongoDB")
+                
+                self.split_data_as_train_test(dataframe)
             
             logging.info("Performed train_test_split om the dataset")
             
@@ -1,4 +1,5 @@
 
+import os
 import sys
 
 from src.cloud_storage.aws_storage import SimpleStorageService
@@ -6,7 +7,9 @@ from src.exception import MyException
 from src.logger import logging
 from src.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact
 from src.entity.config_entity import ModelPusherConfig
+from src.entity.model_archive import save_model_archive
 from src.entity.s3_estimator import Proj1Estimator
+from src.utils.main_utils import load_object
 
 
 class ModelPusher:
@@ -37,7 +40,18 @@ class ModelPusher:
             logging.info("Uploading artifacts folder to s3 bucket")
             
             logging.info("Uploading new model to S3 bucket....")
-            self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
+            model_file_path = self.model_evaluation_artifact.trained_model_path
+            if self.model_pusher_config.export_format == "artifact":
+                self.proj1_estimator.save_model_artifact(load_object(model_file_path))
+            elif self.model_pusher_config.export_format == "arrays":
+                # Pushed in place of the pickle, workers memory-map one shared copy of it
+                archive_file_path = os.path.splitext(model_file_path)[0] + ".tar"
+                save_model_archive(load_object(model_file_path), archive_file_path)
+                self.proj1_estimator.save_model(from_file=archive_file_path)
+            elif self.model_pusher_config.export_format == "pickle":
+                self.proj1_estimator.save_model(from_file=model_file_path)
+            else:
+                raise ValueError(f"Unknown model export format: {self.model_pusher_config.export_format}")
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
                                                         s3_model_path=self.model_pusher_config.s3_model_key_path)
 
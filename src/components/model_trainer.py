@@ -98,7 +98,8 @@ class ModelTrainer:
             
             # Save the final model object that includes both preprocessign and the trained model
             logging.info("Saving new model as performance is better than previous one. ")
-            my_model = MyModel(preprocessing_object = preprocessing_obj, trained_model_object = trained_model)
+            my_model = MyModel(preprocessing_object = preprocessing_obj, trained_model_object = trained_model,
+                               decision_threshold = self.model_trainer_config.decision_threshold)
             save_object(self.model_trainer_config.trained_model_file_path, my_model)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
             
@@ -1,6 +1,8 @@
 import boto3
 import os
-from src.constants import AWS_SECRET_ACCESS_KEY_ENV_KEY, AWS_ACCESS_KEY_ID_ENV_KEY, REGION_NAME
+from botocore.config import Config
+from src.constants import AWS_SECRET_ACCESS_KEY_ENV_KEY, AWS_ACCESS_KEY_ID_ENV_KEY, REGION_NAME, \
+    S3_CONNECT_TIMEOUT_SECONDS, S3_READ_TIMEOUT_SECONDS, S3_MAX_ATTEMPTS
 
 
 class S3Client:
@@ -20,16 +22,21 @@ class S3Client:
                 raise Exception(f"Environment variable: {AWS_ACCESS_KEY_ID_ENV_KEY} is not not set.")
             if __secret_access_key is None:
                 raise Exception(f"Environment variable: {AWS_SECRET_ACCESS_KEY_ENV_KEY} is not set.")
+
+            config = Config(connect_timeout=S3_CONNECT_TIMEOUT_SECONDS, read_timeout=S3_READ_TIMEOUT_SECONDS,
+                            retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "standard"})
         
             S3Client.s3_resource = boto3.resource('s3',
                                             aws_access_key_id=__access_key_id,
                                             aws_secret_access_key=__secret_access_key,
-                                            region_name=region_name
+                                            region_name=region_name,
+                                            config=config
                                             )
             S3Client.s3_client = boto3.client('s3',
                                         aws_access_key_id=__access_key_id,
                                         aws_secret_access_key=__secret_access_key,
-                                        region_name=region_name
+                                        region_name=region_name,
+                                        config=config
                                         )
         self.s3_resource = S3Client.s3_resource
         self.s3_client = S3Client.s3_client
\ No newline at end of file
@@ -16,6 +16,7 @@ CURRENT_YEAR = date.today().year
 PREPROCESSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
 FILE_NAME: str = "data.csv"
+FEATURE_STORE_FILE_NAME: str = "data.parquet"
 TRAIN_FILE_NAME: str = "train.csv"
 TEST_FILE_NAME: str = "test.csv"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
@@ -23,6 +24,16 @@ SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
 AWS_ACCESS_KEY_ID_ENV_KEY = "AWS_ACCESS_KEY_ID"
 AWS_SECRET_ACCESS_KEY_ENV_KEY = "AWS_SECRET_ACCESS_KEY"
 REGION_NAME = "us-east-1"
+# Bounds how long a slow or unreachable S3 can stall a call before it fails (or falls back to the model cache)
+S3_CONNECT_TIMEOUT_SECONDS:float = float(os.getenv("S3_CONNECT_TIMEOUT_SECONDS", 5))
+S3_READ_TIMEOUT_SECONDS:float = float(os.getenv("S3_READ_TIMEOUT_SECONDS", 30))
+S3_MAX_ATTEMPTS:int = int(os.getenv("S3_MAX_ATTEMPTS", 3))
+# Multipart uploads and parallel ranged downloads (boto3 TransferConfig)
+S3_TRANSFER_CHUNK_SIZE_MB:float = float(os.getenv("S3_TRANSFER_CHUNK_SIZE_MB", 8))
+S3_TRANSFER_MAX_CONCURRENCY:int = int(os.getenv("S3_TRANSFER_MAX_CONCURRENCY", 8))
+S3_TRANSFER_MULTIPART_THRESHOLD_MB:float = float(os.getenv("S3_TRANSFER_MULTIPART_THRESHOLD_MB", 16))
+# HEAD results (size, ETag, last-modified, or "missing") are reused for this long, 0 disables
+S3_METADATA_CACHE_TTL_SECONDS:float = float(os.getenv("S3_METADATA_CACHE_TTL_SECONDS", 5))
 
 """
 Data Ingestion related constant start with DATA_INGESTION VAR NAME
@@ -32,6 +43,30 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.2
+# Documents per MongoDB round trip, and rows per typed chunk / Parquet row group of the export
+DATA_INGESTION_CURSOR_BATCH_SIZE: int = int(os.getenv("DATA_INGESTION_CURSOR_BATCH_SIZE", 5000))
+DATA_INGESTION_CHUNK_ROWS: int = int(os.getenv("DATA_INGESTION_CHUNK_ROWS", 50000))
+# Threads reading _id ranges of the collection concurrently, 1 reads it through a single cursor
+DATA_INGESTION_EXPORT_PARALLELISM: int = int(os.getenv("DATA_INGESTION_EXPORT_PARALLELISM", 1))
+# More ranges than threads, so one slow range does not leave the other threads idle
+DATA_INGESTION_PARTITIONS_PER_WORKER: int = 4
+# _ids sampled per range to place the range boundaries
+DATA_INGESTION_PARTITION_SAMPLES: int = 32
+# "full" exports the whole collection into the run's artifact directory and splits it at random,
+# "incremental" appends documents above the watermark to the feature store kept in FEATURE_STORE_DIR
+# and splits it by a hash of _id, so every row stays on the same side of the split across runs
+DATA_INGESTION_MODE: str = os.getenv("DATA_INGESTION_MODE", "full")
+# The incremental watermark is the largest _id stored. ObjectIds are generated by the client from its
+# clock, so a document can arrive with an _id below the watermark (clock skew, buffered or retried
+# writes). Each incremental run re-reads the documents up to this many seconds older than the
+# watermark and drops the ones already stored; later arrivals beyond it are only picked up by a
+# full rebuild
+DATA_INGESTION_WATERMARK_OVERLAP_SECONDS: int = int(os.getenv("DATA_INGESTION_WATERMARK_OVERLAP_SECONDS", 3600))
+# Rebuilds the incremental feature store from the whole collection
+DATA_INGESTION_FULL_REBUILD: bool = os.getenv("DATA_INGESTION_FULL_REBUILD", "false").lower() == "true"
+# Cleans up and encodes documents in a MongoDB aggregation pipeline instead of after the transfer
+DATA_INGESTION_SERVER_SIDE_CLEANUP: bool = os.getenv("DATA_INGESTION_SERVER_SIDE_CLEANUP", "false").lower() == "true"
+FEATURE_STORE_DIR: str = os.getenv("FEATURE_STORE_DIR", os.path.join(ARTIFACT_DIR, "feature_store"))
 
 """
 Data Validation related constant start with DATA_INGESTION VAR NAME
@@ -60,6 +95,9 @@ MODEL_TRAINER_MIN_SAMPLES_LEAF:int = 6
 MIN_SAMPLES_SPLIT_MAX_DEPTH:int = 10
 MIN_SAMPLES_SPLIT_CRITERION:str = 'entropy'
 MIN_SAMPLES_SPLIT_RANDOM_STATE:int = 2
+# Positive class probability from which the model predicts 1, stored with the model artifact; unset uses argmax
+MODEL_TRAINER_DECISION_THRESHOLD = float(os.environ["MODEL_TRAINER_DECISION_THRESHOLD"]) \
+    if os.getenv("MODEL_TRAINER_DECISION_THRESHOLD") else None
 
 """
 MODEL Evaluation related constants
@@ -67,6 +105,83 @@ MODEL Evaluation related constants
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE:float = 0.02
 MODEL_BUCKET_NAME = "vehicle-proj"
 MODEL_PUSHER_S3_KEY = "model-registry"
+# "pickle" pushes the dill pickle, "arrays" a tar of .npy arrays workers memory-map (see src/entity/model_archive.py),
+# "artifact" a single versioned file of aligned, optionally compressed buffers (see src/entity/model_artifact.py)
+MODEL_PUSHER_EXPORT_FORMAT:str = os.getenv("MODEL_PUSHER_EXPORT_FORMAT", "pickle")
+MODEL_ARTIFACT_COMPRESSION:str = os.getenv("MODEL_ARTIFACT_COMPRESSION", "none") # none, zlib, zstd or lz4
+
+"""
+Prediction serving related constants
+"""
+MODEL_REFRESH_INTERVAL_SECONDS:int = int(os.getenv("MODEL_REFRESH_INTERVAL_SECONDS", 300))
+BATCH_PREDICTION_CHUNK_SIZE:int = int(os.getenv("BATCH_PREDICTION_CHUNK_SIZE", 10000))
+MICRO_BATCH_WINDOW_MS:float = float(os.getenv("MICRO_BATCH_WINDOW_MS", 2))
+MICRO_BATCH_MAX_SIZE:int = int(os.getenv("MICRO_BATCH_MAX_SIZE", 64))
+# Requests waiting for a micro-batch; further requests are rejected with 503
+MICRO_BATCH_MAX_QUEUE_SIZE:int = int(os.getenv("MICRO_BATCH_MAX_QUEUE_SIZE", 1024))
+INFERENCE_EXECUTOR_MODE:str = os.getenv("INFERENCE_EXECUTOR_MODE", "thread") # "thread" or "process"
+INFERENCE_MAX_WORKERS:int = int(os.getenv("INFERENCE_MAX_WORKERS", os.cpu_count() or 1))
+INFERENCE_MAX_QUEUE_SIZE:int = int(os.getenv("INFERENCE_MAX_QUEUE_SIZE", 256))
+INFERENCE_TIMEOUT_SECONDS:float = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", 10))
+MODEL_INFERENCE_BACKEND:str = os.getenv("MODEL_INFERENCE_BACKEND", "compiled") # "compiled" or "sklearn"
+# Above this many rows sklearn's native tree traversal is faster than the compiled forest
+COMPILED_FOREST_MAX_BATCH_SIZE:int = int(os.getenv("COMPILED_FOREST_MAX_BATCH_SIZE", 512))
+PREDICTION_CACHE_MAX_SIZE:int = int(os.getenv("PREDICTION_CACHE_MAX_SIZE", 10000)) # 0 disables the cache
+PREDICTION_CACHE_TTL_SECONDS:float = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 600))
+BULK_SCORING_CHUNK_ROWS:int = int(os.getenv("BULK_SCORING_CHUNK_ROWS", 5000))
+WARM_UP_BATCH_SIZE:int = int(os.getenv("WARM_UP_BATCH_SIZE", 64))
+WARM_UP_RETRY_SECONDS:float = float(os.getenv("WARM_UP_RETRY_SECONDS", 10))
+# Array model archives are extracted here once per S3 ETag and memory-mapped by every worker,
+# unless the model cache is enabled, which keeps them next to the cached archive
+MODEL_ARRAYS_DIR:str = os.getenv("MODEL_ARRAYS_DIR", os.path.join(ARTIFACT_DIR, "model_arrays"))
+
+# Input features of the trained model, in the order produced by DataTransformation
+MODEL_FEATURE_COLUMNS: list = ["Gender", "Age", "Driving_License", "Region_Code", "Previously_Insured",
+                               "Annual_Premium", "Policy_Sales_Channel", "Vintage",
+                               "Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years", "Vehicle_Damage_Yes"]
+
+"""
+Model Cache related constants start with MODEL_CACHE VAR NAME
+"""
+MODEL_CACHE_DIR:str = os.getenv("MODEL_CACHE_DIR", os.path.join(ARTIFACT_DIR, "model_cache"))
+MODEL_CACHE_MAX_BYTES:int = int(os.getenv("MODEL_CACHE_MAX_BYTES", 2 * 1024 ** 3)) # 0 disables the cache
+
+"""
+Batch Scoring related constants start with BATCH_SCORING VAR NAME
+"""
+BATCH_SCORING_DIR_NAME:str = "batch_scoring"
+BATCH_SCORING_CHECKPOINT_FILE_NAME:str = "checkpoint.json"
+BATCH_SCORING_CURSOR_BATCH_SIZE:int = 5000
+BATCH_SCORING_PARTITION_ROWS:int = 50000
+BATCH_SCORING_MAX_WORKERS:int = os.cpu_count() or 1
+BATCH_SCORING_OUTPUT_FORMAT:str = "parquet" # "parquet" or "mongo"
+BATCH_SCORING_OUTPUT_COLLECTION_SUFFIX:str = "-Predictions"
+# "fail" stops at a failing partition, "skip" records it in the checkpoint and scores the rest
+BATCH_SCORING_ON_ERROR:str = "fail"
+
+"""
+Training Job related constants start with TRAINING_JOB VAR NAME
+"""
+TRAINING_JOB_DIR_NAME:str = "training_jobs"
+TRAINING_JOB_STATUS_FILE_NAME:str = "status.json"
+TRAINING_JOB_LOG_FILE_NAME:str = "run.log"
+TRAINING_JOB_LOCK_FILE_NAME:str = "training.lock"
+# A lock whose job has no readable status yet is only taken over once it is this old
+TRAINING_JOB_LOCK_GRACE_SECONDS:float = float(os.getenv("TRAINING_JOB_LOCK_GRACE_SECONDS", 60))
+TRAINING_JOB_NICENESS:int = int(os.getenv("TRAINING_JOB_NICENESS", 10))
+
+"""
+Shadow Scoring related constants start with SHADOW VAR NAME
+"""
+SHADOW_MODEL_FILE_PATH:str = os.getenv("SHADOW_MODEL_FILE_PATH", "") # candidate model key in MODEL_BUCKET_NAME, empty disables
+SHADOW_SAMPLE_RATE:float = float(os.getenv("SHADOW_SAMPLE_RATE", 1.0))
+SHADOW_QUEUE_SIZE:int = int(os.getenv("SHADOW_QUEUE_SIZE", 1000))
+SHADOW_DIR_NAME:str = "shadow_scoring"
+SHADOW_LOG_FILE_NAME:str = "shadow_log.csv"
+SHADOW_LOG_MAX_BYTES:int = int(os.getenv("SHADOW_LOG_MAX_BYTES", 10*1024*1024)) # rotate the shadow log at 10MB
+SHADOW_LOG_BACKUP_COUNT:int = int(os.getenv("SHADOW_LOG_BACKUP_COUNT", 5))
+SHADOW_EXECUTOR_MODE:str = os.getenv("SHADOW_EXECUTOR_MODE", "process") # "process" or "thread" (shares the serving GIL)
+SHADOW_NICENESS:int = int(os.getenv("SHADOW_NICENESS", 10))
 
 APP_HOST = "0.0.0.0"
 APP_PORT = 8080
\ No newline at end of file
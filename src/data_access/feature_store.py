@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from typing import Iterator, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.exception import MyException
+from src.logger import logging
+
+
+class FeatureStore:
+    """
+    Parquet feature store of one collection, kept across training runs:
+
+        <store_dir>/<collection name>/part-000000.parquet, part-000001.parquet, ...
+        <store_dir>/<collection name>/_watermark.json
+
+    Every incremental ingestion appends one part holding the documents with an _id above the
+    watermark, the largest _id stored so far, less an overlap window for documents that arrive
+    late; rows of a new part already stored by an earlier part are dropped when it is committed.
+    A part is written before the watermark is advanced and is named after the number of parts
+    the watermark records, so a run interrupted in between rewrites the same part instead of
+    storing its rows twice.
+    """
+
+    watermark_file_name = "_watermark.json"
+
+    def __init__(self, store_dir: str, collection_name: str) -> None:
+        """
+        :param store_dir: Root directory of the feature stores
+        :param collection_name: Name of the MongoDB collection the store holds
+        """
+        self.collection_dir = os.path.join(store_dir, collection_name)
+
+    def read_watermark(self) -> dict:
+        """
+        Returns the watermark, or the one of an empty store.
+        """
+        try:
+            with open(os.path.join(self.collection_dir, self.watermark_file_name)) as watermark_file:
+                return json.load(watermark_file)
+        except FileNotFoundError:
+            return {"last_id": None, "parts": 0, "rows": 0, "schema": None, "updated_at": None}
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _write_watermark(self, watermark: dict) -> None:
+        watermark_file_path = os.path.join(self.collection_dir, self.watermark_file_name)
+        # Write-then-rename so a crash never leaves a truncated watermark
+        with open(watermark_file_path + ".tmp", "w") as watermark_file:
+            json.dump(watermark, watermark_file, indent=2)
+        os.replace(watermark_file_path + ".tmp", watermark_file_path)
+
+    def part_file_path(self, part_no: int) -> str:
+        return os.path.join(self.collection_dir, f"part-{part_no:06d}.parquet")
+
+    def next_part_file_path(self) -> str:
+        """
+        Path the next part is to be written to, before commit_part is called with it.
+        """
+        os.makedirs(self.collection_dir, exist_ok=True)
+        return self.part_file_path(self.read_watermark()["parts"])
+
+    def commit_part(self, part_file_path: str, schema: pa.Schema) -> dict:
+        """
+        Adds the part written to next_part_file_path() to the store, without the rows whose _id
+        is already stored, and advances the watermark to the largest _id stored. A part left
+        empty is removed instead.
+        :return: The new watermark
+        """
+        try:
+            watermark = self.read_watermark()
+            if part_file_path != self.part_file_path(watermark["parts"]):
+                raise ValueError(f"{part_file_path} is not the next part of {self.collection_dir}")
+            ids = self._drop_stored_rows(part_file_path, watermark["parts"])
+            if len(ids) == 0:
+                os.remove(part_file_path)
+                logging.info(f"No new documents for {self.collection_dir}")
+                return watermark
+            # ObjectId hex strings sort like the ObjectIds
+            last_id = max(pc.max(ids).as_py(), watermark["last_id"] or "")
+            watermark = {"last_id": last_id, "parts": watermark["parts"] + 1,
+                         "rows": watermark["rows"] + len(ids), "schema": schema.to_string(),
+                         "updated_at": datetime.now().isoformat(timespec="seconds")}
+            self._write_watermark(watermark)
+            logging.info(f"Added {len(ids)} rows to {self.collection_dir}, watermark {watermark['last_id']}")
+            return watermark
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _drop_stored_rows(self, part_file_path: str, part_no: int) -> pa.ChunkedArray:
+        """
+        Rewrites the part without the rows whose _id one of the first part_no parts holds.
+        Returns: The _ids of the remaining rows
+        """
+        ids = pq.read_table(part_file_path, columns=["_id"])["_id"]
+        if len(ids) == 0 or part_no == 0:
+            return ids
+        # Only stored _ids in the range of the new part can be duplicates, row group statistics skip the rest
+        min_id = pc.min(ids).as_py()
+        stored_ids = pa.chunked_array(
+            [pq.read_table(self.part_file_path(stored_part_no), columns=["_id"],
+                           filters=[("_id", ">=", min_id)])["_id"].combine_chunks()
+             for stored_part_no in range(part_no)], type=ids.type)
+        if not pc.any(pc.is_in(ids, value_set=stored_ids)).as_py():
+            return ids
+
+        part_file = pq.ParquetFile(part_file_path)
+        with pq.ParquetWriter(part_file_path + ".tmp", part_file.schema_arrow) as writer:
+            for row_group in range(part_file.num_row_groups):
+                table = part_file.read_row_group(row_group)
+                writer.write_table(table.filter(pc.invert(pc.is_in(table["_id"], value_set=stored_ids))))
+        os.replace(part_file_path + ".tmp", part_file_path)
+        remaining_ids = pq.read_table(part_file_path, columns=["_id"])["_id"]
+        logging.info(f"Dropped {len(ids) - len(remaining_ids)} rows of {part_file_path} already in the store")
+        return remaining_ids
+
+    def reset(self) -> None:
+        """
+        Removes all parts and the watermark, so the next ingestion exports the whole collection.
+        """
+        try:
+            shutil.rmtree(self.collection_dir, ignore_errors=True)
+            logging.info(f"Reset feature store {self.collection_dir}")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def part_files(self) -> List[str]:
+        return [self.part_file_path(part_no) for part_no in range(self.read_watermark()["parts"])]
+
+    def iter_tables(self) -> Iterator[pa.Table]:
+        """
+        Yields the stored rows one row group at a time, in part order.
+        """
+        try:
+            for part_file_path in self.part_files():
+                part_file = pq.ParquetFile(part_file_path)
+                for row_group in range(part_file.num_row_groups):
+                    yield part_file.read_row_group(row_group)
+        except Exception as e:
+            raise MyException(e, sys)
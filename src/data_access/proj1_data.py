@@ -1,26 +1,329 @@
+import os
+import shutil
 import sys
+import tempfile
 import pandas as pd
 import numpy as np
-from typing import Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bson import ObjectId
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME, SCHEMA_FILE_PATH, DATA_INGESTION_CHUNK_ROWS, DATA_INGESTION_CURSOR_BATCH_SIZE, \
+    DATA_INGESTION_EXPORT_PARALLELISM, DATA_INGESTION_PARTITIONS_PER_WORKER, DATA_INGESTION_PARTITION_SAMPLES, \
+    DATA_INGESTION_SERVER_SIDE_CLEANUP
 from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_yaml_file
+
+# Arrow types of the column types in config/schema.yaml. Categories are stored as strings,
+# Parquet dictionary-encodes them on disk
+SCHEMA_ARROW_TYPES = {"int": pa.int64(), "float": pa.float64(), "category": pa.string()}
+# Source values exported as missing
+MISSING_VALUES = ("na", "")
+# Schema columns not exported
+EXCLUDED_COLUMNS = ("id",)
+# Gender labels by the code the aggregation export path sends, the codes DataTransformation maps them to
+GENDER_LEVELS = ["Female", "Male"]
+
 
 class Proj1Data:
     """
-    A class to export MongoDB records as a pandas DataFrame.
+    A class to export MongoDB records as a pandas DataFrame or a Parquet file.
     """
-    
+
     def __init__(self) -> None:
         """
         Initializes the MongoDB client connection.
         """
         try:
             self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
         except Exception as e:
             raise MyException(e,sys)
-        
+
+    def _get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        # Access specified collection from the default or specified database
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    def export_schema(self) -> pa.Schema:
+        """
+        Returns the Arrow schema of exported rows: _id as a string, then the schema.yaml columns
+        with their types, except EXCLUDED_COLUMNS.
+        """
+        fields = [pa.field("_id", pa.string())]
+        for column in self._schema_config["columns"]:
+            for name, column_type in column.items():
+                if name not in EXCLUDED_COLUMNS:
+                    fields.append(pa.field(name, SCHEMA_ARROW_TYPES[column_type]))
+        return pa.schema(fields)
+
+    def category_levels(self) -> Dict[str, List[str]]:
+        """
+        Returns the labels of the categorical columns, indexed by the codes the aggregation export path uses.
+        """
+        return {"Gender": GENDER_LEVELS, **self._schema_config["categorical_levels"]}
+
+    def aggregation_pipeline(self, query: Optional[dict] = None) -> List[dict]:
+        """
+        Returns the aggregation pipeline of the server-side cleanup export path. It filters the
+        documents with query and projects every export_schema() column but _id to the short key
+        "c<column position>", already cleaned up:
+        - numeric columns are converted to double like the find path converts them: numbers and
+          numeric strings such as "35" are kept, "na", "" and any other non-numeric value become null
+        - categorical columns become the code of their label in category_levels(), labels outside
+          the levels (including "na" and "") become null
+        """
+        levels = self.category_levels()
+        projection = {"_id": 1}
+        for position, field in enumerate(self.export_schema()):
+            if field.name == "_id":
+                continue
+            value = f"${field.name}"
+            if field.name in levels:
+                expression = {"$switch": {"branches": [{"case": {"$eq": [value, label]}, "then": code}
+                                                       for code, label in enumerate(levels[field.name])],
+                                          "default": None}}
+            elif pa.types.is_string(field.type):
+                expression = {"$cond": [{"$in": [value, list(MISSING_VALUES)]}, None, value]}
+            else:
+                expression = {"$convert": {"input": value, "to": "double", "onError": None, "onNull": None}}
+            projection[f"c{position}"] = expression
+        return ([{"$match": query}] if query else []) + [{"$project": projection}]
+
+    @staticmethod
+    def _column_array(name: str, values: list, arrow_type: pa.DataType, levels: Optional[List[str]] = None) -> pa.Array:
+        """
+        Converts the values of one column of a chunk to a typed Arrow array, with None, missing
+        fields and MISSING_VALUES as nulls. With levels, values are codes of those labels.
+        """
+        if levels is not None:
+            return pa.array(levels, type=arrow_type).take(pa.array(values, type=pa.int64()))
+        if name == "_id":
+            return pa.array([str(value) for value in values], type=arrow_type)
+        if pa.types.is_string(arrow_type):
+            return pa.array([None if value is None or value in MISSING_VALUES else str(value) for value in values],
+                            type=arrow_type)
+        if pa.types.is_integer(arrow_type):
+            try:
+                # Exact for the common case of a column without missing values
+                return pa.array(np.array(values, dtype=np.int64), type=arrow_type)
+            except (TypeError, ValueError, OverflowError):
+                pass
+        try:
+            array = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            try:
+                array = np.array([np.nan if value is None or value in MISSING_VALUES else float(value)
+                                  for value in values], dtype=np.float64)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Column {name} has a value that is not a number: {e}") from e
+        mask = np.isnan(array)
+        if pa.types.is_integer(arrow_type):
+            return pa.array(np.where(mask, 0, array).astype(np.int64), mask=mask, type=arrow_type)
+        return pa.array(array, mask=mask, type=arrow_type)
+
+    def _to_table(self, columns: List[list], schema: pa.Schema, levels: Dict[str, List[str]]) -> pa.Table:
+        return pa.Table.from_arrays([self._column_array(field.name, values, field.type, levels.get(field.name))
+                                     for field, values in zip(schema, columns)], schema=schema)
+
+    def iter_collection_chunks(self, collection_name: str, database_name: Optional[str] = None,
+                               query: Optional[dict] = None, chunk_rows: int = DATA_INGESTION_CHUNK_ROWS,
+                               cursor_batch_size: int = DATA_INGESTION_CURSOR_BATCH_SIZE,
+                               server_side_cleanup: bool = DATA_INGESTION_SERVER_SIDE_CLEANUP) -> Iterator[pa.Table]:
+        """
+        Streams a MongoDB collection as typed Arrow tables of up to chunk_rows rows.
+
+        Only the export_schema() columns are requested from the server. Documents are appended
+        to per-column lists and converted to typed arrays once per chunk, so memory is bounded
+        by chunk_rows instead of the collection size.
+
+        With server_side_cleanup, documents are read through aggregation_pipeline() instead of
+        find: they arrive as compact numeric documents with short keys, and categorical codes are
+        turned back into labels per chunk. Both paths yield the same tables, except for numbers
+        stored as strings and labels outside category_levels(), which only this path makes null.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to export.
+        database_name : Optional[str]
+            Name of the database (optional). Defaults to DATABASE_NAME.
+        query : Optional[dict]
+            Filter of the documents to export (optional). Defaults to all documents.
+        chunk_rows : int
+            Rows per yielded table.
+        cursor_batch_size : int
+            Documents fetched per round trip to the server.
+        server_side_cleanup : bool
+            Clean up and encode the documents in an aggregation pipeline on the server.
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            schema = self.export_schema()
+            if server_side_cleanup:
+                cursor = collection.aggregate(self.aggregation_pipeline(query), batchSize=cursor_batch_size)
+                keys = ["_id"] + [f"c{position}" for position in range(1, len(schema))]
+                levels = self.category_levels()
+            else:
+                projection = {name: 1 for name in schema.names}
+                cursor = collection.find(query or {}, projection).batch_size(cursor_batch_size)
+                keys = schema.names
+                levels = {}
+            column_lists = [(key, []) for key in keys]
+            rows = 0
+            for document in cursor:
+                for key, values in column_lists:
+                    values.append(document.get(key))
+                rows += 1
+                if rows == chunk_rows:
+                    yield self._to_table([values for _, values in column_lists], schema, levels)
+                    column_lists = [(key, []) for key in keys]
+                    rows = 0
+            if rows:
+                yield self._to_table([values for _, values in column_lists], schema, levels)
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def partition_queries(self, collection_name: str, partitions: int, database_name: Optional[str] = None,
+                          query: Optional[dict] = None) -> List[dict]:
+        """
+        Splits the documents matching query into _id ranges of about equal size, with boundaries
+        taken from a $sample of their _ids. The first and last ranges are open, so the ranges
+        together match every document exactly once, however good the sample is.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to split.
+        partitions : int
+            Number of ranges to return. Fewer are returned for small collections, and a single
+            one when the sample holds fewer _ids than partitions.
+        database_name : Optional[str]
+            Name of the database (optional). Defaults to DATABASE_NAME.
+        query : Optional[dict]
+            Filter combined with every range (optional).
+
+        Returns:
+        -------
+        List[dict]
+            One filter per range, in _id order.
+        """
+        try:
+            if partitions <= 1:
+                return [query or {}]
+            collection = self._get_collection(collection_name, database_name)
+            # Sampled from the matching documents only, or in incremental mode all new documents
+            # would fall into the last range
+            sample = [document["_id"] for document in collection.aggregate(
+                [{"$match": query or {}}, {"$sample": {"size": partitions * DATA_INGESTION_PARTITION_SAMPLES}},
+                 {"$project": {"_id": 1}}])]
+            if len(sample) < partitions:
+                logging.info(f"Sampled {len(sample)} documents of {collection_name}, exporting it as one partition")
+                return [query or {}]
+            if not all(isinstance(_id, ObjectId) for _id in sample):
+                # Range filters only match _ids of the boundaries' BSON type
+                logging.info(f"{collection_name} has _ids that are not ObjectIds, exporting it as one partition")
+                return [query or {}]
+            sample.sort()
+            boundaries = sorted(set(sample[len(sample) * i // partitions] for i in range(1, partitions)))
+            queries = []
+            for lower, upper in zip([None] + boundaries, boundaries + [None]):
+                id_range = {}
+                if lower is not None:
+                    id_range["$gte"] = lower
+                if upper is not None:
+                    id_range["$lt"] = upper
+                range_query = {"_id": id_range} if id_range else {}
+                queries.append({"$and": [query, range_query]} if query else range_query)
+            return queries
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def _write_parquet(self, file_path: str, tables: Iterable[pa.Table]) -> int:
+        """
+        Writes tables as the row groups of a Parquet file, under a temporary name renamed into place.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        tmp_file_path = f"{file_path}.tmp-{os.getpid()}"
+        rows = 0
+        try:
+            with pq.ParquetWriter(tmp_file_path, self.export_schema()) as writer:
+                for table in tables:
+                    writer.write_table(table)
+                    rows += table.num_rows
+            os.replace(tmp_file_path, file_path)
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+        return rows
+
+    def export_collection_to_parquet(self, collection_name: str, file_path: str,
+                                     database_name: Optional[str] = None, query: Optional[dict] = None,
+                                     chunk_rows: int = DATA_INGESTION_CHUNK_ROWS,
+                                     cursor_batch_size: int = DATA_INGESTION_CURSOR_BATCH_SIZE,
+                                     parallelism: int = DATA_INGESTION_EXPORT_PARALLELISM,
+                                     server_side_cleanup: bool = DATA_INGESTION_SERVER_SIDE_CLEANUP) -> int:
+        """
+        Streams a MongoDB collection into a Parquet file, one row group per chunk of
+        iter_collection_chunks. The file is written under a temporary name and renamed into place.
+
+        With parallelism above 1, the collection is split by partition_queries into
+        parallelism * DATA_INGESTION_PARTITIONS_PER_WORKER _id ranges, which are read concurrently
+        by that many threads over the shared MongoDBClient connection pool. Each range is written to
+        its own part file; the parts are then appended to the output in _id order.
+        server_side_cleanup is passed to iter_collection_chunks.
+
+        Returns:
+        -------
+        int
+            Number of rows written.
+        """
+        try:
+            if parallelism <= 1:
+                rows = self._write_parquet(file_path, self.iter_collection_chunks(
+                    collection_name, database_name, query, chunk_rows, cursor_batch_size, server_side_cleanup))
+                logging.info(f"Exported {rows} rows of {collection_name} to {file_path}")
+                return rows
+
+            queries = self.partition_queries(collection_name, parallelism * DATA_INGESTION_PARTITIONS_PER_WORKER,
+                                             database_name, query)
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+            parts_dir = tempfile.mkdtemp(prefix=".parts-", dir=os.path.dirname(os.path.abspath(file_path)))
+            try:
+                def export_partition(partition_no: int) -> int:
+                    part_rows = self._write_parquet(
+                        os.path.join(parts_dir, f"part-{partition_no:05d}.parquet"),
+                        self.iter_collection_chunks(collection_name, database_name, queries[partition_no],
+                                                    chunk_rows, cursor_batch_size, server_side_cleanup))
+                    logging.info(f"Exported partition {partition_no + 1}/{len(queries)} of {collection_name} "
+                                 f"({part_rows} rows)")
+                    return part_rows
+
+                with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="mongo-export") as executor:
+                    part_rows = list(executor.map(export_partition, range(len(queries))))
+
+                def part_tables() -> Iterator[pa.Table]:
+                    for partition_no in range(len(queries)):
+                        part_file = pq.ParquetFile(os.path.join(parts_dir, f"part-{partition_no:05d}.parquet"))
+                        for row_group in range(part_file.num_row_groups):
+                            yield part_file.read_row_group(row_group)
+
+                rows = self._write_parquet(file_path, part_tables())
+            finally:
+                shutil.rmtree(parts_dir, ignore_errors=True)
+            logging.info(f"Exported {rows} rows of {collection_name} to {file_path} from {len(queries)} "
+                         f"partitions read by {parallelism} threads")
+            if rows != sum(part_rows):
+                raise ValueError(f"Merged {rows} rows from partitions of {sum(part_rows)} rows")
+            return rows
+        except Exception as e:
+            raise MyException(e,sys)
+
     def export_collection_as_dataframe(self,collection_name: str, database_name: Optional[str]=None) -> pd.DataFrame:
         """
         Exports an entire MongoDB collection as a pandas DataFrame.
@@ -35,25 +338,15 @@ class Proj1Data:
         Returns:
         -------
         pd.DataFrame
-            DataFrame containing the collection data, with '_id' column removed and 'na' values replaced with NaN.
+            DataFrame of the schema columns with 'id' removed, '_id' as a string and 'na' and empty values replaced with NaN.
         """
-        
+
         try:
-            # Access specified collection from the default or specified database
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client.database[database_name][collection_name]
-                
-            # Convert collection data to pandas dataframe and preprocess
-            print("Fetching data from MongoDB")
-            df = pd.DataFrame(list(collection.find()))
-            print(f"Data fetched with len: {len(df)}")
-            if "id" in df.columns.to_list():
-                df = df.drop(columns=['id'], axis=1)
-            
-            df.replace({"na":np.nan},inplace=True)
+            logging.info("Fetching data from MongoDB")
+            tables = list(self.iter_collection_chunks(collection_name, database_name))
+            df = pa.concat_tables(tables).to_pandas() if tables else self.export_schema().empty_table().to_pandas()
+            logging.info(f"Data fetched with len: {len(df)}")
             return df
-        
+
         except Exception as e:
-            raise MyException(e,sys)
\ No newline at end of file
+            raise MyException(e,sys)
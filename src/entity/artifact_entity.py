@@ -38,4 +38,11 @@ class ModelEvaluationArtifact:
 @dataclass
 class ModelPusherArtifact:
     bucket_name:str
-    s3_model_path:str
\ No newline at end of file
+    s3_model_path:str
+    
+@dataclass
+class BatchScoringArtifact:
+    rows_scored:int
+    partitions_scored:int
+    output_location:str
+    partitions_failed:int = 0
@@ -17,11 +17,19 @@ training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()
 class DataIngestionConfig:
     data_ingestion_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_INGESTION_DIR_NAME)
     data_ingestion_ingested_dir: str = os.path.join(data_ingestion_dir,DATA_INGESTION_INGESTED_DIR)
-    feature_store_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR, FILE_NAME)
+    feature_store_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR, FEATURE_STORE_FILE_NAME)
     training_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TRAIN_FILE_NAME)
     testing_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
     collection_name:str = DATA_INGESTION_COLLECTION_NAME
+    cursor_batch_size:int = DATA_INGESTION_CURSOR_BATCH_SIZE
+    chunk_rows:int = DATA_INGESTION_CHUNK_ROWS
+    export_parallelism:int = DATA_INGESTION_EXPORT_PARALLELISM
+    server_side_cleanup:bool = DATA_INGESTION_SERVER_SIDE_CLEANUP
+    mode:str = DATA_INGESTION_MODE
+    full_rebuild:bool = DATA_INGESTION_FULL_REBUILD
+    watermark_overlap_seconds:int = DATA_INGESTION_WATERMARK_OVERLAP_SECONDS
+    feature_store_dir:str = FEATURE_STORE_DIR
     
 @dataclass
 class DataValidationConfig:
@@ -50,6 +58,7 @@ class ModelTrainerConfig:
     _max_depth:int = MIN_SAMPLES_SPLIT_MAX_DEPTH
     _criterion:str = MIN_SAMPLES_SPLIT_CRITERION
     _random_state:int = MIN_SAMPLES_SPLIT_RANDOM_STATE
+    decision_threshold:float = MODEL_TRAINER_DECISION_THRESHOLD
     
 @dataclass
 class ModelEvaluationConfig:
@@ -61,11 +70,56 @@ class ModelEvaluationConfig:
 class ModelPusherConfig:
     bucket_name:str = MODEL_BUCKET_NAME
     s3_model_key_path:str = MODEL_FILE_NAME
+    export_format:str = MODEL_PUSHER_EXPORT_FORMAT
     
 @dataclass
 class VehiclePredictorConfig:
     model_file_path:str = MODEL_FILE_NAME
     model_bucket_name:str = MODEL_BUCKET_NAME
-    
+    model_refresh_interval:int = MODEL_REFRESH_INTERVAL_SECONDS
+    batch_chunk_size:int = BATCH_PREDICTION_CHUNK_SIZE
+    micro_batch_window_ms:float = MICRO_BATCH_WINDOW_MS
+    micro_batch_max_size:int = MICRO_BATCH_MAX_SIZE
+    micro_batch_max_queue_size:int = MICRO_BATCH_MAX_QUEUE_SIZE
+    executor_mode:str = INFERENCE_EXECUTOR_MODE
+    executor_max_workers:int = INFERENCE_MAX_WORKERS
+    executor_max_queue_size:int = INFERENCE_MAX_QUEUE_SIZE
+    executor_timeout:float = INFERENCE_TIMEOUT_SECONDS
+    prediction_cache_max_size:int = PREDICTION_CACHE_MAX_SIZE
+    prediction_cache_ttl:float = PREDICTION_CACHE_TTL_SECONDS
+
+@dataclass
+class BatchScoringConfig:
+    collection_name:str = DATA_INGESTION_COLLECTION_NAME
+    output_format:str = BATCH_SCORING_OUTPUT_FORMAT
+    output_collection_name:str = DATA_INGESTION_COLLECTION_NAME + BATCH_SCORING_OUTPUT_COLLECTION_SUFFIX
+    batch_scoring_dir:str = os.path.join(ARTIFACT_DIR, BATCH_SCORING_DIR_NAME, DATA_INGESTION_COLLECTION_NAME)
+    checkpoint_file_path:str = os.path.join(batch_scoring_dir, BATCH_SCORING_CHECKPOINT_FILE_NAME)
+    cursor_batch_size:int = BATCH_SCORING_CURSOR_BATCH_SIZE
+    partition_rows:int = BATCH_SCORING_PARTITION_ROWS
+    max_workers:int = BATCH_SCORING_MAX_WORKERS
+    on_error:str = BATCH_SCORING_ON_ERROR
+    model_file_path:str = MODEL_FILE_NAME
+    model_bucket_name:str = MODEL_BUCKET_NAME
+
+@dataclass
+class TrainingJobConfig:
+    training_job_dir:str = os.path.join(ARTIFACT_DIR, TRAINING_JOB_DIR_NAME)
+    lock_file_path:str = os.path.join(training_job_dir, TRAINING_JOB_LOCK_FILE_NAME)
+    lock_grace_seconds:float = TRAINING_JOB_LOCK_GRACE_SECONDS
+    status_file_name:str = TRAINING_JOB_STATUS_FILE_NAME
+    log_file_name:str = TRAINING_JOB_LOG_FILE_NAME
+    niceness:int = TRAINING_JOB_NICENESS
 
-    
\ No newline at end of file
+@dataclass
+class ShadowScoringConfig:
+    candidate_model_file_path:str = SHADOW_MODEL_FILE_PATH
+    model_bucket_name:str = MODEL_BUCKET_NAME
+    model_refresh_interval:int = MODEL_REFRESH_INTERVAL_SECONDS
+    sample_rate:float = SHADOW_SAMPLE_RATE
+    max_queue_size:int = SHADOW_QUEUE_SIZE
+    shadow_log_file_path:str = os.path.join(ARTIFACT_DIR, SHADOW_DIR_NAME, SHADOW_LOG_FILE_NAME)
+    log_max_bytes:int = SHADOW_LOG_MAX_BYTES
+    log_backup_count:int = SHADOW_LOG_BACKUP_COUNT
+    executor_mode:str = SHADOW_EXECUTOR_MODE
+    niceness:int = SHADOW_NICENESS
@@ -1,11 +1,28 @@
+import json
+import os
 import sys
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
+from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, StandardScaler
 
+from src.constants import MODEL_INFERENCE_BACKEND, COMPILED_FOREST_MAX_BATCH_SIZE
+from src.entity.forest_compiler import CompiledForest
 from src.exception import MyException
 from src.logger import logging
+from src.utils.metrics import PREDICTION_STAGE_SECONDS
+
+_PREPROCESS_SECONDS = PREDICTION_STAGE_SECONDS.labels("preprocess")
+_PREDICT_SECONDS = PREDICTION_STAGE_SECONDS.labels("predict")
+
+# Array export written by MyModel.export_arrays
+MODEL_ARRAYS_FORMAT = "vehicle-insurance-model-arrays"
+MODEL_ARRAYS_FORMAT_VERSION = 1
+MODEL_ARRAYS_MANIFEST_FILE_NAME = "manifest.json"
 
 class TargetValueMapping:
     def __init__(self):
@@ -18,13 +35,240 @@ class TargetValueMapping:
         return dict(zip(mapping_response.values(),mapping_response.keys()))
 
 class MyModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    # Attributes derived from the fitted objects, rebuilt on load instead of being pickled
+    _compiled_attributes = ("feature_names", "_feature_index", "_scale", "_offset", "_forest")
+
+    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object,
+                 decision_threshold: Optional[float] = None):
         """
         :param preprocessing_object: Input Object of preprocesser
         :param trained_model_object: Input Object of trained model 
+        :param decision_threshold: Positive class probability from which label 1 is predicted,
+                                   None predicts the most probable class like the trained model
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.decision_threshold = decision_threshold
+        self._compile_preprocessing()
+        self._compile_model()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Models loaded from an array export have nothing to rebuild the compiled attributes from
+        if self.trained_model_object is not None:
+            for attribute in self._compiled_attributes:
+                state.pop(attribute, None)
+        return state
+
+    def __setstate__(self, state):
+        # Also compiles models pickled before the fast path existed
+        state.setdefault("decision_threshold", None)
+        self.__dict__.update(state)
+        if self.trained_model_object is not None:
+            self._compile_preprocessing()
+            self._compile_model()
+
+    def to_arrays(self) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """
+        Describes the compiled preprocessing and forest as plain arrays, the content of the
+        array-based export formats. The sklearn objects are not part of it, so the
+        preprocessing must be compilable.
+        Returns: JSON-serializable model fields and the arrays by name
+        """
+        if not self.is_compiled:
+            raise ValueError("Only models with compiled preprocessing can be exported as arrays")
+        forest = self._forest or CompiledForest.from_sklearn(self.trained_model_object)
+        arrays = {"feature_index": self._feature_index, "scale": self._scale, "offset": self._offset,
+                  **forest.to_arrays()}
+        fields = {
+            "model": repr(self),
+            "feature_names": [str(name) for name in self.feature_names],
+            "max_depth": forest.max_depth,
+            "decision_threshold": self.decision_threshold,
+        }
+        return fields, arrays
+
+    @classmethod
+    def from_arrays(cls, fields: dict, arrays: Dict[str, np.ndarray]) -> "MyModel":
+        """
+        Rebuilds a model from to_arrays() output, using the arrays as they are (memory-mapped
+        arrays stay memory-mapped). The model always predicts with the compiled forest,
+        whatever the batch size.
+        """
+        model = cls.__new__(cls)
+        model.preprocessing_object = None
+        model.trained_model_object = None
+        model.decision_threshold = fields["decision_threshold"]
+        model.feature_names = fields["feature_names"]
+        model._feature_index = arrays["feature_index"]
+        model._scale = arrays["scale"]
+        model._offset = arrays["offset"]
+        model._forest = CompiledForest.from_arrays(arrays, max_depth=fields["max_depth"])
+        return model
+
+    def export_arrays(self, directory: str) -> None:
+        """
+        Writes to_arrays() to directory, one .npy file per array plus a JSON manifest,
+        to be loaded with MyModel.load_arrays.
+        :param directory: Output directory, created if missing
+        """
+        try:
+            fields, arrays = self.to_arrays()
+            os.makedirs(directory, exist_ok=True)
+            for name, array in arrays.items():
+                np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+            manifest = {"format": MODEL_ARRAYS_FORMAT, "format_version": MODEL_ARRAYS_FORMAT_VERSION,
+                        **fields, "arrays": sorted(arrays)}
+            with open(os.path.join(directory, MODEL_ARRAYS_MANIFEST_FILE_NAME), "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+            logging.info(f"Exported {repr(self)} as {len(arrays)} arrays to {directory}")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @classmethod
+    def load_arrays(cls, directory: str, mmap_mode: Optional[str] = "r") -> "MyModel":
+        """
+        Loads a model written by export_arrays. With mmap_mode="r" the arrays are memory-mapped
+        read-only, so all processes loading the same directory share one copy in the OS page cache.
+        :param directory: Directory written by export_arrays
+        :param mmap_mode: Passed to np.load, None reads the arrays into process memory
+        """
+        try:
+            with open(os.path.join(directory, MODEL_ARRAYS_MANIFEST_FILE_NAME)) as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest.get("format") != MODEL_ARRAYS_FORMAT or \
+                    manifest.get("format_version", 0) > MODEL_ARRAYS_FORMAT_VERSION:
+                raise ValueError(f"Unsupported model export in {directory}: "
+                                 f"{manifest.get('format')} version {manifest.get('format_version')}")
+            arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+                      for name in manifest["arrays"]}
+            model = cls.from_arrays(manifest, arrays)
+            logging.info(f"Loaded {manifest['model']} from {directory} (mmap_mode={mmap_mode})")
+            return model
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _compile_preprocessing(self) -> None:
+        """
+        Extracts the fitted scaler constants of the ColumnTransformer into one affine transform
+        X[:, feature_index] * scale + offset, with the output column order of the ColumnTransformer.
+        Leaves the fast path disabled if the preprocessor holds anything but scalers and passthrough.
+        """
+        self.feature_names = None
+        self._feature_index = self._scale = self._offset = None
+        try:
+            column_transformer = self.preprocessing_object
+            if isinstance(column_transformer, Pipeline):
+                if len(column_transformer.steps) != 1:
+                    raise ValueError("Only single-step preprocessing pipelines can be compiled")
+                column_transformer = column_transformer.steps[0][1]
+            if not isinstance(column_transformer, ColumnTransformer):
+                raise ValueError(f"Cannot compile {type(column_transformer).__name__}")
+
+            feature_names = list(column_transformer.feature_names_in_)
+            feature_index, scale, offset = [], [], []
+            for _, transformer, columns in column_transformer.transformers_:
+                if isinstance(transformer, str) and transformer == "drop":
+                    continue
+                index = [feature_names.index(col) if isinstance(col, str) else int(col) for col in columns]
+                # Newer sklearn stores "passthrough" as an identity FunctionTransformer
+                if (isinstance(transformer, str) and transformer == "passthrough") or \
+                        (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+                    col_scale, col_offset = np.ones(len(index)), np.zeros(len(index))
+                elif isinstance(transformer, StandardScaler):
+                    # mean_ is fitted even when with_mean=False, and then not subtracted by transform
+                    col_scale = 1 / transformer.scale_ if transformer.with_std else np.ones(len(index))
+                    col_mean = transformer.mean_ if transformer.with_mean else np.zeros(len(index))
+                    col_offset = -col_mean * col_scale
+                elif isinstance(transformer, MinMaxScaler) and not transformer.clip:
+                    col_scale, col_offset = transformer.scale_, transformer.min_
+                else:
+                    raise ValueError(f"Cannot compile {type(transformer).__name__}")
+                feature_index.extend(index)
+                scale.extend(col_scale)
+                offset.extend(col_offset)
+
+            self.feature_names = feature_names
+            self._feature_index = np.array(feature_index, dtype=np.intp)
+            self._scale = np.array(scale, dtype=np.float64)
+            self._offset = np.array(offset, dtype=np.float64)
+        except Exception as e:
+            logging.warning(f"Preprocessing fast path disabled, using sklearn transform: {e}")
+
+    def _compile_model(self) -> None:
+        """
+        Flattens the trained forest into a CompiledForest used as the inference backend,
+        unless MODEL_INFERENCE_BACKEND selects sklearn or the model is not a forest classifier.
+        """
+        self._forest = None
+        if MODEL_INFERENCE_BACKEND != "compiled":
+            return
+        try:
+            self._forest = CompiledForest.from_sklearn(self.trained_model_object)
+        except Exception as e:
+            logging.warning(f"Compiled forest backend disabled, using sklearn predict: {e}")
+
+    @property
+    def is_compiled(self) -> bool:
+        return self._feature_index is not None
+
+    @property
+    def inference_backend(self) -> str:
+        return "compiled" if self._forest is not None else "sklearn"
+
+    def _use_forest(self, transformed_feature: np.ndarray) -> bool:
+        if self._forest is None:
+            return False
+        return self.trained_model_object is None or len(transformed_feature) <= COMPILED_FOREST_MAX_BATCH_SIZE
+
+    @property
+    def positive_class_index(self) -> int:
+        classes = list(self.classes_)
+        return classes.index(1) if 1 in classes else len(classes) - 1
+
+    def _labels_from_proba(self, proba: np.ndarray) -> np.ndarray:
+        if self.decision_threshold is None:
+            return self.classes_.take(np.argmax(proba, axis=1))
+        positive_index = self.positive_class_index
+        negative_index = 1 - positive_index if len(self.classes_) == 2 else 0
+        is_positive = proba[:, positive_index] >= self.decision_threshold
+        return self.classes_.take(np.where(is_positive, positive_index, negative_index))
+
+    def _predict_transformed(self, transformed_feature: np.ndarray) -> np.ndarray:
+        if self.decision_threshold is not None:
+            return self._labels_from_proba(self._predict_proba_transformed(transformed_feature))
+        with _PREDICT_SECONDS.time():
+            if self._use_forest(transformed_feature):
+                return self._forest.predict(transformed_feature)
+            return self.trained_model_object.predict(transformed_feature)
+
+    def _predict_proba_transformed(self, transformed_feature: np.ndarray) -> np.ndarray:
+        with _PREDICT_SECONDS.time():
+            if self._use_forest(transformed_feature):
+                return self._forest.predict_proba(transformed_feature)
+            return self.trained_model_object.predict_proba(transformed_feature)
+
+    def transform_array(self, array: np.ndarray) -> np.ndarray:
+        """
+        Applies the compiled preprocessing to raw features ordered as feature_names.
+        Returns: float32 matrix in the column order expected by the trained model
+        """
+        array = np.asarray(array, dtype=np.float64)
+        if array.ndim == 1:
+            array = array.reshape(1, -1)
+        return (array[:, self._feature_index] * self._scale + self._offset).astype(np.float32)
+
+    def records_to_array(self, records: List[Dict]) -> np.ndarray:
+        """
+        Converts {feature: value} records to a raw feature matrix ordered as feature_names.
+        """
+        return np.array([[record[col] for col in self.feature_names] for record in records], dtype=np.float64)
+
+    def _transform(self, dataframe: pd.DataFrame) -> np.ndarray:
+        with _PREPROCESS_SECONDS.time():
+            if self.is_compiled:
+                return self.transform_array(dataframe[self.feature_names].to_numpy(dtype=np.float64))
+            return self.preprocessing_object.transform(dataframe)
     
     def predict(self, dataframe: pd.DataFrame) -> DataFrame:
         """
@@ -32,21 +276,76 @@ class MyModel:
         applies scaling using preprocessing_object, and performs prediction on transformed features.
         """
         try:
-            logging.info("Starting prediction process")
+            logging.info("Starting prediction process", extra={"hot_path": True})
             
             # Step 1: Apply scaling transformations using the pre-trained preprocessig object
-            transformed_feature = self.preprocessing_object.transform(dataframe)
+            transformed_feature = self._transform(dataframe)
             
             # Step 2: Perform prediction using the trained model
-            logging.info("Using the trained model to get prediction")
-            predictions = self.trained_model_object.predict(transformed_feature)
+            logging.info("Using the trained model to get prediction", extra={"hot_path": True})
+            predictions = self._predict_transformed(transformed_feature)
             
             return predictions
         except Exception as e:
             raise MyException(e,sys)
-        
+
+    def predict_proba(self, dataframe: pd.DataFrame) -> np.ndarray:
+        """
+        Same input contract as predict, returns class probabilities ordered as in classes_.
+        """
+        try:
+            transformed_feature = self._transform(dataframe)
+            return self._predict_proba_transformed(transformed_feature)
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def predict_with_proba(self, dataframe: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Same input contract as predict, scores the forest once for both outputs.
+        Returns: Predicted labels (decision_threshold applied) and positive class probabilities
+        """
+        try:
+            proba = self._predict_proba_transformed(self._transform(dataframe))
+            return self._labels_from_proba(proba), proba[:, self.positive_class_index]
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def predict_array(self, array: np.ndarray) -> np.ndarray:
+        """
+        Predicts from a raw feature matrix ordered as feature_names, without building a DataFrame.
+        """
+        try:
+            if not self.is_compiled:
+                return self.predict(DataFrame(np.atleast_2d(array), columns=self.preprocessing_object.feature_names_in_))
+            return self._predict_transformed(self.transform_array(array))
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def predict_records(self, records: List[Dict]) -> np.ndarray:
+        """
+        Predicts from {feature: value} records, without building a DataFrame.
+        """
+        try:
+            if not self.is_compiled:
+                return self.predict(DataFrame.from_records(records))
+            return self.predict_array(self.records_to_array(records))
+        except Exception as e:
+            raise MyException(e,sys)
+
+    @property
+    def classes_(self) -> np.ndarray:
+        if self.trained_model_object is None:
+            return self._forest.classes_
+        return self.trained_model_object.classes_
+
+    @property
+    def _model_name(self) -> str:
+        if self.trained_model_object is None:
+            return type(self._forest).__name__
+        return type(self.trained_model_object).__name__
+
     def __repr__(self):
-        return f"{type(self.trained_model_object).__name__}()"
+        return f"{self._model_name}()"
     
     def __str__(self):
-        return f"{type(self.trained_model_object).__name__}()"
\ No newline at end of file
+        return f"{self._model_name}()"
\ No newline at end of file
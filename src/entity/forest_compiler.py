@@ -0,0 +1,139 @@
+import sys
+from typing import Dict
+
+import numpy as np
+from sklearn.base import is_classifier
+
+from src.exception import MyException
+from src.logger import logging
+
+# Names of the arrays returned by CompiledForest.to_arrays()
+FOREST_ARRAY_NAMES = ("feature", "threshold", "children", "value", "roots", "classes")
+
+
+class CompiledForest:
+    """
+    A fitted sklearn forest classifier flattened into contiguous NumPy arrays.
+
+    All trees share one node table. Leaves point to themselves, so every row can descend
+    max_depth levels in lock-step: each level is one vectorized gather/compare over the whole
+    (rows x trees) block instead of a Python-level dispatch per tree.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, classes: np.ndarray,
+                 chunk_size: int = 1024) -> None:
+        """
+        :param feature: Split feature of every node, 0 for leaves
+        :param threshold: Split threshold of every node, rows go left when x <= threshold
+        :param children: Flattened [left, right] child pairs of every node, leaves point to themselves
+        :param value: Class probabilities of every node, shape (n_nodes, n_classes)
+        :param roots: Node index of the root of every tree
+        :param max_depth: Depth of the deepest tree
+        :param classes: Class labels, ordered as the columns of value
+        :param chunk_size: Rows evaluated at once, bounds the (rows x trees) working set
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_sklearn(cls, forest: object) -> "CompiledForest":
+        """
+        Packs the fitted estimators_ of a single-output sklearn forest classifier.
+        """
+        try:
+            if not (is_classifier(forest) and hasattr(forest, "estimators_")) or forest.n_outputs_ != 1:
+                raise ValueError(f"Cannot compile {type(forest).__name__}, expected a single-output forest classifier")
+            features, thresholds, children, values, roots = [], [], [], [], []
+            max_depth, offset = 0, 0
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                node_ids = np.arange(tree.node_count)
+                is_leaf = tree.children_left == -1
+                left = np.where(is_leaf, node_ids, tree.children_left) + offset
+                right = np.where(is_leaf, node_ids, tree.children_right) + offset
+                value = tree.value[:, 0, :].astype(np.float64)
+                value /= value.sum(axis=1, keepdims=True)
+
+                features.append(np.where(is_leaf, 0, tree.feature))
+                thresholds.append(tree.threshold)
+                children.append(np.column_stack([left, right]).ravel())
+                values.append(value)
+                roots.append(offset)
+                max_depth = max(max_depth, tree.max_depth)
+                offset += tree.node_count
+
+            compiled = cls(feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int32),
+                           threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+                           children=np.ascontiguousarray(np.concatenate(children), dtype=np.int32),
+                           value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+                           roots=np.array(roots, dtype=np.int32),
+                           max_depth=max_depth,
+                           classes=forest.classes_)
+            logging.info(f"Compiled {len(roots)} trees with {offset} nodes, max depth {max_depth}")
+            return compiled
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Returns: The node table and class labels by name, as stored by export formats
+        """
+        return {"feature": self.feature, "threshold": self.threshold, "children": self.children,
+                "value": self.value, "roots": self.roots, "classes": self.classes_}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], max_depth: int) -> "CompiledForest":
+        """
+        Rebuilds a forest from to_arrays() output. The arrays are used as they are,
+        so memory-mapped arrays stay memory-mapped.
+        """
+        try:
+            missing = [name for name in FOREST_ARRAY_NAMES if name not in arrays]
+            if missing:
+                raise ValueError(f"Missing forest arrays: {missing}")
+            return cls(feature=arrays["feature"], threshold=arrays["threshold"], children=arrays["children"],
+                       value=arrays["value"], roots=arrays["roots"], max_depth=max_depth,
+                       classes=arrays["classes"])
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _leaves(self, array: np.ndarray) -> np.ndarray:
+        # Gathering from the flattened rows is cheaper than 2-D fancy indexing
+        flat = np.ascontiguousarray(array).ravel()
+        row_offsets = (np.arange(len(array), dtype=self.feature.dtype) * array.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(array), self.n_trees))
+        for _ in range(self.max_depth):
+            # sklearn compares float32 inputs against float64 thresholds, so does this
+            go_right = flat[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        return nodes
+
+    def predict_proba(self, array: np.ndarray) -> np.ndarray:
+        """
+        Returns: Class probabilities averaged over all trees, ordered as classes_
+        """
+        array = np.asarray(array, dtype=np.float32)
+        if array.ndim == 1:
+            array = array.reshape(1, -1)
+        proba = np.empty((len(array), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(array), self.chunk_size):
+            leaves = self._leaves(array[start:start + self.chunk_size])
+            proba[start:start + len(leaves)] = self.value[leaves].sum(axis=1) / self.n_trees
+        return proba
+
+    def predict(self, array: np.ndarray) -> np.ndarray:
+        """
+        Returns: Predicted class labels, same as sklearn's argmax over predict_proba
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(array), axis=1))
@@ -0,0 +1,82 @@
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from typing import Union
+
+from src.entity.estimator import MyModel
+from src.exception import MyException
+from src.logger import logging
+
+# Offset and value of the magic field of a POSIX tar header
+_TAR_MAGIC_OFFSET = 257
+_TAR_MAGIC = b"ustar"
+
+
+def is_model_archive(data: bytes) -> bool:
+    """
+    Tells a model archive written by save_model_archive apart from a pickled model.
+    """
+    return data[_TAR_MAGIC_OFFSET:_TAR_MAGIC_OFFSET + len(_TAR_MAGIC)] == _TAR_MAGIC
+
+
+def save_model_archive(model: MyModel, file_path: str) -> None:
+    """
+    Writes model.export_arrays() output as one uncompressed tar file, so it can be stored
+    and pushed like the pickled model. Members stay uncompressed so they can be memory-mapped
+    once extracted.
+    :param model: Model with compilable preprocessing
+    :param file_path: Path of the archive to write
+    """
+    try:
+        with tempfile.TemporaryDirectory() as export_dir:
+            model.export_arrays(export_dir)
+            with tarfile.open(file_path, "w", format=tarfile.USTAR_FORMAT) as archive:
+                for name in sorted(os.listdir(export_dir)):
+                    archive.add(os.path.join(export_dir, name), arcname=name)
+        logging.info(f"Saved model archive {file_path} ({os.path.getsize(file_path)} bytes)")
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def load_model_archive(archive: Union[bytes, str], extract_dir: str, mmap_mode: str = "r") -> MyModel:
+    """
+    Extracts a model archive to extract_dir and loads it with MyModel.load_arrays.
+
+    extract_dir must identify the archive content (e.g. end with the S3 ETag): a directory that
+    already exists is reused as it is, which is how all workers end up mapping the same files.
+    Extraction goes to a temporary sibling directory renamed into place, so a concurrent
+    reader never sees a partially extracted model.
+    :param archive: Archive bytes, or the path of an archive file
+    :param extract_dir: Directory the archive members are extracted to
+    :param mmap_mode: Passed to MyModel.load_arrays
+    """
+    try:
+        if not os.path.isdir(extract_dir):
+            parent_dir = os.path.dirname(os.path.abspath(extract_dir))
+            os.makedirs(parent_dir, exist_ok=True)
+            staging_dir = tempfile.mkdtemp(prefix=".extract-", dir=parent_dir)
+            try:
+                if isinstance(archive, str):
+                    tar = tarfile.open(archive, mode="r:")
+                else:
+                    tar = tarfile.open(fileobj=BytesIO(archive), mode="r:")
+                with tar:
+                    members = tar.getmembers()
+                    for member in members:
+                        if not member.isfile() or os.path.basename(member.name) != member.name:
+                            raise ValueError(f"Unexpected member {member.name!r} in model archive")
+                    tar.extractall(staging_dir, members=members)
+                os.rename(staging_dir, extract_dir)
+                logging.info(f"Extracted model archive to {extract_dir}")
+            except OSError:
+                # Another process renamed its copy into place first
+                if not os.path.isdir(extract_dir):
+                    raise
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+        return MyModel.load_arrays(extract_dir, mmap_mode=mmap_mode)
+    except Exception as e:
+        raise MyException(e, sys)
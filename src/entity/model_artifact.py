@@ -0,0 +1,162 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from src.constants import MODEL_ARTIFACT_COMPRESSION
+from src.entity.estimator import MyModel
+from src.exception import MyException
+from src.logger import logging
+
+# File layout: magic, header length (uint64 little-endian), JSON header, then one buffer per
+# array, each starting at a multiple of ALIGNMENT bytes from the start of the file
+MODEL_ARTIFACT_MAGIC = b"VIMODEL\x00"
+MODEL_ARTIFACT_FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sQ")
+
+COMPRESSIONS = ("none", "zlib", "zstd", "lz4")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _codec(compression: str):
+    """
+    Returns (compress, decompress) functions for compression. zstd and lz4 are optional
+    dependencies, imported only when used.
+    """
+    if compression == "zlib":
+        return (lambda data, level: zlib.compress(data, 6 if level is None else level),
+                lambda data, nbytes: zlib.decompress(data, bufsize=nbytes))
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("zstd model artifacts need the zstandard package") from e
+        return (lambda data, level: zstandard.ZstdCompressor(level=3 if level is None else level).compress(data),
+                lambda data, nbytes: zstandard.ZstdDecompressor().decompress(data, max_output_size=nbytes))
+    if compression == "lz4":
+        try:
+            import lz4.frame
+        except ImportError as e:
+            raise ImportError("lz4 model artifacts need the lz4 package") from e
+        return (lambda data, level: lz4.frame.compress(data, compression_level=0 if level is None else level),
+                lambda data, nbytes: lz4.frame.decompress(data))
+    raise ValueError(f"Unknown model artifact compression {compression!r}, expected one of {COMPRESSIONS}")
+
+
+def is_model_artifact(data: bytes) -> bool:
+    """
+    Tells a file written by save_model_artifact apart from other model formats by its first bytes.
+    """
+    return data[:len(MODEL_ARTIFACT_MAGIC)] == MODEL_ARTIFACT_MAGIC
+
+
+def save_model_artifact(model: MyModel, file_path: str, compression: str = MODEL_ARTIFACT_COMPRESSION,
+                        level: Optional[int] = None) -> None:
+    """
+    Writes model.to_arrays() as one versioned file: a JSON header describing every array
+    (dtype, shape, offset, sizes, CRC32 of the stored bytes) followed by the arrays as
+    aligned binary buffers. Uncompressed artifacts are memory-mapped in place on load.
+    :param model: Model with compilable preprocessing
+    :param file_path: Path of the artifact to write, replaced atomically
+    :param compression: "none", "zlib", "zstd" or "lz4", applied per buffer
+    :param level: Compression level, None for the codec's default
+    """
+    try:
+        fields, arrays = model.to_arrays()
+        compress = _codec(compression)[0] if compression != "none" else None
+
+        buffers, entries = [], []
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype.hasobject:
+                raise ValueError(f"Array {name} has dtype {array.dtype}, only numeric arrays can be stored")
+            raw = array.tobytes()
+            stored = compress(raw, level) if compress is not None else raw
+            buffers.append(stored)
+            entries.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape),
+                            "nbytes": len(raw), "stored_nbytes": len(stored), "crc32": zlib.crc32(stored)})
+
+        # Buffer offsets are relative to the data section, which starts at the first aligned
+        # position after the header
+        offset = 0
+        for entry in entries:
+            entry["offset"] = offset
+            offset = _align(offset + entry["stored_nbytes"])
+        header = {"format_version": MODEL_ARTIFACT_FORMAT_VERSION, "compression": compression,
+                  "checksum": "crc32", "alignment": ALIGNMENT, **fields, "buffers": entries}
+        header_bytes = json.dumps(header).encode()
+        data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+        tmp_path = f"{file_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as artifact_file:
+            artifact_file.write(_PREAMBLE.pack(MODEL_ARTIFACT_MAGIC, len(header_bytes)))
+            artifact_file.write(header_bytes)
+            for entry, stored in zip(entries, buffers):
+                artifact_file.write(b"\0" * (data_start + entry["offset"] - artifact_file.tell()))
+                artifact_file.write(stored)
+        os.replace(tmp_path, file_path)
+        logging.info(f"Saved model artifact {file_path} ({os.path.getsize(file_path)} bytes, "
+                     f"compression={compression})")
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def read_model_artifact_header(buffer) -> Tuple[dict, int]:
+    """
+    Returns the JSON header of an artifact and the file offset its data section starts at.
+    """
+    magic, header_length = _PREAMBLE.unpack_from(buffer, 0)
+    if magic != MODEL_ARTIFACT_MAGIC:
+        raise ValueError("Not a model artifact")
+    header = json.loads(bytes(buffer[_PREAMBLE.size:_PREAMBLE.size + header_length]))
+    if header.get("format_version", 0) > MODEL_ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Model artifact format version {header.get('format_version')} is newer than "
+                         f"supported version {MODEL_ARTIFACT_FORMAT_VERSION}")
+    return header, _align(_PREAMBLE.size + header_length)
+
+
+def load_model_artifact(source: Union[str, bytes], verify: bool = True) -> MyModel:
+    """
+    Loads a model written by save_model_artifact. From a file path, an uncompressed artifact is
+    memory-mapped read-only and the arrays point into the mapping, so loading copies nothing and
+    all processes loading the same file share its pages. Compressed buffers are decompressed
+    into process memory.
+    :param source: Path of the artifact file, or its content
+    :param verify: Check the CRC32 of every buffer, raising ValueError on a mismatch
+    """
+    try:
+        if isinstance(source, str):
+            with open(source, "rb") as artifact_file:
+                buffer = mmap.mmap(artifact_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = source
+        view = memoryview(buffer)
+        header, data_start = read_model_artifact_header(view)
+        decompress = _codec(header["compression"])[1] if header["compression"] != "none" else None
+
+        arrays: Dict[str, np.ndarray] = {}
+        for entry in header["buffers"]:
+            start = data_start + entry["offset"]
+            stored = view[start:start + entry["stored_nbytes"]]
+            if len(stored) != entry["stored_nbytes"]:
+                raise ValueError(f"Model artifact is truncated in buffer {entry['name']}")
+            if verify and zlib.crc32(stored) != entry["crc32"]:
+                raise ValueError(f"Checksum mismatch in buffer {entry['name']} of the model artifact")
+            raw = decompress(stored, entry["nbytes"]) if decompress is not None else stored
+            dtype = np.dtype(entry["dtype"])
+            arrays[entry["name"]] = np.frombuffer(raw, dtype=dtype,
+                                                  count=entry["nbytes"] // dtype.itemsize).reshape(entry["shape"])
+        model = MyModel.from_arrays(header, arrays)
+        logging.info(f"Loaded {header['model']} from model artifact (compression={header['compression']})")
+        return model
+    except Exception as e:
+        raise MyException(e, sys)
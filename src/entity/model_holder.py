@@ -0,0 +1,148 @@
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from src.constants import MODEL_REFRESH_INTERVAL_SECONDS
+from src.entity.estimator import MyModel
+from src.entity.s3_estimator import Proj1Estimator
+from src.exception import MyException
+from src.logger import logging
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    model: MyModel
+    version: str
+    loaded_at: float
+    load_duration: float
+
+
+class ModelHolder:
+    """
+    Process-wide, thread-safe holder of the production model.
+
+    The model is downloaded from S3 once per process. A daemon thread checks the S3 ETag
+    every refresh_interval seconds and swaps the model only when the ETag has changed.
+    """
+
+    _instances: Dict[Tuple[str, str], "ModelHolder"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, bucket_name: str, model_path: str,
+                 refresh_interval: int = MODEL_REFRESH_INTERVAL_SECONDS) -> None:
+        """
+        :param bucket_name: Name of the model bucket
+        :param model_path: Location of the model in the bucket
+        :param refresh_interval: Seconds between ETag checks, 0 disables background revalidation
+        """
+        self.estimator = Proj1Estimator(bucket_name=bucket_name, model_path=model_path)
+        self.refresh_interval = refresh_interval
+        self._current: Optional[LoadedModel] = None
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def get_instance(cls, bucket_name: str, model_path: str,
+                     refresh_interval: int = MODEL_REFRESH_INTERVAL_SECONDS) -> "ModelHolder":
+        """
+        Returns the shared holder for bucket_name/model_path, creating it on first use.
+        """
+        key = (bucket_name, model_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(bucket_name=bucket_name, model_path=model_path,
+                                          refresh_interval=refresh_interval)
+            return cls._instances[key]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._current is not None
+
+    @property
+    def model_version(self) -> Optional[str]:
+        current = self._current
+        return current.version if current is not None else None
+
+    @property
+    def loaded_at(self) -> Optional[float]:
+        current = self._current
+        return current.loaded_at if current is not None else None
+
+    @property
+    def load_duration(self) -> Optional[float]:
+        current = self._current
+        return current.load_duration if current is not None else None
+
+    def get_model(self) -> MyModel:
+        """
+        Returns the loaded model, loading it on first call and starting background revalidation.
+        """
+        return self.get_loaded_model().model
+
+    def get_loaded_model(self) -> LoadedModel:
+        """
+        Returns the loaded model together with its version, both from the same load.
+        """
+        current = self._current
+        if current is not None:
+            return current
+        with self._load_lock:
+            if self._current is None:
+                self._load()
+                self._start_refresh_thread()
+            return self._current
+
+    def refresh(self) -> bool:
+        """
+        Checks the S3 ETag and reloads the model if it has changed.
+        :return: True if a new model version was swapped in
+        """
+        try:
+            version = self.estimator.get_model_version()
+            if version == self.model_version:
+                return False
+            with self._load_lock:
+                if version == self.model_version:
+                    return False
+                logging.info(f"Model version changed from {self.model_version} to {version}, reloading")
+                self._load(version=version)
+            return True
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def stop(self) -> None:
+        """
+        Stops background revalidation.
+        """
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def _load(self, version: Optional[str] = None) -> None:
+        start = time.perf_counter()
+        model, version = self.estimator.load_model_with_version(version)
+        load_duration = time.perf_counter() - start
+        # Single reference assignment, readers see either the old or the new model, never a mix
+        self._current = LoadedModel(model=model, version=version, loaded_at=time.time(),
+                                    load_duration=load_duration)
+        logging.info(f"Loaded model version {version} in {load_duration:.3f}s")
+
+    def _start_refresh_thread(self) -> None:
+        if self.refresh_interval <= 0 or self._refresh_thread is not None:
+            return
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="model-holder-refresh",
+                                                daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the current model when S3 is unreachable
+                logging.warning(f"Model revalidation failed, keeping version {self.model_version}: {e}")
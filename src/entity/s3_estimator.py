@@ -1,7 +1,13 @@
 from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import MyException
 from src.entity.estimator import MyModel
+from src.entity.model_artifact import save_model_artifact
+from src.constants import MODEL_ARTIFACT_COMPRESSION
+import os
 import sys
+import tempfile
+from typing import Optional, Tuple
+import numpy as np
 from pandas import DataFrame
 
 
@@ -36,6 +42,28 @@ class Proj1Estimator:
 
         return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
 
+    def load_model_with_version(self,version:Optional[str]=None)->Tuple[MyModel,str]:
+        """
+        Load the model from the model_path together with the version (S3 ETag) actually loaded,
+        which differs from the bucket's when S3 is unreachable and a cached model is used
+        :param version: ETag of the version to load, if already known
+        :return: Model and its ETag
+        """
+        try:
+            return self.s3.load_model_with_version(self.model_path,bucket_name=self.bucket_name,version=version)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_model_version(self,)->str:
+        """
+        Get the version (S3 ETag) of the model stored at model_path
+        :return: ETag of the model object
+        """
+        try:
+            return self.s3.get_object_version(self.model_path,bucket_name=self.bucket_name)
+        except Exception as e:
+            raise MyException(e, sys)
+
     def save_model(self,from_file,remove:bool=False)->None:
         """
         Save the model to the model_path
@@ -52,6 +80,21 @@ class Proj1Estimator:
         except Exception as e:
             raise MyException(e, sys)
 
+    def save_model_artifact(self,model:MyModel,compression:str=MODEL_ARTIFACT_COMPRESSION)->None:
+        """
+        Save the model to the model_path as a single-file model artifact (see src.entity.model_artifact)
+        :param model: Trained model with compilable preprocessing
+        :param compression: Buffer compression of the artifact: none, zlib, zstd or lz4
+        :return:
+        """
+        try:
+            with tempfile.TemporaryDirectory() as export_dir:
+                artifact_file = os.path.join(export_dir,"model.vimodel")
+                save_model_artifact(model,artifact_file,compression=compression)
+                self.save_model(from_file=artifact_file)
+        except Exception as e:
+            raise MyException(e, sys)
+
 
     def predict(self,dataframe:DataFrame):
         """
@@ -63,4 +106,28 @@ class Proj1Estimator:
                 self.loaded_model = self.load_model()
             return self.loaded_model.predict(dataframe=dataframe)
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    def predict_proba(self,dataframe:DataFrame)->np.ndarray:
+        """
+        :param dataframe:
+        :return: Class probabilities ordered as the model classes
+        """
+        try:
+            if self.loaded_model is None:
+                self.loaded_model = self.load_model()
+            return self.loaded_model.predict_proba(dataframe=dataframe)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict_with_proba(self,dataframe:DataFrame)->Tuple[np.ndarray,np.ndarray]:
+        """
+        :param dataframe:
+        :return: Labels with the model's decision threshold applied and positive class probabilities
+        """
+        try:
+            if self.loaded_model is None:
+                self.loaded_model = self.load_model()
+            return self.loaded_model.predict_with_proba(dataframe=dataframe)
+        except Exception as e:
+            raise MyException(e, sys)
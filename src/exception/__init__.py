@@ -41,4 +41,17 @@ class MyException(Exception):
         """
         Returns the string representation of the error message.
         """
-        return self.error_message
\ No newline at end of file
+        return self.error_message
+
+    def __reduce__(self):
+        """
+        Pickles the formatted message only, so errors raised in worker processes reach the parent.
+        """
+        return (_restore_exception, (type(self), self.error_message))
+
+
+def _restore_exception(cls, error_message: str) -> MyException:
+    exception = cls.__new__(cls)
+    Exception.__init__(exception, error_message)
+    exception.error_message = error_message
+    return exception
@@ -1,6 +1,12 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from from_root import from_root
 from datetime import datetime
 
@@ -10,34 +16,179 @@ LOG_FILE = f"{datetime.now().strftime('%m_%d_%y_%H_%M_%S')}.log"
 MAX_LOG_SIZE = 5*1024*1024 #5MB
 BACKUP_COUNT = 5 # Number of backup log files to keep
 
+# Logging behaviour, selected by environment variables
+LOG_MODE = os.getenv("LOG_MODE", "sync") # "sync" writes on the calling thread, "queue" in a background listener
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text") # "text" or "json"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "INFO")
+LOG_FILE_ENABLED = os.getenv("LOG_FILE_ENABLED", "1") == "1"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "") # per-logger levels, e.g. "botocore=WARNING,pymongo=INFO"
+# Both only apply to records logged with extra={"hot_path": True}
+LOG_RATE_LIMIT_PER_SECOND = float(os.getenv("LOG_RATE_LIMIT_PER_SECOND", 0)) # per call site, 0 disables
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0)) # fraction of sub-WARNING hot-path records kept
+
 log_dir_path = os.path.join(from_root(),LOG_DIR)
 os.makedirs(log_dir_path, exist_ok=True)
 log_file_path = os.path.join(log_dir_path,LOG_FILE)
 
+_queue_listener = None
+
+
+class HotPathFilter(logging.Filter):
+    """
+    Thins out per-request records, those logged with extra={"hot_path": True} below WARNING:
+    keeps a sample_rate fraction of them and at most rate_limit records per second from each
+    call site (file and line). Other records, warnings and errors always pass.
+    """
+
+    def __init__(self, rate_limit: float = 0, sample_rate: float = 1.0):
+        super().__init__()
+        self.rate_limit = rate_limit
+        self.sample_rate = sample_rate
+        # Call site -> (window start, records passed in the window)
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, "hot_path", False):
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.dropped += 1
+            return False
+        if self.rate_limit > 0:
+            site = (record.pathname, record.lineno)
+            now = time.monotonic()
+            with self._lock:
+                window_start, passed = self._windows.get(site, (now, 0))
+                if now - window_start >= 1.0:
+                    window_start, passed = now, 0
+                if passed >= self.rate_limit:
+                    self.dropped += 1
+                    return False
+                self._windows[site] = (window_start, passed + 1)
+        return True
+
+
+class _ThreadQueueHandler(QueueHandler):
+    """
+    QueueHandler for a listener thread in the same process: records are enqueued as they
+    are, the message is formatted by the listener instead of on the calling thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _FanOutHandler(logging.Handler):
+    """
+    Passes every record that gets through its own filters to each of handlers whose level
+    it meets, so a filter added here sees each record once however many handlers emit it.
+    """
+
+    def __init__(self, handlers: list):
+        super().__init__()
+        self.handlers = handlers
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if not self.filter(record):
+            return False
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _parse_levels(levels: str) -> dict:
+    pairs = (item.split("=", 1) for item in levels.split(",") if "=" in item)
+    return {name.strip(): level.strip().upper() for name, level in pairs}
+
+
 def configure_logger():
     """
     Configures logging with a rotating file handler and a console handler.
+    In "queue" mode the handlers run in a background listener thread and the calling
+    thread only enqueues the record.
     """
+    global _queue_listener
+
     # Create a custom logger
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    
+    logger.setLevel(LOG_LEVEL.upper())
+
     # Formatter
-    formatter = logging.Formatter("[%(asctime)s] %(name)s - %(levelname)s - %(message)s")
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("[%(asctime)s] %(name)s - %(levelname)s - %(message)s")
+
+    handlers = []
 
     # File Handler with rotation
-    file_handler = RotatingFileHandler(log_file_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.DEBUG)
-    
+    if LOG_FILE_ENABLED:
+        file_handler = RotatingFileHandler(log_file_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
+        file_handler.setFormatter(formatter)
+        file_handler.setLevel(logging.DEBUG)
+        handlers.append(file_handler)
+
     # Console Handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
-    
+    console_handler.setLevel(LOG_CONSOLE_LEVEL.upper())
+    handlers.append(console_handler)
+
+    hot_path_filter = None
+    if LOG_RATE_LIMIT_PER_SECOND > 0 or LOG_SAMPLE_RATE < 1.0:
+        hot_path_filter = HotPathFilter(rate_limit=LOG_RATE_LIMIT_PER_SECOND, sample_rate=LOG_SAMPLE_RATE)
+
     # Adding handler to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    if LOG_MODE == "queue":
+        queue_handler = _ThreadQueueHandler(queue.SimpleQueue())
+        if hot_path_filter is not None:
+            queue_handler.addFilter(hot_path_filter)
+        _queue_listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _queue_listener.start()
+        # Flush the records still queued when the process exits
+        atexit.register(_queue_listener.stop)
+        logger.addHandler(queue_handler)
+    elif hot_path_filter is not None:
+        # Filter once before the fan-out, so records are sampled and rate-counted once, not per handler
+        fan_out_handler = _FanOutHandler(handlers)
+        fan_out_handler.addFilter(hot_path_filter)
+        logger.addHandler(fan_out_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    # Records no handler would emit are dropped before a LogRecord is even created
+    logger.setLevel(max(logger.level, min(handler.level for handler in handlers)))
+
+    # Per-logger levels, mostly to quiet chatty libraries
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
 configure_logger()
-    
\ No newline at end of file
@@ -0,0 +1,237 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.constants import BATCH_SCORING_OUTPUT_COLLECTION_SUFFIX
+from src.entity.artifact_entity import BatchScoringArtifact
+from src.entity.config_entity import BatchScoringConfig, VehiclePredictorConfig
+from src.exception import MyException
+from src.logger import logging
+from src.pipeline.inference_executor import _init_worker, _worker_call
+
+
+class BatchScoringPipeline:
+    """
+    Scores every document of a MongoDB collection with the production model.
+
+    Documents are read in _id order through one cursor and grouped into partitions of
+    partition_rows documents. Partitions are scored in a process pool whose workers load
+    the model once. Results are written in partition order, and after each partition the
+    last scored _id is checkpointed so an interrupted run resumes where it stopped.
+
+    A partition whose scoring fails either stops the run (on_error="fail"), leaving the
+    checkpoint at the last good partition so a resumed run retries it, or is recorded with its
+    _id bounds under failed_partitions in the checkpoint and skipped (on_error="skip").
+    A crashed worker process always stops the run.
+    """
+
+    def __init__(self, batch_scoring_config: BatchScoringConfig = BatchScoringConfig()):
+        """
+        :param batch_scoring_config: Configuration for batch scoring
+        """
+        try:
+            self.batch_scoring_config = batch_scoring_config
+            if batch_scoring_config.output_format not in ("parquet", "mongo"):
+                raise ValueError(f"Unknown output format: {batch_scoring_config.output_format}")
+            if batch_scoring_config.on_error not in ("fail", "skip"):
+                raise ValueError(f"Unknown on_error policy: {batch_scoring_config.on_error}")
+            self.mongo_client = MongoDBClient()
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def read_checkpoint(self) -> dict:
+        """
+        Returns the checkpoint of the last interrupted run, or an empty checkpoint.
+        """
+        try:
+            if os.path.exists(self.batch_scoring_config.checkpoint_file_path):
+                with open(self.batch_scoring_config.checkpoint_file_path) as checkpoint_file:
+                    checkpoint = json.load(checkpoint_file)
+                checkpoint.setdefault("failed_partitions", [])
+                return checkpoint
+            return {"last_id": None, "partitions_scored": 0, "rows_scored": 0, "failed_partitions": []}
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def write_checkpoint(self, checkpoint: dict) -> None:
+        try:
+            checkpoint_file_path = self.batch_scoring_config.checkpoint_file_path
+            os.makedirs(os.path.dirname(checkpoint_file_path), exist_ok=True)
+            # Write-then-rename so a crash never leaves a truncated checkpoint
+            with open(checkpoint_file_path + ".tmp", "w") as checkpoint_file:
+                json.dump(checkpoint, checkpoint_file)
+            os.replace(checkpoint_file_path + ".tmp", checkpoint_file_path)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def reset_output(self) -> None:
+        """
+        Removes the checkpoint and the Parquet part files of a previous run, so a run from the
+        start does not leave parts of the previous run next to its own.
+        """
+        try:
+            checkpoint_file_path = self.batch_scoring_config.checkpoint_file_path
+            if os.path.exists(checkpoint_file_path):
+                os.remove(checkpoint_file_path)
+            if self.batch_scoring_config.output_format == "parquet":
+                part_file_paths = glob.glob(os.path.join(self.batch_scoring_config.batch_scoring_dir,
+                                                         "part-*.parquet"))
+                for part_file_path in part_file_paths:
+                    os.remove(part_file_path)
+                if part_file_paths:
+                    logging.info(f"Removed {len(part_file_paths)} part files of the previous run from "
+                                 f"{self.batch_scoring_config.batch_scoring_dir}")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def iter_partitions(self, last_id: str):
+        """
+        Yields DataFrames of partition_rows documents with _id greater than last_id, in _id order.
+        """
+        try:
+            collection = self.mongo_client.database[self.batch_scoring_config.collection_name]
+            query = {"_id": {"$gt": ObjectId(last_id)}} if last_id else {}
+            cursor = collection.find(query).sort("_id", 1).batch_size(self.batch_scoring_config.cursor_batch_size)
+            documents = []
+            for document in cursor:
+                documents.append(document)
+                if len(documents) >= self.batch_scoring_config.partition_rows:
+                    yield self._to_dataframe(documents)
+                    documents = []
+            if documents:
+                yield self._to_dataframe(documents)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def _to_dataframe(documents: list) -> pd.DataFrame:
+        df = pd.DataFrame(documents)
+        df["_id"] = df["_id"].astype(str)
+        df.replace({"na": np.nan}, inplace=True)
+        return df
+
+    def write_partition(self, partition_no: int, partition_df: pd.DataFrame, predictions: list,
+                        probabilities: list) -> None:
+        """
+        Writes the predictions of one partition to a Parquet file or to the output collection.
+        """
+        try:
+            result_df = pd.DataFrame({"_id": partition_df["_id"], "prediction": predictions,
+                                      "probability": probabilities})
+            if "id" in partition_df.columns:
+                result_df.insert(1, "id", partition_df["id"].values)
+
+            if self.batch_scoring_config.output_format == "parquet":
+                os.makedirs(self.batch_scoring_config.batch_scoring_dir, exist_ok=True)
+                file_path = os.path.join(self.batch_scoring_config.batch_scoring_dir,
+                                         f"part-{partition_no:06d}.parquet")
+                result_df.to_parquet(file_path, index=False)
+            else:
+                # Upserts keyed on the source _id make re-scoring a partition after a crash idempotent
+                collection = self.mongo_client.database[self.batch_scoring_config.output_collection_name]
+                requests = [UpdateOne({"_id": ObjectId(record.pop("_id"))}, {"$set": record}, upsert=True)
+                            for record in result_df.to_dict("records")]
+                collection.bulk_write(requests, ordered=False)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def run_pipeline(self, resume: bool = True) -> BatchScoringArtifact:
+        """
+        This method of BatchScoringPipeline class is responsible for scoring the complete collection
+        """
+        logging.info("Entered the run_pipeline method of BatchScoringPipeline class")
+        try:
+            if not resume:
+                self.reset_output()
+            checkpoint = self.read_checkpoint()
+            if checkpoint["last_id"]:
+                logging.info(f"Resuming batch scoring after _id {checkpoint['last_id']}")
+
+            predictor_config = VehiclePredictorConfig(model_file_path=self.batch_scoring_config.model_file_path,
+                                                      model_bucket_name=self.batch_scoring_config.model_bucket_name,
+                                                      model_refresh_interval=0, prediction_cache_max_size=0)
+            max_in_flight = 2 * self.batch_scoring_config.max_workers
+            pending = deque()
+            with ProcessPoolExecutor(max_workers=self.batch_scoring_config.max_workers,
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(predictor_config,)) as executor:
+
+                def complete_oldest():
+                    partition_df, future = pending.popleft()
+                    try:
+                        predictions, probabilities = future.result()
+                    except Exception as e:
+                        first_id, last_id = partition_df["_id"].iloc[0], partition_df["_id"].iloc[-1]
+                        if self.batch_scoring_config.on_error == "fail" or isinstance(e, BrokenProcessPool):
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            raise RuntimeError(f"Scoring the partition of _id {first_id} to {last_id} failed, "
+                                               f"a resumed run continues after _id {checkpoint['last_id']}: {e}")
+                        logging.error(f"Skipped the partition of _id {first_id} to {last_id}: {e}")
+                        checkpoint["failed_partitions"].append({"first_id": first_id, "last_id": last_id,
+                                                                "rows": len(partition_df), "error": f"{e}"})
+                        checkpoint["last_id"] = last_id
+                        self.write_checkpoint(checkpoint)
+                        return
+                    self.write_partition(checkpoint["partitions_scored"], partition_df, predictions, probabilities)
+                    checkpoint["last_id"] = partition_df["_id"].iloc[-1]
+                    checkpoint["partitions_scored"] += 1
+                    checkpoint["rows_scored"] += len(partition_df)
+                    self.write_checkpoint(checkpoint)
+                    logging.info(f"Scored partition {checkpoint['partitions_scored']}, "
+                                 f"{checkpoint['rows_scored']} rows in total")
+
+                for partition_df in self.iter_partitions(checkpoint["last_id"]):
+                    pending.append((partition_df, executor.submit(_worker_call, "predict_raw_batch", partition_df)))
+                    # Bounded read-ahead keeps memory at a few partitions regardless of collection size
+                    if len(pending) >= max_in_flight:
+                        complete_oldest()
+                while pending:
+                    complete_oldest()
+
+            output_location = (self.batch_scoring_config.batch_scoring_dir
+                               if self.batch_scoring_config.output_format == "parquet"
+                               else self.batch_scoring_config.output_collection_name)
+            batch_scoring_artifact = BatchScoringArtifact(rows_scored=checkpoint["rows_scored"],
+                                                          partitions_scored=checkpoint["partitions_scored"],
+                                                          output_location=output_location,
+                                                          partitions_failed=len(checkpoint["failed_partitions"]))
+            logging.info(f"Batch scoring artifact: {batch_scoring_artifact}")
+            logging.info("Exited the run_pipeline method of BatchScoringPipeline class")
+            return batch_scoring_artifact
+        except Exception as e:
+            raise MyException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a MongoDB collection with the production model")
+    parser.add_argument("--collection", default=BatchScoringConfig.collection_name)
+    parser.add_argument("--output", choices=["parquet", "mongo"], default=BatchScoringConfig.output_format)
+    parser.add_argument("--output-collection", default=None)
+    parser.add_argument("--workers", type=int, default=BatchScoringConfig.max_workers)
+    parser.add_argument("--no-resume", action="store_true", help="Ignore the checkpoint and score from the start")
+    parser.add_argument("--on-error", choices=["fail", "skip"], default=BatchScoringConfig.on_error,
+                        help="Stop at a failing partition, or record it in the checkpoint and score the rest")
+    args = parser.parse_args()
+
+    batch_scoring_dir = os.path.join(os.path.dirname(BatchScoringConfig.batch_scoring_dir), args.collection)
+    config = BatchScoringConfig(collection_name=args.collection,
+                                output_format=args.output,
+                                output_collection_name=args.output_collection or args.collection + BATCH_SCORING_OUTPUT_COLLECTION_SUFFIX,
+                                batch_scoring_dir=batch_scoring_dir,
+                                checkpoint_file_path=os.path.join(batch_scoring_dir,
+                                                                  os.path.basename(BatchScoringConfig.checkpoint_file_path)),
+                                max_workers=args.workers,
+                                on_error=args.on_error)
+    print(BatchScoringPipeline(batch_scoring_config=config).run_pipeline(resume=not args.no_resume))
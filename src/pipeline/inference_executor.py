@@ -0,0 +1,148 @@
+import asyncio
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.exception import MyException
+from src.logger import logging
+from src.pipeline.prediction_pipeline import VehicleDataClassifier
+
+# Classifier of a process-mode worker, created by _init_worker or, if that failed, by the first call
+_worker_classifier: Optional[VehicleDataClassifier] = None
+_worker_config: Optional[VehiclePredictorConfig] = None
+
+
+def _init_worker(prediction_pipeline_config: VehiclePredictorConfig) -> None:
+    """
+    Initializer of process-mode workers, loads and warms up the production model before the first task.
+    """
+    global _worker_classifier, _worker_config
+    _worker_config = prediction_pipeline_config
+    try:
+        _worker_classifier = VehicleDataClassifier(prediction_pipeline_config=prediction_pipeline_config)
+        _worker_classifier.warm_up()
+    except Exception as e:
+        # The model is retried on first call; the worker must not die or the pool breaks
+        logging.error(f"Inference worker could not preload the model: {e}")
+
+
+def _worker_call(method_name: str, *args, **kwargs):
+    """
+    Runs VehicleDataClassifier.<method_name> in a process-mode worker. Errors are raised as
+    MyException, which pickles, so a failing call fails only its own future and not the pool.
+    """
+    global _worker_classifier
+    try:
+        if _worker_classifier is None:
+            _worker_classifier = VehicleDataClassifier(prediction_pipeline_config=_worker_config)
+        return getattr(_worker_classifier, method_name)(*args, **kwargs)
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+class InferenceExecutor:
+    """
+    Runs blocking VehicleDataClassifier calls off the event loop.
+
+    In "thread" mode calls share the process-wide model. In "process" mode each worker
+    process loads its own model copy at startup, so CPU-bound scoring uses all cores.
+    At most max_workers + max_queue_size calls are in flight; further calls are rejected
+    immediately, and callers stop waiting after timeout seconds.
+    """
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()) -> None:
+        """
+        :param prediction_pipeline_config: Configuration for prediction and the executor
+        """
+        if prediction_pipeline_config.executor_mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor mode: {prediction_pipeline_config.executor_mode}")
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.mode = prediction_pipeline_config.executor_mode
+        self.max_workers = prediction_pipeline_config.executor_max_workers
+        self.max_in_flight = self.max_workers + prediction_pipeline_config.executor_max_queue_size
+        self.timeout = prediction_pipeline_config.executor_timeout
+        self._executor: Optional[Executor] = None
+        self._classifier: Optional[VehicleDataClassifier] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so the app can start without AWS credentials in the environment
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_worker,
+                                                     initargs=(self.prediction_pipeline_config,))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="inference")
+            logging.info(f"Started {self.mode} inference executor with {self.max_workers} workers")
+        return self._executor
+
+    @property
+    def created_classifier(self) -> Optional[VehicleDataClassifier]:
+        # The classifier if a call has already created it, None before that and in "process" mode
+        return self._classifier
+
+    @property
+    def classifier(self) -> VehicleDataClassifier:
+        if self._classifier is None:
+            self._classifier = VehicleDataClassifier(prediction_pipeline_config=self.prediction_pipeline_config)
+        return self._classifier
+
+    async def run(self, method_name: str, *args, **kwargs):
+        """
+        Calls VehicleDataClassifier.<method_name>(*args, **kwargs) in the executor and awaits the result.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                raise RuntimeError(f"Inference queue is full ({self._in_flight} requests in flight)")
+            self._in_flight += 1
+        try:
+            executor = self.executor
+            if self.mode == "process":
+                future = executor.submit(_worker_call, method_name, *args, **kwargs)
+            else:
+                future = executor.submit(getattr(self.classifier, method_name), *args, **kwargs)
+        except Exception as e:
+            self._release()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(executor)
+            raise MyException(e, sys)
+        # The slot is freed when the work finishes, not when the caller gives up waiting
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Inference did not complete within {self.timeout}s")
+        except BrokenProcessPool:
+            # A worker died; the next call starts a new pool instead of failing forever
+            self._discard_executor(executor)
+            raise
+
+    def _discard_executor(self, executor: Executor) -> None:
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        logging.error("Inference worker pool broke, starting a new one on the next call")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
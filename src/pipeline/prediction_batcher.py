@@ -0,0 +1,196 @@
+import asyncio
+import sys
+import time
+from typing import List, Optional, Set, Tuple
+
+import pandas as pd
+from pandas import DataFrame
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.config_entity import VehiclePredictorConfig
+from src.exception import MyException
+from src.logger import logging
+from src.pipeline.inference_executor import InferenceExecutor
+
+
+class PredictionQueueFull(Exception):
+    def __init__(self, queue_size: int):
+        super().__init__(f"Prediction queue is full ({queue_size} requests waiting)")
+        self.queue_size = queue_size
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-record predictions into one vectorized model call.
+
+    Requests arriving within micro_batch_window_ms of the first queued request, up to
+    micro_batch_max_size rows, are concatenated and scored together. Up to one batch per
+    executor worker is scored at a time; while all of them are busy new requests keep queueing,
+    so batches grow with load. When micro_batch_max_queue_size requests are already waiting,
+    predict() raises PredictionQueueFull instead of queueing.
+
+    Each request is validated and coerced to numeric features before it is queued, so a
+    malformed request fails on its own. If a batch still fails, its requests are scored one at
+    a time and only the failing ones get the exception.
+    """
+
+    def __init__(self, inference_executor: InferenceExecutor,
+                 prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()) -> None:
+        """
+        :param inference_executor: Executor running the vectorized model calls off the event loop
+        :param prediction_pipeline_config: Configuration for prediction and micro-batching
+        """
+        self.inference_executor = inference_executor
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.window = prediction_pipeline_config.micro_batch_window_ms / 1000
+        self.max_batch_size = prediction_pipeline_config.micro_batch_max_size
+        self.max_queue_size = prediction_pipeline_config.micro_batch_max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self._worker: Optional[asyncio.Task] = None
+
+        self.request_count = 0
+        self.batch_count = 0
+        self.batch_size_sum = 0
+        self.batch_size_max = 0
+        self.queue_wait_sum = 0.0
+        self.queue_wait_max = 0.0
+
+    async def predict(self, dataframe: DataFrame):
+        """
+        Queues the rows of dataframe for the next batch and waits for their predictions.
+        Returns: Predicted labels and positive class probabilities for the rows of dataframe, in order,
+                 and the version of the model that scored them
+        """
+        dataframe = self.validate(dataframe)
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            # One batch in flight per executor worker
+            self._slots = asyncio.Semaphore(self.inference_executor.max_workers)
+            self._worker = asyncio.create_task(self._run())
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((dataframe, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise PredictionQueueFull(self._queue.qsize())
+        return await future
+
+    @staticmethod
+    def validate(dataframe: DataFrame) -> DataFrame:
+        """
+        Returns the model feature columns of dataframe as numbers, in training order.
+        Raises MyException naming the column when a feature is missing, not numeric or empty.
+        """
+        try:
+            missing_columns = [col for col in MODEL_FEATURE_COLUMNS if col not in dataframe.columns]
+            if missing_columns:
+                raise ValueError(f"Missing feature columns: {missing_columns}")
+            columns = {}
+            for col in MODEL_FEATURE_COLUMNS:
+                try:
+                    columns[col] = pd.to_numeric(dataframe[col])
+                except (TypeError, ValueError):
+                    raise ValueError(f"Feature {col} is not numeric: {dataframe[col].tolist()}")
+                if columns[col].isna().any():
+                    raise ValueError(f"Feature {col} is missing a value")
+            return DataFrame(columns, index=dataframe.index)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_stats(self) -> dict:
+        """
+        Returns batch-size and queue-wait statistics collected since startup.
+        """
+        return {
+            "requests": self.request_count,
+            "batches": self.batch_count,
+            "batch_size_mean": self.batch_size_sum / self.batch_count if self.batch_count else 0.0,
+            "batch_size_max": self.batch_size_max,
+            "queue_wait_mean_ms": 1000 * self.queue_wait_sum / self.request_count if self.request_count else 0.0,
+            "queue_wait_max_ms": 1000 * self.queue_wait_max,
+        }
+
+    async def _collect_batch(self) -> List[Tuple[DataFrame, asyncio.Future, float]]:
+        batch = [await self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for a free worker before collecting, so requests queued meanwhile join the next batch
+            await self._slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._score_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _score_batch(self, batch: List[Tuple[DataFrame, asyncio.Future, float]]) -> None:
+        try:
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                wait = started - enqueued
+                self.queue_wait_sum += wait
+                self.queue_wait_max = max(self.queue_wait_max, wait)
+            rows = sum(len(dataframe) for dataframe, _, _ in batch)
+            self.request_count += len(batch)
+            self.batch_count += 1
+            self.batch_size_sum += rows
+            self.batch_size_max = max(self.batch_size_max, rows)
+
+            try:
+                batch_df = pd.concat([dataframe for dataframe, _, _ in batch], ignore_index=True)
+                predictions, probabilities, model_version = await self.inference_executor.run(
+                    "predict_with_proba", batch_df, return_version=True)
+                offset = 0
+                for dataframe, future, _ in batch:
+                    if not future.done():
+                        future.set_result((predictions[offset:offset + len(dataframe)],
+                                           probabilities[offset:offset + len(dataframe)], model_version))
+                    offset += len(dataframe)
+            except Exception as e:
+                logging.error(f"Micro-batch of {rows} rows failed: {e}")
+                if len(batch) > 1 and not isinstance(e, (TimeoutError, RuntimeError)):
+                    # Re-score one request at a time so only the requests that fail get the exception
+                    await self._run_one_by_one(batch)
+                else:
+                    self._fail(batch, e)
+        finally:
+            self._slots.release()
+
+    async def _run_one_by_one(self, batch: List[Tuple[DataFrame, asyncio.Future, float]]) -> None:
+        for index, (dataframe, future, _) in enumerate(batch):
+            try:
+                result = await self.inference_executor.run("predict_with_proba", dataframe, return_version=True)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                logging.error(f"Request of {len(dataframe)} rows failed: {e}")
+                if isinstance(e, (TimeoutError, RuntimeError)):
+                    # The executor is overloaded or stuck, the remaining requests would fail the same way
+                    self._fail(batch[index:], e)
+                    return
+                self._fail([batch[index]], e)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[DataFrame, asyncio.Future, float]], e: Exception) -> None:
+        error = e if isinstance(e, (MyException, TimeoutError, RuntimeError)) else MyException(e, sys)
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
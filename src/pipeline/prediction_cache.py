@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class PredictionCache:
+    """
+    Bounded, thread-safe LRU cache of predictions keyed by model version and feature values.
+
+    Entries expire after ttl seconds and the least recently used entry is evicted once
+    max_size entries are stored. All entries are dropped as soon as a lookup or write is made
+    with a model version loaded after the one the entries were computed with. Calls with a
+    model loaded earlier, from requests still running on the previous model, neither read nor
+    write the cache, so they cannot flip it back to the previous version.
+    """
+
+    _instances: Dict[Tuple[str, str], "PredictionCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """
+        :param max_size: Maximum number of cached predictions
+        :param ttl: Seconds after which a cached prediction expires
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[object, float]]" = OrderedDict()
+        self._model_version: Optional[str] = None
+        self._model_loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_calls = 0
+
+    @classmethod
+    def get_instance(cls, bucket_name: str, model_path: str, max_size: int, ttl: float) -> "PredictionCache":
+        """
+        Returns the shared cache for the model at bucket_name/model_path, creating it on first use.
+        """
+        key = (bucket_name, model_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(max_size=max_size, ttl=ttl)
+            return cls._instances[key]
+
+    @staticmethod
+    def make_key(features) -> Tuple[float, ...]:
+        """
+        Canonical key of one feature row: every value as float, so 1, 1.0 and "1" share an entry.
+        """
+        return tuple(float(value) for value in features)
+
+    def get_many(self, model_version: str, keys: List[Hashable],
+                 model_loaded_at: Optional[float] = None) -> List[Optional[object]]:
+        """
+        Returns the cached prediction of every key, None for misses.
+        :param model_loaded_at: When the model of model_version was loaded, orders model versions
+        """
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            if not self._check_version(model_version, model_loaded_at):
+                self.misses += len(keys)
+                return [None] * len(keys)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[1] < now:
+                    if entry is not None:
+                        del self._entries[key]
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results.append(entry[0])
+        return results
+
+    def put_many(self, model_version: str, keys: List[Hashable], values: List[object],
+                 model_loaded_at: Optional[float] = None) -> None:
+        """
+        Stores predictions computed with model_version, unless a later loaded model is cached.
+        :param model_loaded_at: When the model of model_version was loaded, orders model versions
+        """
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if not self._check_version(model_version, model_loaded_at):
+                return
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_calls": self.stale_calls,
+            "model_version": self._model_version,
+        }
+
+    def _check_version(self, model_version: str, model_loaded_at: Optional[float]) -> bool:
+        """
+        Switches the cache to model_version if its model was loaded after the cached one.
+        Caller holds self._lock.
+        :return: False if the call comes from a model loaded before the cached one
+        """
+        if model_loaded_at is not None and self._model_loaded_at is not None and \
+                model_loaded_at < self._model_loaded_at:
+            self.stale_calls += 1
+            return False
+        if model_version != self._model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model_version = model_version
+        if model_loaded_at is not None:
+            self._model_loaded_at = model_loaded_at
+        return True
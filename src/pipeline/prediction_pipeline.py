@@ -1,10 +1,20 @@
 import sys
+import time
+from typing import Dict, List, Tuple
+from src.components.data_transformation import DataTransformation
+from src.constants import MODEL_FEATURE_COLUMNS, WARM_UP_BATCH_SIZE
 from src.entity.config_entity import VehiclePredictorConfig
-from src.entity.s3_estimator import Proj1Estimator
+from src.entity.model_holder import LoadedModel, ModelHolder
+from src.pipeline.prediction_cache import PredictionCache
 from src.exception import MyException
 from src.logger import logging
+from src.utils.metrics import PREDICTION_STAGE_SECONDS
 from pandas import DataFrame
+import numpy as np
+import pandas as pd
 
+_DATAFRAME_BUILD_SECONDS = PREDICTION_STAGE_SECONDS.labels("dataframe_build")
+_MODEL_FETCH_SECONDS = PREDICTION_STAGE_SECONDS.labels("model_fetch")
 
 class VehicleData:
     def __init__(self,
@@ -43,8 +53,9 @@ class VehicleData:
         This function returns a DataFrame from USvisaData class input
         """
         try:
-            vehicle_input_dict = self.get_vehicle_data_as_dict()
-            return DataFrame(vehicle_input_dict)
+            with _DATAFRAME_BUILD_SECONDS.time():
+                vehicle_input_dict = self.get_vehicle_data_as_dict()
+                return DataFrame(vehicle_input_dict)
         except Exception as e:
             raise MyException(e,sys)
     
@@ -52,7 +63,7 @@ class VehicleData:
         """
         This function returns a dictionary from VehicleData class input
         """
-        logging.info("Entered get_vehicle_data_as_dict method as VehicleData class")
+        logging.info("Entered get_vehicle_data_as_dict method as VehicleData class", extra={"hot_path": True})
         try:
             input_data = {
                 "Gender" : [self.Gender],
@@ -67,13 +78,85 @@ class VehicleData:
                 "Vehicle_Age_gt_2_Years" : [self.Vehicle_Age_gt_2_Years],
                 "Vehicle_Damage_Yes" : [self.Vehicle_Damage_Yes]
             }
-            logging.info("Created vehicle data dict")
-            logging.info("Exited get_vehicle_data_as_dict method as VehicleData class")
+            logging.info("Created vehicle data dict", extra={"hot_path": True})
+            logging.info("Exited get_vehicle_data_as_dict method as VehicleData class", extra={"hot_path": True})
             return input_data
         except Exception as e:
             raise MyException(e,sys)
     
 
+class VehicleBatchData:
+    def __init__(self, dataframe: DataFrame):
+        """
+        Vehicle Batch Data constructor
+        Input: DataFrame holding the model features of many vehicles, one row per vehicle
+        """
+        try:
+            missing_columns = [col for col in MODEL_FEATURE_COLUMNS if col not in dataframe.columns]
+            if missing_columns:
+                raise ValueError(f"Missing feature columns: {missing_columns}")
+            self.dataframe = dataframe
+        except Exception as e:
+            raise MyException(e,sys)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "VehicleBatchData":
+        """
+        Builds the batch from a list of {feature: value} records
+        """
+        return cls(DataFrame.from_records(records))
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List]) -> "VehicleBatchData":
+        """
+        Builds the batch from {feature: [values]} columnar arrays of equal length
+        """
+        return cls(DataFrame(columns))
+
+    def get_vehicle_input_data_frame(self) -> DataFrame:
+        """
+        This function returns the batch as a DataFrame with the model feature columns in training order
+        """
+        try:
+            return self.dataframe[MODEL_FEATURE_COLUMNS]
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def __len__(self) -> int:
+        return len(self.dataframe)
+
+
+class RawVehicleData:
+    def __init__(self, dataframe: DataFrame, data_transformation: DataTransformation = None):
+        """
+        Raw Vehicle Data constructor
+        Input: DataFrame in the raw collection layout (Gender as Male/Female, Vehicle_Age and
+               Vehicle_Damage as categories), one row per vehicle
+        """
+        try:
+            self.dataframe = dataframe
+            self.data_transformation = data_transformation or DataTransformation()
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def get_vehicle_input_data_frame(self) -> DataFrame:
+        """
+        This function applies the custom transformations of DataTransformation and returns
+        the model feature columns in training order
+        """
+        try:
+            df = self.dataframe.drop(columns=["_id", "id", "Response"], errors="ignore")
+            df = self.data_transformation._map_gender_columns(df)
+            # Fixed levels keep the dummy columns identical for every chunk of a stream
+            for col, levels in self.data_transformation._schema_config["categorical_levels"].items():
+                df[col] = pd.Categorical(df[col], categories=levels)
+            df = self.data_transformation._create_dummy_columns(df)
+            df = self.data_transformation._rename_columns(df)
+            return df[MODEL_FEATURE_COLUMNS]
+        except Exception as e:
+            raise MyException(e,sys)
+
+
 class VehicleDataClassifier:
     def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()) -> None:
         """
@@ -81,6 +164,20 @@ class VehicleDataClassifier:
         """
         try:
             self.prediction_pipeline_config = prediction_pipeline_config
+            self.model_holder = ModelHolder.get_instance(
+                bucket_name = self.prediction_pipeline_config.model_bucket_name,
+                model_path = self.prediction_pipeline_config.model_file_path,
+                refresh_interval = self.prediction_pipeline_config.model_refresh_interval
+            )
+            self.data_transformation = None
+            self.prediction_cache = None
+            if self.prediction_pipeline_config.prediction_cache_max_size > 0:
+                self.prediction_cache = PredictionCache.get_instance(
+                    bucket_name = self.prediction_pipeline_config.model_bucket_name,
+                    model_path = self.prediction_pipeline_config.model_file_path,
+                    max_size = self.prediction_pipeline_config.prediction_cache_max_size,
+                    ttl = self.prediction_pipeline_config.prediction_cache_ttl
+                )
         except Exception as e:
             raise MyException(e,sys)
     
@@ -90,12 +187,118 @@ class VehicleDataClassifier:
         Returns: Prediction in string format
         """
         try:
-            logging.info("Entered predict method of VehicleDataClassifier class.")
-            model = Proj1Estimator(
-                bucket_name = self.prediction_pipeline_config.model_bucket_name,
-                model_path = self.prediction_pipeline_config.model_file_path
-            )
-            result = model.predict(dataframe)
-            return result
+            logging.info("Entered predict method of VehicleDataClassifier class.", extra={"hot_path": True})
+            return self.predict_with_proba(dataframe)[0]
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def predict_with_proba(self, dataframe: DataFrame, return_version: bool = False) -> Tuple[np.ndarray, ...]:
+        """
+        This is the method of VehicleDataClassifier
+        :param return_version: Also return the version of the model that scored the rows
+        Returns: Predicted labels (with the model's decision threshold) and positive class
+                 probabilities, both from one forest pass, and the model version if return_version
+        """
+        try:
+            with _MODEL_FETCH_SECONDS.time():
+                loaded_model = self.model_holder.get_loaded_model()
+            if self.prediction_cache is None:
+                predictions, probabilities = loaded_model.model.predict_with_proba(dataframe)
+            else:
+                predictions, probabilities = self._predict_cached(loaded_model, dataframe)
+            if return_version:
+                return predictions, probabilities, loaded_model.version
+            return predictions, probabilities
         except Exception as e:
-            raise MyException(e,sys)
\ No newline at end of file
+            raise MyException(e,sys)
+
+    def _predict_cached(self, loaded_model: LoadedModel, dataframe: DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Serves rows from the prediction cache and scores only the misses, in one model call.
+        """
+        keys = [PredictionCache.make_key(row) for row in dataframe[MODEL_FEATURE_COLUMNS].itertuples(index=False)]
+        results = self.prediction_cache.get_many(loaded_model.version, keys, loaded_model.loaded_at)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            predictions, probabilities = loaded_model.model.predict_with_proba(dataframe.iloc[missing])
+            scored = list(zip(predictions, probabilities))
+            self.prediction_cache.put_many(loaded_model.version, [keys[i] for i in missing], scored,
+                                           loaded_model.loaded_at)
+            for i, result in zip(missing, scored):
+                results[i] = result
+        predictions, probabilities = zip(*results)
+        return np.array(predictions), np.array(probabilities)
+
+    def predict_batch(self, dataframe: DataFrame, chunk_size: int = None, return_version: bool = False) -> Tuple[List, ...]:
+        """
+        This is the method of VehicleDataClassifier
+        Scores the dataframe with one vectorized model call per chunk of chunk_size rows
+        :param return_version: Also return the version of the model that scored the rows
+        Returns: Predicted labels and positive class probabilities, in input order, and the
+                 model version if return_version
+        """
+        try:
+            logging.info("Entered predict_batch method of VehicleDataClassifier class.", extra={"hot_path": True})
+            chunk_size = chunk_size or self.prediction_pipeline_config.batch_chunk_size
+            with _MODEL_FETCH_SECONDS.time():
+                loaded_model = self.model_holder.get_loaded_model()
+            predictions, probabilities = [], []
+            for start in range(0, len(dataframe), chunk_size):
+                chunk_predictions, chunk_probabilities = loaded_model.model.predict_with_proba(dataframe.iloc[start:start + chunk_size])
+                predictions.extend(chunk_predictions.astype(int).tolist())
+                probabilities.extend(chunk_probabilities.tolist())
+            logging.info(f"Scored {len(dataframe)} rows in batch", extra={"hot_path": True})
+            if return_version:
+                return predictions, probabilities, loaded_model.version
+            return predictions, probabilities
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def predict_raw_batch(self, dataframe: DataFrame, chunk_size: int = None) -> Tuple[List, List[float]]:
+        """
+        This is the method of VehicleDataClassifier
+        Maps raw collection records to model features, then scores them like predict_batch
+        Returns: Predicted labels and positive class probabilities, in input order
+        """
+        try:
+            if self.data_transformation is None:
+                self.data_transformation = DataTransformation()
+            vehicle_df = RawVehicleData(dataframe, data_transformation=self.data_transformation).get_vehicle_input_data_frame()
+            return self.predict_batch(vehicle_df, chunk_size=chunk_size)
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def warm_up(self, batch_size: int = WARM_UP_BATCH_SIZE) -> Dict:
+        """
+        This is the method of VehicleDataClassifier
+        Loads the model and runs a synthetic batch and a single row through it, so lazy
+        sklearn/joblib initialization happens before the first real request
+        Returns: Model version, model load time and warm-up latency in seconds
+        """
+        try:
+            logging.info("Entered warm_up method of VehicleDataClassifier class.")
+            loaded_model = self.model_holder.get_loaded_model()
+            rng = np.random.default_rng(0)
+            vehicle_df = DataFrame({
+                "Gender": rng.integers(0, 2, batch_size),
+                "Age": rng.integers(20, 80, batch_size),
+                "Driving_License": np.ones(batch_size, dtype=int),
+                "Region_Code": rng.integers(0, 53, batch_size).astype(float),
+                "Previously_Insured": rng.integers(0, 2, batch_size),
+                "Annual_Premium": rng.uniform(2630, 60000, batch_size),
+                "Policy_Sales_Channel": rng.integers(1, 164, batch_size).astype(float),
+                "Vintage": rng.integers(10, 300, batch_size),
+                "Vehicle_Age_lt_1_Year": rng.integers(0, 2, batch_size),
+                "Vehicle_Age_gt_2_Years": np.zeros(batch_size, dtype=int),
+                "Vehicle_Damage_Yes": rng.integers(0, 2, batch_size),
+            })[MODEL_FEATURE_COLUMNS]
+            start = time.perf_counter()
+            loaded_model.model.predict_proba(vehicle_df)
+            loaded_model.model.predict(vehicle_df.head(1))
+            warm_up_seconds = time.perf_counter() - start
+            logging.info(f"Model {loaded_model.version} warmed up in {warm_up_seconds:.3f}s")
+            return {"model_version": loaded_model.version,
+                    "model_load_seconds": loaded_model.load_duration,
+                    "warm_up_seconds": warm_up_seconds}
+        except Exception as e:
+            raise MyException(e,sys)
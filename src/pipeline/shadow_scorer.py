@@ -0,0 +1,265 @@
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.entity.config_entity import ShadowScoringConfig
+from src.entity.model_holder import ModelHolder
+from src.exception import MyException
+from src.logger import logging
+
+SHADOW_LOG_HEADER = "time,production_version,candidate_version,production,candidate\n"
+
+# Configuration and candidate model holder of the shadow worker process
+_worker_config: Optional[ShadowScoringConfig] = None
+_worker_model_holder: Optional[ModelHolder] = None
+
+
+def _candidate_model_holder(shadow_scoring_config: ShadowScoringConfig) -> ModelHolder:
+    return ModelHolder.get_instance(bucket_name=shadow_scoring_config.model_bucket_name,
+                                    model_path=shadow_scoring_config.candidate_model_file_path,
+                                    refresh_interval=shadow_scoring_config.model_refresh_interval)
+
+
+def _init_shadow_worker(shadow_scoring_config: ShadowScoringConfig) -> None:
+    """
+    Initializer of the shadow worker process, which yields the CPU to the serving process.
+    The candidate model holder is created and loaded on the first batch, so a failure to
+    build it is reported by that batch instead of breaking the pool.
+    """
+    global _worker_config
+    if hasattr(os, "nice") and shadow_scoring_config.niceness:
+        os.nice(shadow_scoring_config.niceness)
+    _worker_config = shadow_scoring_config
+
+
+def _score_candidate(dataframe: DataFrame, model_holder: Optional[ModelHolder] = None) -> Tuple[np.ndarray, str, float]:
+    """
+    Scores dataframe with the candidate model of model_holder, by default the shadow worker's.
+    Errors are raised as MyException, which pickles, so a failing candidate leaves the worker running.
+    Returns: Candidate predictions, candidate version and the CPU seconds spent
+    """
+    global _worker_model_holder
+    try:
+        # Thread CPU time, so time spent by other threads while this one waits is not counted
+        cpu_start = time.thread_time()
+        if model_holder is None:
+            if _worker_model_holder is None:
+                _worker_model_holder = _candidate_model_holder(_worker_config)
+            model_holder = _worker_model_holder
+        loaded_model = model_holder.get_loaded_model()
+        predictions = np.asarray(loaded_model.model.predict(dataframe))
+        return predictions, loaded_model.version, time.thread_time() - cpu_start
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+class ShadowScorer:
+    """
+    Scores live requests with a candidate model next to production, off the response path.
+
+    submit() only samples and enqueues, it never waits: when the bounded queue is full the
+    request is dropped from shadow scoring. A daemon thread scores queued requests in batches,
+    appends both predictions to a CSV log, rotated at log_max_bytes, and keeps agreement and
+    CPU-cost statistics.
+
+    In "process" mode the candidate model is loaded and scored in one niced worker process, so
+    shadow scoring neither holds the serving process's GIL nor competes with it for CPU at the
+    same priority. In "thread" mode it is scored by the daemon thread itself and does compete
+    for the GIL; sample_rate and max_queue_size bound how much work it takes on.
+    """
+
+    # Queued requests scored together in one candidate call
+    max_batch_items = 256
+
+    def __init__(self, shadow_scoring_config: ShadowScoringConfig = ShadowScoringConfig()) -> None:
+        """
+        :param shadow_scoring_config: Configuration for shadow scoring
+        """
+        if shadow_scoring_config.executor_mode not in ("thread", "process"):
+            raise ValueError(f"Unknown shadow scoring executor mode: {shadow_scoring_config.executor_mode}")
+        self.shadow_scoring_config = shadow_scoring_config
+        self.enabled = bool(shadow_scoring_config.candidate_model_file_path)
+        self.model_holder: Optional[ModelHolder] = None
+        if self.enabled and shadow_scoring_config.executor_mode == "thread":
+            self.model_holder = _candidate_model_holder(shadow_scoring_config)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._log_file = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=shadow_scoring_config.max_queue_size)
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self.candidate_version: Optional[str] = None
+        self.submitted = 0
+        self.dropped = 0
+        self.scored_rows = 0
+        self.agreed_rows = 0
+        self.errors = 0
+        self.cpu_seconds = 0.0
+
+    def submit(self, dataframe: DataFrame, production_predictions, production_version: str) -> None:
+        """
+        Queues a scored request for the candidate model, unless it is not sampled or the queue is full.
+        """
+        if not self.enabled or random.random() >= self.shadow_scoring_config.sample_rate:
+            return
+        self._ensure_worker()
+        self.submitted += 1
+        try:
+            self._queue.put_nowait((dataframe, np.asarray(production_predictions), production_version))
+        except queue.Full:
+            self.dropped += 1
+
+    def get_stats(self) -> dict:
+        """
+        Returns agreement rate and the CPU time the candidate model added, in total and per row.
+        """
+        return {
+            "enabled": self.enabled,
+            "executor_mode": self.shadow_scoring_config.executor_mode,
+            "candidate_model": self.shadow_scoring_config.candidate_model_file_path or None,
+            "candidate_version": self.candidate_version,
+            "sample_rate": self.shadow_scoring_config.sample_rate,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "scored_rows": self.scored_rows,
+            "agreement_rate": self.agreed_rows / self.scored_rows if self.scored_rows else None,
+            "errors": self.errors,
+            "candidate_cpu_seconds": self.cpu_seconds,
+            "candidate_cpu_us_per_row": 1e6 * self.cpu_seconds / self.scored_rows if self.scored_rows else None,
+        }
+
+    def stop(self) -> None:
+        """
+        Stops the worker thread after the batch it is scoring, and the worker process.
+        """
+        self._stop_event.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self._shutdown_executor()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._stop_event.clear()
+                self._worker = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+                self._worker.start()
+
+    def _shutdown_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _collect_batch(self) -> List[tuple]:
+        batch = [self._queue.get(timeout=1.0)]
+        while len(batch) < self.max_batch_items:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _score(self, dataframe: DataFrame) -> Tuple[np.ndarray, str, float]:
+        if self.shadow_scoring_config.executor_mode == "thread":
+            return _score_candidate(dataframe, self.model_holder)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_shadow_worker,
+                                                 initargs=(self.shadow_scoring_config,))
+        try:
+            return self._executor.submit(_score_candidate, dataframe).result()
+        except BrokenProcessPool:
+            # Only a worker that died is replaced, candidate errors arrive as MyException
+            self._shutdown_executor()
+            raise
+
+    def _open_log(self) -> None:
+        shadow_log_file_path = self.shadow_scoring_config.shadow_log_file_path
+        os.makedirs(os.path.dirname(shadow_log_file_path), exist_ok=True)
+        self._log_file = open(shadow_log_file_path, "a")
+        if self._log_file.tell() == 0:
+            self._log_file.write(SHADOW_LOG_HEADER)
+
+    def _rotate_log(self) -> None:
+        """
+        Shifts shadow_log.csv.1 .. .<log_backup_count> up by one, moves the full log to .1 and starts a new one.
+        """
+        self._log_file.close()
+        shadow_log_file_path = self.shadow_scoring_config.shadow_log_file_path
+        backup_count = self.shadow_scoring_config.log_backup_count
+        for backup_no in range(backup_count - 1, 0, -1):
+            if os.path.exists(f"{shadow_log_file_path}.{backup_no}"):
+                os.replace(f"{shadow_log_file_path}.{backup_no}", f"{shadow_log_file_path}.{backup_no + 1}")
+        if backup_count > 0:
+            os.replace(shadow_log_file_path, f"{shadow_log_file_path}.1")
+        else:
+            os.remove(shadow_log_file_path)
+        self._open_log()
+
+    def _write_log(self, lines: List[str]) -> None:
+        # Reopened here if a failed rotation left it closed
+        if self._log_file.closed:
+            self._open_log()
+        log_max_bytes = self.shadow_scoring_config.log_max_bytes
+        if log_max_bytes > 0 and self._log_file.tell() >= log_max_bytes:
+            self._rotate_log()
+        self._log_file.writelines(lines)
+        self._log_file.flush()
+
+    def _score_batch(self, batch: List[tuple]) -> None:
+        batch_df = pd.concat([dataframe for dataframe, _, _ in batch], ignore_index=True)
+        candidate_predictions, candidate_version, cpu_seconds = self._score(batch_df)
+        self.candidate_version = candidate_version
+        self.cpu_seconds += cpu_seconds
+
+        production_predictions = np.concatenate([predictions for _, predictions, _ in batch])
+        self.scored_rows += len(candidate_predictions)
+        self.agreed_rows += int(np.sum(production_predictions == candidate_predictions))
+
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        offset = 0
+        lines = []
+        for dataframe, _, production_version in batch:
+            for row in range(offset, offset + len(dataframe)):
+                lines.append(f"{now},{production_version},{candidate_version},"
+                             f"{production_predictions[row]},{candidate_predictions[row]}\n")
+            offset += len(dataframe)
+        self._write_log(lines)
+
+    def _run(self) -> None:
+        try:
+            self._open_log()
+        except Exception as e:
+            logging.error(f"Shadow scoring disabled: {MyException(e, sys)}")
+            self.enabled = False
+            return
+
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    batch = self._collect_batch()
+                except queue.Empty:
+                    continue
+                try:
+                    self._score_batch(batch)
+                except Exception as e:
+                    # Candidate failures must never surface to production traffic
+                    self.errors += 1
+                    logging.warning(f"Shadow scoring of {len(batch)} requests failed: {e}")
+        finally:
+            self._log_file.close()
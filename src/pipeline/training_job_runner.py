@@ -0,0 +1,271 @@
+import dataclasses
+import json
+import logging as std_logging
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from typing import List, Optional
+
+from src.entity.config_entity import TrainingJobConfig
+from src.exception import MyException
+from src.logger import logging
+
+TRAINING_PIPELINE_STAGES = ("data_ingestion", "data_validation", "data_transformation",
+                            "model_trainer", "model_evaluation", "model_pusher")
+
+
+class TrainingJobAlreadyRunning(Exception):
+    def __init__(self, job_id: str):
+        super().__init__(f"Training job {job_id} is already running")
+        self.job_id = job_id
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_json(file_path: str, content: dict) -> None:
+    # Write-then-rename so readers never see a half-written file
+    with open(file_path + ".tmp", "w") as json_file:
+        json.dump(content, json_file, indent=2, default=str)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def _run_training_job(job_id: str, training_job_config: TrainingJobConfig) -> None:
+    """
+    Entry point of the training process. Runs TrainPipeline and records per-stage progress
+    in the job's status file and the pipeline logs in the job's run log.
+    """
+    job_dir = os.path.join(training_job_config.training_job_dir, job_id)
+    status_file_path = os.path.join(job_dir, training_job_config.status_file_name)
+    with open(status_file_path) as status_file:
+        status = json.load(status_file)
+
+    log_handler = std_logging.FileHandler(os.path.join(job_dir, training_job_config.log_file_name))
+    log_handler.setFormatter(std_logging.Formatter("[%(asctime)s] %(name)s - %(levelname)s - %(message)s"))
+    std_logging.getLogger().addHandler(log_handler)
+
+    try:
+        # Training yields the CPU to the serving workers running on the same host
+        if hasattr(os, "nice") and training_job_config.niceness:
+            os.nice(training_job_config.niceness)
+
+        # Imported here so the artifact directory timestamp is taken when the job starts
+        from src.entity.config_entity import training_pipeline_config
+        from src.pipeline.training_pipeline import TrainPipeline
+
+        status.update(status="running", pid=os.getpid(), started_at=time.time(),
+                      artifact_dir=os.path.abspath(training_pipeline_config.artifact_dir))
+        _write_json(status_file_path, status)
+
+        def stage_callback(stage_name: str, stage_status: str, artifact) -> None:
+            stage = status["stages"][stage_name]
+            stage["status"] = stage_status
+            if stage_status == "running":
+                stage["started_at"] = time.time()
+                status["current_stage"] = stage_name
+            else:
+                stage["finished_at"] = time.time()
+                if stage.get("started_at"):
+                    stage["duration"] = stage["finished_at"] - stage["started_at"]
+                if artifact is not None:
+                    stage["artifact"] = dataclasses.asdict(artifact) if dataclasses.is_dataclass(artifact) \
+                        else str(artifact)
+            finished = sum(s["status"] in ("completed", "skipped") for s in status["stages"].values())
+            status["progress"] = finished / len(status["stages"])
+            _write_json(status_file_path, status)
+
+        TrainPipeline(stage_callback=stage_callback).run_pipeline()
+        status.update(status="succeeded", current_stage=None)
+    except Exception as e:
+        logging.error(f"Training job {job_id} failed: {e}")
+        if status["current_stage"] is not None:
+            status["stages"][status["current_stage"]]["status"] = "failed"
+        status.update(status="failed", error=str(e))
+    finally:
+        status["finished_at"] = time.time()
+        _write_json(status_file_path, status)
+        try:
+            os.remove(training_job_config.lock_file_path)
+        except FileNotFoundError:
+            pass
+        std_logging.getLogger().removeHandler(log_handler)
+        log_handler.close()
+
+
+class TrainingJobRunner:
+    """
+    Runs TrainPipeline in a separate process so training never blocks the serving workers.
+
+    Every job gets a directory <training_job_dir>/<job_id> holding status.json (overall and
+    per-stage status, artifacts and artifact directory) and run.log. At most one job runs at
+    a time across all server workers, enforced by an exclusive lock file.
+    """
+
+    def __init__(self, training_job_config: TrainingJobConfig = TrainingJobConfig()) -> None:
+        """
+        :param training_job_config: Configuration for training jobs
+        """
+        self.training_job_config = training_job_config
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.training_job_config.training_job_dir, job_id)
+
+    def _acquire_lock(self, job_id: str) -> None:
+        """
+        Takes the training lock for job_id, or takes over a lock left behind by a job that died.
+        The lock is hard-linked into place from a file already holding the job_id, so other
+        workers never read an empty lock.
+        :raises TrainingJobAlreadyRunning: if the lock is held by a job that is pending, running
+                                           or too young to have written its status
+        """
+        lock_file_path = self.training_job_config.lock_file_path
+        os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
+        temp_file_path = f"{lock_file_path}.{job_id}"
+        with open(temp_file_path, "w") as temp_file:
+            temp_file.write(job_id)
+        try:
+            for _ in range(3):
+                try:
+                    os.link(temp_file_path, lock_file_path)
+                    return
+                except FileExistsError:
+                    pass
+                try:
+                    with open(lock_file_path) as lock_file:
+                        running_job_id = lock_file.read().strip()
+                    lock_age = time.time() - os.stat(lock_file_path).st_mtime
+                except FileNotFoundError:
+                    # Released in the meantime
+                    continue
+                if not self._lock_is_stale(running_job_id, lock_age):
+                    raise TrainingJobAlreadyRunning(running_job_id)
+                self._take_over_lock(running_job_id, job_id)
+            raise TrainingJobAlreadyRunning("unknown")
+        finally:
+            os.remove(temp_file_path)
+
+    def _lock_is_stale(self, running_job_id: str, lock_age: float) -> bool:
+        try:
+            running_status = self.get_job_status(running_job_id) if running_job_id else None
+        except Exception as e:
+            logging.warning(f"Could not read the status of training job {running_job_id}: {e}")
+            running_status = None
+        if running_status is None:
+            # The job may not have written its status yet
+            return lock_age > self.training_job_config.lock_grace_seconds
+        return running_status["status"] not in ("pending", "running")
+
+    def _take_over_lock(self, stale_job_id: str, job_id: str) -> None:
+        """
+        Removes the lock of stale_job_id. The lock is first renamed away, which only one worker
+        can do, and put back if another worker replaced it in the meantime.
+        """
+        lock_file_path = self.training_job_config.lock_file_path
+        stale_file_path = f"{lock_file_path}.stale-{job_id}"
+        try:
+            os.rename(lock_file_path, stale_file_path)
+        except FileNotFoundError:
+            return
+        try:
+            with open(stale_file_path) as stale_file:
+                taken_job_id = stale_file.read().strip()
+            if taken_job_id != stale_job_id:
+                try:
+                    os.link(stale_file_path, lock_file_path)
+                except FileExistsError:
+                    pass
+                raise TrainingJobAlreadyRunning(taken_job_id)
+            logging.warning(f"Removed stale training lock of job {stale_job_id}")
+        finally:
+            os.remove(stale_file_path)
+
+    def start_job(self) -> dict:
+        """
+        Starts a training run in a new process.
+        :return: Initial status of the job
+        :raises TrainingJobAlreadyRunning: if another training job is still running
+        """
+        # Reaps training processes that have finished
+        multiprocessing.active_children()
+        job_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._acquire_lock(job_id)
+        try:
+            job_dir = self._job_dir(job_id)
+            os.makedirs(job_dir, exist_ok=True)
+            status = {
+                "job_id": job_id,
+                "status": "pending",
+                "pid": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "current_stage": None,
+                "progress": 0.0,
+                "artifact_dir": None,
+                "log_file_path": os.path.abspath(os.path.join(job_dir, self.training_job_config.log_file_name)),
+                "error": None,
+                "stages": {stage_name: {"status": "pending"} for stage_name in TRAINING_PIPELINE_STAGES},
+            }
+            _write_json(os.path.join(job_dir, self.training_job_config.status_file_name), status)
+
+            process = multiprocessing.get_context("spawn").Process(
+                target=_run_training_job, args=(job_id, self.training_job_config),
+                name=f"training-{job_id}", daemon=False)
+            process.start()
+            # Written by the server only, so a process that dies before reporting is still detected
+            with open(os.path.join(job_dir, "pid"), "w") as pid_file:
+                pid_file.write(str(process.pid))
+            status["pid"] = process.pid
+            logging.info(f"Started training job {job_id} in process {process.pid}")
+            return status
+        except Exception as e:
+            os.remove(self.training_job_config.lock_file_path)
+            raise MyException(e, sys)
+
+    def get_job_status(self, job_id: str) -> Optional[dict]:
+        """
+        Returns the status of a job, or None if the job does not exist.
+        """
+        try:
+            multiprocessing.active_children()
+            status_file_path = os.path.join(self._job_dir(os.path.basename(job_id)),
+                                            self.training_job_config.status_file_name)
+            if not os.path.exists(status_file_path):
+                return None
+            with open(status_file_path) as status_file:
+                status = json.load(status_file)
+            # A process killed before it could record its outcome
+            pid_file_path = os.path.join(os.path.dirname(status_file_path), "pid")
+            if status["status"] in ("pending", "running") and os.path.exists(pid_file_path):
+                with open(pid_file_path) as pid_file:
+                    pid = int(pid_file.read() or 0)
+                if pid and not _pid_alive(pid):
+                    status.update(status="failed", error="Training process exited unexpectedly")
+            return status
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def list_jobs(self) -> List[dict]:
+        """
+        Returns the status of all known jobs, newest first.
+        """
+        try:
+            training_job_dir = self.training_job_config.training_job_dir
+            if not os.path.isdir(training_job_dir):
+                return []
+            job_ids = sorted((name for name in os.listdir(training_job_dir)
+                              if os.path.isdir(os.path.join(training_job_dir, name))), reverse=True)
+            return [status for status in map(self.get_job_status, job_ids) if status is not None]
+        except Exception as e:
+            raise MyException(e, sys)
@@ -1,4 +1,5 @@
 import sys
+from typing import Callable, Optional
 from src.exception import MyException
 from src.logger import logging
 
@@ -26,7 +27,12 @@ from src.entity.artifact_entity import (DataIngestionArtifact,
 
 
 class TrainPipeline:
-    def __init__(self):
+    def __init__(self, stage_callback: Optional[Callable[[str, str, object], None]] = None):
+        """
+        :param stage_callback: Called as stage_callback(stage_name, status, artifact) when a stage
+                               starts ("running"), finishes ("completed") or is skipped ("skipped")
+        """
+        self.stage_callback = stage_callback
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
         self.data_transformation_config = DataTransformationConfig()
@@ -125,22 +131,39 @@ class TrainPipeline:
         except Exception as e:
             raise MyException(e, sys)
 
+    def _run_stage(self, stage_name: str, stage_method: Callable, **kwargs):
+        """
+        Runs one stage method and reports its progress to the stage callback.
+        """
+        if self.stage_callback is not None:
+            self.stage_callback(stage_name, "running", None)
+        artifact = stage_method(**kwargs)
+        if self.stage_callback is not None:
+            self.stage_callback(stage_name, "completed", artifact)
+        return artifact
+
     def run_pipeline(self, ) -> None:
         """
         This method of TrainPipeline class is responsible for running complete pipeline
         """
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(
+            data_ingestion_artifact = self._run_stage("data_ingestion", self.start_data_ingestion)
+            data_validation_artifact = self._run_stage("data_validation", self.start_data_validation,
+                                                       data_ingestion_artifact=data_ingestion_artifact)
+            data_transformation_artifact = self._run_stage("data_transformation", self.start_data_transformation,
                 data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                    model_trainer_artifact=model_trainer_artifact)
+            model_trainer_artifact = self._run_stage("model_trainer", self.start_model_trainer,
+                                                     data_transformation_artifact=data_transformation_artifact)
+            model_evaluation_artifact = self._run_stage("model_evaluation", self.start_model_evaluation,
+                                                        data_ingestion_artifact=data_ingestion_artifact,
+                                                        model_trainer_artifact=model_trainer_artifact)
             if not model_evaluation_artifact.is_model_accepted:
                 logging.info(f"Model not accepted.")
+                if self.stage_callback is not None:
+                    self.stage_callback("model_pusher", "skipped", None)
                 return None
-            model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+            model_pusher_artifact = self._run_stage("model_pusher", self.start_model_pusher,
+                                                    model_evaluation_artifact=model_evaluation_artifact)
             
         except Exception as e:
             raise MyException(e, sys)
\ No newline at end of file
@@ -0,0 +1,236 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds, from 50µs up to 10s, roughly 2.5x apart
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                                              0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Timer:
+    """
+    Context manager observing the elapsed wall time of its block into a histogram.
+    """
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: "_HistogramChild") -> None:
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf overflow slot, cumulated only when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with optional labels, rendered in the Prometheus text format.
+    Resolve the labelled child once (histogram.labels(...)) and keep it on the hot path.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], _HistogramChild] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values) -> _HistogramChild:
+        key = tuple(str(value) for value in label_values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, child in sorted(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.label_names, label_values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels, rendered in the Prometheus text format.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        key = tuple(str(value) for value in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in values)
+        return lines
+
+
+class Gauge:
+    """
+    Gauge whose value is read from a callback when metrics are rendered. The callback returns
+    a number, or a list of (label_values, number) pairs for a labelled gauge; None skips it.
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.label_names = tuple(label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        value = self.callback()
+        if value is None:
+            return lines
+        samples = value if self.label_names else [((), value)]
+        lines.extend(f"{self.name}{_format_labels(self.label_names, label_values)} {float(sample)}"
+                     for label_values, sample in samples if sample is not None)
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together on the /metrics endpoint.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            # Re-registering by name returns the existing metric, so modules can be reloaded
+            return self._metrics.setdefault(metric.name, metric)
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, callback: Callable, label_names: Sequence[str] = ()) -> Gauge:
+        with self._lock:
+            # Callbacks are replaced so they always point at the live objects
+            self._metrics[name] = Gauge(name, documentation, callback, label_names)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests by route and status code and timing them.
+    Routes are labelled by their path template, so path parameters do not create new series.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry" = None) -> None:
+        registry = registry or REGISTRY
+        self.app = app
+        self.requests_total = registry.counter("http_requests_total", "HTTP requests by method, route and status code",
+                                               ("method", "route", "status"))
+        self.request_seconds = registry.histogram("http_request_duration_seconds",
+                                                  "HTTP request latency by route", ("route",))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            self.requests_total.inc(scope["method"], route_path, status_code)
+            self.request_seconds.labels(route_path).observe(time.perf_counter() - start)
+
+
+# Process-wide registry and the metrics of the prediction path
+REGISTRY = MetricsRegistry()
+
+PREDICTION_STAGE_SECONDS = REGISTRY.histogram(
+    "prediction_stage_duration_seconds",
+    "Latency of each stage of the prediction path (form_parse, dataframe_build, model_fetch, preprocess, predict)",
+    ("stage",))
+
+PREDICTION_ERRORS_TOTAL = REGISTRY.counter("prediction_errors_total",
+                                           "Prediction requests answered with an error, by endpoint", ("endpoint",))
@@ -0,0 +1,51 @@
+import json
+from io import BytesIO
+from typing import AsyncIterator, List
+
+import pandas as pd
+from pandas import DataFrame
+
+
+async def iter_lines(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Splits a stream of arbitrary byte chunks into lines, holding at most one partial line.
+    """
+    pending = b""
+    async for chunk in byte_chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _to_dataframe(data_format: str, header: bytes, lines: List[bytes]) -> DataFrame:
+    if data_format == "csv":
+        return pd.read_csv(BytesIO(header + b"\n" + b"\n".join(lines)), na_values="na")
+    return DataFrame.from_records([json.loads(line) for line in lines])
+
+
+async def iter_dataframe_chunks(byte_chunks: AsyncIterator[bytes], data_format: str,
+                                chunk_rows: int) -> AsyncIterator[DataFrame]:
+    """
+    Parses a CSV (header line first) or NDJSON byte stream into DataFrames of at most chunk_rows rows.
+    Only one chunk of rows is held in memory at a time. CSV fields must not contain newlines.
+    """
+    if data_format not in ("csv", "ndjson"):
+        raise ValueError(f"Unsupported data format: {data_format}")
+    header = None
+    lines: List[bytes] = []
+    async for line in iter_lines(byte_chunks):
+        line = line.rstrip(b"\r")
+        if not line.strip():
+            continue
+        if data_format == "csv" and header is None:
+            header = line
+            continue
+        lines.append(line)
+        if len(lines) >= chunk_rows:
+            yield _to_dataframe(data_format, header, lines)
+            lines = []
+    if lines:
+        yield _to_dataframe(data_format, header, lines)
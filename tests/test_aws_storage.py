@@ -0,0 +1,37 @@
+import sys
+
+import pytest
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+from s3transfer.exceptions import RetriesExceededError
+
+from src.cloud_storage.aws_storage import is_s3_unreachable
+from src.exception import MyException
+
+
+def wrapped(error: Exception) -> MyException:
+    try:
+        try:
+            raise error
+        except Exception as e:
+            raise MyException(e, sys)
+    except MyException as e:
+        return e
+
+
+@pytest.mark.parametrize("error", [EndpointConnectionError(endpoint_url="https://s3"),
+                                   ConnectTimeoutError(endpoint_url="https://s3"),
+                                   ReadTimeoutError(endpoint_url="https://s3")])
+def test_connection_errors_are_unreachable(error):
+    assert is_s3_unreachable(error)
+    assert is_s3_unreachable(wrapped(error))
+    assert is_s3_unreachable(wrapped(wrapped(error)))
+    assert is_s3_unreachable(RetriesExceededError(last_exception=error))
+
+
+@pytest.mark.parametrize("error", [ClientError({"Error": {"Code": "403", "Message": "Forbidden"}}, "HeadObject"),
+                                   ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"),
+                                   ValueError("s3://bucket/model.pkl changed while it was downloaded"),
+                                   ConnectionError("not a botocore error")])
+def test_other_errors_are_not_unreachable(error):
+    assert not is_s3_unreachable(error)
+    assert not is_s3_unreachable(wrapped(error))
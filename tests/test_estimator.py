@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.components.data_transformation import DataTransformation
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.estimator import MyModel
+
+
+def make_features(n_rows: int, seed: int) -> pd.DataFrame:
+    """
+    Model feature rows as produced by DataTransformation's custom transformations.
+    """
+    rng = np.random.default_rng(seed)
+    vehicle_age = rng.integers(0, 3, n_rows)
+    return pd.DataFrame({
+        "Gender": rng.integers(0, 2, n_rows),
+        "Age": rng.integers(20, 80, n_rows),
+        "Driving_License": rng.integers(0, 2, n_rows),
+        "Region_Code": rng.integers(0, 40, n_rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Annual_Premium": rng.uniform(2630, 60000, n_rows).round(1),
+        "Policy_Sales_Channel": rng.integers(1, 120, n_rows).astype(float),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Vehicle_Age_lt_1_Year": (vehicle_age == 0).astype(int),
+        "Vehicle_Age_gt_2_Years": (vehicle_age == 2).astype(int),
+        "Vehicle_Damage_Yes": rng.integers(0, 2, n_rows),
+    })[MODEL_FEATURE_COLUMNS]
+
+
+@pytest.fixture(scope="module")
+def model() -> MyModel:
+    df = make_features(2000, seed=0)
+    target = ((df["Vehicle_Damage_Yes"] == 1) & (df["Previously_Insured"] == 0) & (df["Age"] > 30)).astype(int)
+    preprocessing = DataTransformation().get_data_transformer_object()
+    forest = RandomForestClassifier(n_estimators=10, max_depth=8, random_state=0)
+    forest.fit(preprocessing.fit_transform(df), target)
+    return MyModel(preprocessing_object=preprocessing, trained_model_object=forest)
+
+
+@pytest.fixture(scope="module")
+def inputs() -> pd.DataFrame:
+    df = make_features(300, seed=1)
+    # Codes never seen in training and values outside the fitted scaler ranges
+    df.loc[:49, "Region_Code"] = 99.0
+    df.loc[50:99, "Policy_Sales_Channel"] = 500.0
+    df.loc[100:119, "Age"] = 120
+    df.loc[120:139, "Annual_Premium"] = 1e6
+    df.loc[140:159, "Vintage"] = -5
+    return df
+
+
+def test_preprocessing_is_compiled(model):
+    assert model.is_compiled
+    assert model.feature_names == MODEL_FEATURE_COLUMNS
+    assert model.inference_backend == "compiled"
+
+
+@pytest.mark.parametrize("dtype", [None, np.int64, np.float32, np.float64])
+def test_transform_array_matches_pipeline(model, inputs, dtype):
+    df = inputs if dtype is None else inputs.round().astype(dtype)
+    expected = model.preprocessing_object.transform(df)
+    transformed = model.transform_array(df[model.feature_names].to_numpy())
+    assert transformed.dtype == np.float32
+    assert np.allclose(transformed, expected, rtol=1e-6, atol=1e-6)
+
+
+def test_int_and_float_inputs_transform_alike(model, inputs):
+    ints = inputs.round().astype(np.int64)
+    assert np.array_equal(model.transform_array(ints.to_numpy()), model.transform_array(ints.astype(float).to_numpy()))
+    assert np.array_equal(model.predict(ints), model.predict(ints.astype(float)))
+
+
+def test_transform_array_single_row(model, inputs):
+    row = inputs[model.feature_names].to_numpy()[0]
+    assert np.allclose(model.transform_array(row), model.preprocessing_object.transform(inputs.iloc[[0]]),
+                       rtol=1e-6, atol=1e-6)
+
+
+def test_compiled_predict_proba_matches_sklearn(model, inputs):
+    expected = model.trained_model_object.predict_proba(model.preprocessing_object.transform(inputs))
+    assert np.allclose(model.predict_proba(inputs), expected, rtol=1e-6, atol=1e-6)
+    assert np.array_equal(model.predict(inputs), model.trained_model_object.classes_.take(expected.argmax(axis=1)))
+
+
+def test_records_and_array_paths_match_dataframe_path(model, inputs):
+    expected = model.predict(inputs)
+    assert np.array_equal(model.predict_array(inputs[model.feature_names].to_numpy()), expected)
+    assert np.array_equal(model.predict_records(inputs.to_dict("records")), expected)
+
+
+@pytest.mark.parametrize("with_mean,with_std", [(True, False), (False, True), (False, False)])
+def test_standard_scaler_options_are_compiled(inputs, with_mean, with_std):
+    df = make_features(500, seed=2)
+    preprocessing = Pipeline(steps=[("Preprocessor", ColumnTransformer(
+        transformers=[("StandardScaler", StandardScaler(with_mean=with_mean, with_std=with_std),
+                       ["Age", "Vintage", "Annual_Premium"])],
+        remainder="passthrough"))])
+    forest = RandomForestClassifier(n_estimators=5, max_depth=6, random_state=0)
+    forest.fit(preprocessing.fit_transform(df), df["Vehicle_Damage_Yes"])
+    model = MyModel(preprocessing_object=preprocessing, trained_model_object=forest)
+    assert model.is_compiled
+    assert np.allclose(model.transform_array(inputs[model.feature_names].to_numpy()),
+                       preprocessing.transform(inputs), rtol=1e-6, atol=1e-6)
@@ -0,0 +1,41 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data_access.feature_store import FeatureStore
+
+SCHEMA = pa.schema([("_id", pa.string()), ("Age", pa.int64())])
+
+
+def write_part(feature_store: FeatureStore, ids: list) -> dict:
+    part_file_path = feature_store.next_part_file_path()
+    table = pa.table({"_id": ids, "Age": list(range(len(ids)))}, schema=SCHEMA)
+    pq.write_table(table, part_file_path, row_group_size=2)
+    return feature_store.commit_part(part_file_path, SCHEMA)
+
+
+def stored_ids(feature_store: FeatureStore) -> list:
+    return [_id for table in feature_store.iter_tables() for _id in table["_id"].to_pylist()]
+
+
+def test_overlapping_part_keeps_only_new_rows(tmp_path):
+    feature_store = FeatureStore(str(tmp_path), "Proj1-Data")
+    write_part(feature_store, ["a1", "a3", "a5"])
+
+    # Overlap re-reads a3 and a5, a4 arrived late below the watermark
+    watermark = write_part(feature_store, ["a3", "a4", "a5", "a6", "a7"])
+    assert stored_ids(feature_store) == ["a1", "a3", "a5", "a4", "a6", "a7"]
+    assert watermark["rows"] == 6
+    assert watermark["last_id"] == "a7"
+
+    # A late part below the watermark keeps the watermark where it is
+    watermark = write_part(feature_store, ["a2", "a6"])
+    assert watermark["last_id"] == "a7"
+    assert watermark["rows"] == 7
+
+
+def test_part_of_stored_rows_only_is_removed(tmp_path):
+    feature_store = FeatureStore(str(tmp_path), "Proj1-Data")
+    write_part(feature_store, ["a1", "a2"])
+    watermark = write_part(feature_store, ["a1", "a2"])
+    assert watermark["parts"] == 1
+    assert feature_store.part_files() == [feature_store.part_file_path(0)]
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from src.entity.forest_compiler import CompiledForest
+
+
+def make_data(n_rows: int, n_classes: int, seed: int):
+    rng = np.random.default_rng(seed)
+    # Continuous features next to small integer codes, like the scaled and passthrough model features
+    features = np.column_stack([rng.normal(size=(n_rows, 3)), rng.integers(0, 5, size=(n_rows, 2))])
+    target = (features[:, 0] + features[:, 3] / 2 + rng.normal(scale=0.5, size=n_rows) > 1).astype(int)
+    if n_classes == 3:
+        target += features[:, 1] > 0.5
+    return features, target
+
+
+def threshold_inputs(forest, n_features: int) -> np.ndarray:
+    """
+    Rows whose values sit exactly on split thresholds or one float32 step next to them.
+    """
+    rows = []
+    for estimator in forest.estimators_[:3]:
+        tree = estimator.tree_
+        for feature, threshold in zip(tree.feature, tree.threshold):
+            if feature < 0:
+                continue
+            for value in (threshold, np.float32(threshold),
+                          np.nextafter(np.float32(threshold), np.float32(-np.inf)),
+                          np.nextafter(np.float32(threshold), np.float32(np.inf))):
+                row = np.zeros(n_features)
+                row[feature] = value
+                rows.append(row)
+    return np.array(rows)
+
+
+@pytest.fixture(scope="module", params=[(RandomForestClassifier, 2), (RandomForestClassifier, 3),
+                                        (ExtraTreesClassifier, 2)])
+def forest(request):
+    estimator_class, n_classes = request.param
+    features, target = make_data(3000, n_classes, seed=0)
+    return estimator_class(n_estimators=15, min_samples_leaf=3, random_state=0).fit(features, target)
+
+
+def assert_parity(compiled: CompiledForest, forest, array: np.ndarray) -> None:
+    expected = forest.predict_proba(array)
+    assert np.allclose(compiled.predict_proba(array), expected, rtol=1e-12, atol=1e-12)
+    assert np.array_equal(compiled.predict(array), forest.predict(array))
+
+
+def test_random_inputs(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    features, _ = make_data(2000, 2, seed=1)
+    assert_parity(compiled, forest, features)
+
+
+def test_exact_threshold_boundary(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    assert_parity(compiled, forest, threshold_inputs(forest, forest.n_features_in_))
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32, np.int64])
+def test_input_dtypes_cast_like_sklearn(forest, dtype):
+    compiled = CompiledForest.from_sklearn(forest)
+    features, _ = make_data(500, 2, seed=2)
+    # float64 values that only fall on one side of a threshold after the float32 cast
+    boundary = threshold_inputs(forest, forest.n_features_in_)
+    array = np.concatenate([features * 10, boundary + 1e-9]).astype(dtype)
+    assert_parity(compiled, forest, array)
+
+
+def test_chunking_and_single_row(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    compiled.chunk_size = 7
+    features, _ = make_data(100, 2, seed=3)
+    assert_parity(compiled, forest, features)
+    assert np.allclose(compiled.predict_proba(features[0]), forest.predict_proba(features[:1]))
+
+
+def test_array_round_trip(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    rebuilt = CompiledForest.from_arrays(compiled.to_arrays(), max_depth=compiled.max_depth)
+    features, _ = make_data(300, 2, seed=4)
+    assert np.array_equal(rebuilt.predict_proba(features), compiled.predict_proba(features))
@@ -0,0 +1,55 @@
+import pickle
+import sys
+
+import pytest
+
+import src.pipeline.inference_executor as inference_executor
+from src.entity.config_entity import VehiclePredictorConfig
+from src.exception import MyException
+
+
+def test_my_exception_pickles():
+    try:
+        try:
+            raise ValueError("could not convert string to float: 'abc'")
+        except ValueError as e:
+            raise MyException(e, sys)
+    except MyException as e:
+        error = e
+    restored = pickle.loads(pickle.dumps(error))
+    assert type(restored) is MyException
+    assert str(restored) == str(error)
+    assert "could not convert string to float" in str(restored)
+
+
+class FakeClassifier:
+    created = 0
+
+    def __init__(self, prediction_pipeline_config=None):
+        FakeClassifier.created += 1
+        if FakeClassifier.created == 1:
+            raise ConnectionError("S3 unreachable")
+
+    def warm_up(self):
+        return {}
+
+    def predict_batch(self, rows):
+        if rows == "bad":
+            raise ValueError("bad row")
+        return [1] * len(rows), [0.9] * len(rows)
+
+
+def test_worker_retries_the_classifier_and_raises_picklable_errors(monkeypatch):
+    FakeClassifier.created = 0
+    monkeypatch.setattr(inference_executor, "VehicleDataClassifier", FakeClassifier)
+    monkeypatch.setattr(inference_executor, "_worker_classifier", None)
+    # A failed preload leaves the worker alive and without a classifier
+    inference_executor._init_worker(VehiclePredictorConfig())
+    assert inference_executor._worker_classifier is None
+
+    assert inference_executor._worker_call("predict_batch", [0, 0]) == ([1, 1], [0.9, 0.9])
+    assert FakeClassifier.created == 2
+
+    with pytest.raises(MyException) as error:
+        inference_executor._worker_call("predict_batch", "bad")
+    assert "bad row" in str(pickle.loads(pickle.dumps(error.value)))
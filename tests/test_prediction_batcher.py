@@ -0,0 +1,60 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.config_entity import VehiclePredictorConfig
+from src.pipeline.prediction_batcher import PredictionBatcher, PredictionQueueFull
+
+
+def make_features(n_rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.integers(0, 2, size=(n_rows, len(MODEL_FEATURE_COLUMNS))), columns=MODEL_FEATURE_COLUMNS)
+
+
+class FakeExecutor:
+    """
+    Scores every row as 1 after a delay and records how many calls overlapped.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.running = 0
+        self.max_running = 0
+
+    async def run(self, method_name, dataframe, return_version=False):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        return np.ones(len(dataframe), dtype=int), np.full(len(dataframe), 0.9), "v1"
+
+
+def test_batches_are_scored_concurrently_up_to_max_workers():
+    executor = FakeExecutor(max_workers=3)
+    batcher = PredictionBatcher(executor, VehiclePredictorConfig(micro_batch_max_size=2))
+    rows = make_features(20, seed=0)
+
+    async def score():
+        return await asyncio.gather(*[batcher.predict(rows.iloc[[i]]) for i in range(len(rows))])
+
+    results = asyncio.run(score())
+    assert [int(predictions[0]) for predictions, _, _ in results] == [1] * len(rows)
+    assert executor.max_running == 3
+    assert batcher.get_stats()["batch_size_max"] == 2
+
+
+def test_full_queue_rejects_requests():
+    executor = FakeExecutor(max_workers=1)
+    batcher = PredictionBatcher(executor, VehiclePredictorConfig(micro_batch_max_size=1, micro_batch_max_queue_size=4))
+    rows = make_features(10, seed=1)
+
+    async def score():
+        return await asyncio.gather(*[batcher.predict(rows.iloc[[i]]) for i in range(len(rows))],
+                                    return_exceptions=True)
+
+    results = asyncio.run(score())
+    rejected = [result for result in results if isinstance(result, PredictionQueueFull)]
+    assert len(rejected) == len(rows) - 4
+    assert all(not isinstance(result, Exception) for result in results[:4])
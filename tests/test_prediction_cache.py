@@ -0,0 +1,39 @@
+from src.pipeline.prediction_cache import PredictionCache
+
+
+def test_late_write_of_previous_model_is_ignored():
+    cache = PredictionCache(max_size=10, ttl=60)
+    cache.put_many("v1", ["a"], [1], model_loaded_at=100.0)
+    assert cache.get_many("v2", ["a"], model_loaded_at=200.0) == [None]
+    cache.put_many("v2", ["b"], [2], model_loaded_at=200.0)
+
+    # A request that started on v1 finishes after the swap
+    cache.put_many("v1", ["a"], [1], model_loaded_at=100.0)
+    assert cache.get_many("v1", ["b"], model_loaded_at=100.0) == [None]
+
+    assert cache.get_stats()["model_version"] == "v2"
+    assert cache.get_many("v2", ["a", "b"], model_loaded_at=200.0) == [None, 2]
+    assert cache.invalidations == 1
+    assert cache.stale_calls == 2
+
+
+def test_rollback_to_an_earlier_version_switches_the_cache():
+    cache = PredictionCache(max_size=10, ttl=60)
+    cache.put_many("v1", ["a"], [1], model_loaded_at=100.0)
+    cache.put_many("v2", ["a"], [2], model_loaded_at=200.0)
+    cache.put_many("v1", ["a"], [3], model_loaded_at=300.0)
+    assert cache.get_many("v1", ["a"], model_loaded_at=300.0) == [3]
+    assert cache.get_many("v2", ["a"], model_loaded_at=200.0) == [None]
+
+
+def test_lru_eviction_and_expiry():
+    cache = PredictionCache(max_size=2, ttl=60)
+    cache.put_many("v1", ["a", "b"], [1, 2])
+    cache.get_many("v1", ["a"])
+    cache.put_many("v1", ["c"], [3])
+    assert cache.get_many("v1", ["a", "b", "c"]) == [1, None, 3]
+    assert cache.evictions == 1
+
+    expired = PredictionCache(max_size=2, ttl=-1)
+    expired.put_many("v1", ["a"], [1])
+    assert expired.get_many("v1", ["a"]) == [None]
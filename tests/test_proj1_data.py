@@ -0,0 +1,169 @@
+import os
+import re
+
+import mongomock
+import mongomock.aggregate
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from bson import ObjectId
+
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.data_access.proj1_data import Proj1Data
+
+DATABASE = "test"
+COLLECTION = "vehicle"
+
+
+def make_documents(n_rows: int, seed: int = 0) -> list:
+    """
+    Raw vehicle documents as stored in the collection.
+    """
+    rng = np.random.default_rng(seed)
+    return [{"id": i + 1,
+             "Gender": str(rng.choice(["Male", "Female"])),
+             "Age": int(rng.integers(20, 80)),
+             "Driving_License": int(rng.integers(0, 2)),
+             "Region_Code": float(rng.integers(0, 53)),
+             "Previously_Insured": int(rng.integers(0, 2)),
+             "Vehicle_Age": str(rng.choice(["< 1 Year", "1-2 Year", "> 2 Years"])),
+             "Vehicle_Damage": str(rng.choice(["Yes", "No"])),
+             "Annual_Premium": round(float(rng.uniform(2630, 60000)), 1),
+             "Policy_Sales_Channel": float(rng.integers(1, 164)),
+             "Vintage": int(rng.integers(10, 300)),
+             "Response": int(rng.integers(0, 2))} for i in range(n_rows)]
+
+
+def convert_to_double(parser, operator: str, values):
+    """
+    $convert with to: "double" as MongoDB evaluates it, which mongomock does not implement:
+    numbers and decimal number strings convert, null and missing give onNull, anything else onError.
+    """
+    if operator != "$convert" or values.get("to") != "double":
+        return handle_type_convertion_operator(parser, operator, values)
+    try:
+        value = parser.parse(values["input"])
+    except KeyError:
+        value = None
+    if value is None:
+        return values.get("onNull")
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    if isinstance(value, str) and re.fullmatch(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?", value):
+        return float(value)
+    return values.get("onError")
+
+
+handle_type_convertion_operator = mongomock.aggregate._Parser._handle_type_convertion_operator
+
+
+@pytest.fixture
+def proj1_data(monkeypatch) -> Proj1Data:
+    monkeypatch.setattr(MongoDBClient, "client", mongomock.MongoClient())
+    monkeypatch.setattr(mongomock.aggregate._Parser, "_handle_type_convertion_operator", convert_to_double)
+    return Proj1Data()
+
+
+@pytest.fixture
+def collection(proj1_data):
+    return proj1_data.mongo_client.client[DATABASE][COLLECTION]
+
+
+def range_counts(collection, queries: list) -> list:
+    return [collection.count_documents(query) for query in queries]
+
+
+@pytest.mark.parametrize("n_rows", [0, 2])
+def test_partition_queries_of_a_collection_smaller_than_partitions(proj1_data, collection, n_rows):
+    if n_rows:
+        collection.insert_many(make_documents(n_rows))
+    assert proj1_data.partition_queries(COLLECTION, 4, database_name=DATABASE) == [{}]
+    query = {"_id": {"$gt": ObjectId("0" * 24)}}
+    assert proj1_data.partition_queries(COLLECTION, 4, database_name=DATABASE, query=query) == [query]
+
+
+def test_partition_queries_cover_the_collection_once(proj1_data, collection):
+    collection.insert_many(make_documents(1000))
+    queries = proj1_data.partition_queries(COLLECTION, 4, database_name=DATABASE)
+    assert len(queries) == 4
+    assert sum(range_counts(collection, queries)) == 1000
+
+
+def test_partition_queries_split_the_documents_matching_query(proj1_data, collection):
+    collection.insert_many(make_documents(1000))
+    watermark = sorted(document["_id"] for document in collection.find({}, {"_id": 1}))[799]
+    query = {"_id": {"$gt": watermark}}
+    queries = proj1_data.partition_queries(COLLECTION, 4, database_name=DATABASE, query=query)
+    counts = range_counts(collection, queries)
+    assert len(queries) == 4
+    assert sum(counts) == 200
+    # Boundaries sampled from the whole collection would leave all new documents in the last range
+    assert max(counts) < 200
+
+
+def test_parallel_export_of_an_empty_collection(proj1_data, collection, tmp_path):
+    file_path = os.path.join(tmp_path, "data.parquet")
+    assert proj1_data.export_collection_to_parquet(COLLECTION, file_path, database_name=DATABASE, parallelism=4) == 0
+
+
+def export_frame(proj1_data: Proj1Data, server_side_cleanup: bool, **kwargs) -> pd.DataFrame:
+    tables = list(proj1_data.iter_collection_chunks(COLLECTION, database_name=DATABASE,
+                                                    server_side_cleanup=server_side_cleanup, **kwargs))
+    return pa.concat_tables(tables).to_pandas()
+
+
+def dirty(documents: list, seed: int = 0) -> list:
+    """
+    Replaces about 5% of the values of every column but id with "na", "", null or a missing field.
+    """
+    rng = np.random.default_rng(seed)
+    for document in documents:
+        for column in list(document):
+            if column != "id" and rng.random() < 0.05:
+                kind = rng.integers(0, 4)
+                if kind == 3:
+                    del document[column]
+                else:
+                    document[column] = ["na", "", None][kind]
+    return documents
+
+
+@pytest.mark.parametrize("chunk_rows", [64, 10_000])
+def test_find_and_aggregation_paths_export_equal_frames(proj1_data, collection, chunk_rows):
+    collection.insert_many(dirty(make_documents(1000)))
+    client_df = export_frame(proj1_data, False, chunk_rows=chunk_rows)
+    server_df = export_frame(proj1_data, True, chunk_rows=chunk_rows)
+    pd.testing.assert_frame_equal(client_df, server_df)
+    assert client_df.isna().any().drop("_id").all()
+
+
+def test_missing_values_are_cleaned_up_alike(proj1_data, collection):
+    documents = make_documents(5)
+    for column in ("Gender", "Age", "Annual_Premium", "Vehicle_Age", "Vehicle_Damage"):
+        documents[0][column] = "na"
+        documents[1][column] = ""
+        documents[2][column] = None
+        del documents[3][column]
+    collection.insert_many(documents)
+    client_df = export_frame(proj1_data, False)
+    server_df = export_frame(proj1_data, True)
+    pd.testing.assert_frame_equal(client_df, server_df)
+    cleaned = client_df[["Gender", "Age", "Annual_Premium", "Vehicle_Age", "Vehicle_Damage"]]
+    assert cleaned.iloc[:4].isna().all().all()
+    assert cleaned.iloc[4].notna().all()
+
+
+def test_numeric_strings_are_converted_alike(proj1_data, collection):
+    documents = make_documents(4)
+    for column in ("Age", "Region_Code", "Annual_Premium", "Vintage"):
+        documents[0][column] = str(documents[0][column])
+    documents[1]["Age"] = "35"
+    documents[2]["Annual_Premium"] = "2630.5"
+    collection.insert_many(documents)
+    client_df = export_frame(proj1_data, False)
+    server_df = export_frame(proj1_data, True)
+    pd.testing.assert_frame_equal(client_df, server_df)
+    assert client_df["Age"].iloc[1] == 35
+    assert client_df["Annual_Premium"].iloc[2] == 2630.5
+    assert client_df[["Age", "Region_Code", "Annual_Premium", "Vintage"]].notna().all().all()
@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.entity.config_entity import TrainingJobConfig
+from src.pipeline.training_job_runner import TrainingJobAlreadyRunning, TrainingJobRunner
+
+
+@pytest.fixture
+def runner(tmp_path) -> TrainingJobRunner:
+    return TrainingJobRunner(TrainingJobConfig(training_job_dir=str(tmp_path),
+                                               lock_file_path=str(tmp_path / "training.lock"),
+                                               lock_grace_seconds=60))
+
+
+def write_status(runner: TrainingJobRunner, job_id: str, status: str) -> None:
+    job_dir = os.path.join(runner.training_job_config.training_job_dir, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    with open(os.path.join(job_dir, runner.training_job_config.status_file_name), "w") as status_file:
+        json.dump({"job_id": job_id, "status": status}, status_file)
+
+
+def test_lock_without_status_is_held_during_grace_period(runner):
+    runner._acquire_lock("job-1")
+    with pytest.raises(TrainingJobAlreadyRunning) as excinfo:
+        runner._acquire_lock("job-2")
+    assert excinfo.value.job_id == "job-1"
+
+    # Past the grace period a lock whose job never wrote a status is stale
+    old = time.time() - 120
+    os.utime(runner.training_job_config.lock_file_path, (old, old))
+    runner._acquire_lock("job-2")
+    with open(runner.training_job_config.lock_file_path) as lock_file:
+        assert lock_file.read() == "job-2"
+
+
+def test_lock_of_finished_job_is_taken_over(runner):
+    runner._acquire_lock("job-1")
+    write_status(runner, "job-1", "running")
+    with pytest.raises(TrainingJobAlreadyRunning):
+        runner._acquire_lock("job-2")
+
+    write_status(runner, "job-1", "failed")
+    runner._acquire_lock("job-2")
+    with open(runner.training_job_config.lock_file_path) as lock_file:
+        assert lock_file.read() == "job-2"
+    assert sorted(os.listdir(runner.training_job_config.training_job_dir)) == ["job-1", "training.lock"]
+
+
+def test_concurrent_requests_take_the_lock_once(runner):
+    winners, barrier = [], threading.Barrier(8)
+
+    def acquire(job_id: str) -> None:
+        barrier.wait()
+        try:
+            runner._acquire_lock(job_id)
+            winners.append(job_id)
+        except TrainingJobAlreadyRunning:
+            pass
+
+    threads = [threading.Thread(target=acquire, args=(f"job-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(winners) == 1
+    with open(runner.training_job_config.lock_file_path) as lock_file:
+        assert lock_file.read() == winners[0]